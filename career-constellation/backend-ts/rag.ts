@@ -20,6 +20,33 @@ function getProjectRoot() {
   return projectRoot;
 }
 
+// Must match INDEX_VERSION in build_rag_index.py
+const RAG_INDEX_VERSION = 2;
+
+// size:mtime_ns of the files the index is built from, keyed like source_fingerprints() in build_rag_index.py
+async function sourceFingerprints(): Promise<Record<string, string>> {
+  const root = getProjectRoot();
+  const reports = await fs.readdir(path.join(root, 'reports')).catch(() => [] as string[]);
+  const similarity = [
+    path.join(root, '..', 'employees_with_skills_and_similarity.csv'),
+    path.join(root, 'employees_with_skills_and_similarity.csv'),
+  ];
+  const paths = [
+    ...reports.filter(f => f.endsWith('.md')).sort().map(f => path.join(root, 'reports', f)),
+    path.join(root, 'constellation_data_full.csv'),
+  ];
+  for (const p of similarity) {
+    if (await fs.stat(p).then(() => true, () => false)) { paths.push(p); break; }
+  }
+
+  const sources: Record<string, string> = {};
+  for (const p of paths) {
+    const stat = await fs.stat(p, { bigint: true }).catch(() => null);
+    if (stat) sources[path.relative(root, p).split(path.sep).join('/')] = `${stat.size}:${stat.mtimeNs}`;
+  }
+  return sources;
+}
+
 // ─── Types ────────────────────────────────────────────────────────────────────
 
 interface Job {
@@ -63,7 +90,17 @@ interface TextChunk {
   type: 'report' | 'job' | 'stats' | 'similarity' | 'cluster_profile';
   source: string;
   metadata: Record<string, any>;
-  embedding?: number[];
+  embedding?: number[] | Float32Array;
+}
+
+// Prebuilt by build_rag_index.py: term → [idf, doc ids, term freqs]
+interface Bm25Index {
+  k1: number;
+  b: number;
+  n_docs: number;
+  avgdl: number;
+  doc_lengths: number[];
+  terms: Record<string, [number, number[], number[]]>;
 }
 
 interface RetrievalResult {
@@ -73,7 +110,7 @@ interface RetrievalResult {
 
 // ─── Helpers ──────────────────────────────────────────────────────────────────
 
-function cosineSimilarity(a: number[], b: number[]): number {
+function cosineSimilarity(a: ArrayLike<number>, b: ArrayLike<number>): number {
   if (a.length !== b.length || a.length === 0) return 0;
   let dot = 0, normA = 0, normB = 0;
   for (let i = 0; i < a.length; i++) {
@@ -145,6 +182,8 @@ export class RAGSystem {
   private jobs: Job[] = [];
   private similarityRecords: SimilarityRecord[] = [];
   private isInitialized = false;
+  private indexLoaded = false;
+  private bm25: Bm25Index | null = null;
   private stats: any = null;
 
   // Near-duplicate pairs (similarity >= 0.95)
@@ -209,17 +248,18 @@ export class RAGSystem {
         }
       }
     } else {
-      // Fallback to FS-based loading (Node.js)
+      // Fallback to FS-based loading (Node.js); chunks come from the prebuilt index when present
+      this.indexLoaded = await this.loadIndex();
       await Promise.all([
-        this.loadReports(),
-        this.loadJobsFromCSV(),
+        this.indexLoaded ? Promise.resolve() : this.loadReports(),
+        this.loadJobsFromCSV(!this.indexLoaded),
         this.loadSimilarityData(),
         this.loadStats(),
       ]);
     }
 
     // Build similarity-derived chunks (near-dups, cluster profiles)
-    this.buildSimilarityChunks();
+    if (!this.indexLoaded) this.buildSimilarityChunks();
 
     // Embed all chunks in parallel batches
     // In Worker environment, we might want to skip this or use pre-calculated embeddings
@@ -257,6 +297,48 @@ export class RAGSystem {
 
   // ── Data Loaders ──────────────────────────────────────────────────────────
 
+  // Versioned artifact from build_rag_index.py: chunks, packed float32 embeddings, BM25 index
+  private async loadIndex(): Promise<boolean> {
+    const indexDir = path.join(getProjectRoot(), 'rag_index');
+    let manifest: any;
+    try {
+      manifest = JSON.parse(await fs.readFile(path.join(indexDir, 'manifest.json'), 'utf-8'));
+    } catch {
+      return false;
+    }
+    if (manifest.version !== RAG_INDEX_VERSION) {
+      console.log(`  ⚠️  rag_index is v${manifest.version}, expected v${RAG_INDEX_VERSION} — building chunks at startup`);
+      return false;
+    }
+    const current = await sourceFingerprints();
+    const recorded: Record<string, string> = manifest.sources || {};
+    const stale = [...new Set([...Object.keys(current), ...Object.keys(recorded)])]
+      .filter(name => current[name] !== recorded[name]);
+    if (stale.length) {
+      console.log(`  ⚠️  rag_index is stale (${stale.slice(0, 3).join(', ')}${stale.length > 3 ? ', …' : ''} changed) ` +
+        `— building chunks at startup; rerun build_rag_index.py`);
+      return false;
+    }
+
+    const [chunksText, bm25Text] = await Promise.all([
+      fs.readFile(path.join(indexDir, manifest.files.chunks), 'utf-8'),
+      fs.readFile(path.join(indexDir, manifest.files.bm25), 'utf-8'),
+    ]);
+    this.chunks = JSON.parse(chunksText);
+    this.bm25 = JSON.parse(bm25Text);
+
+    const dim: number = manifest.dim || 0;
+    if (manifest.files.embeddings && dim > 0) {
+      const buf = await fs.readFile(path.join(indexDir, manifest.files.embeddings));
+      // Copy so the Float32Array view is 4-byte aligned (pooled Buffers may not be)
+      const matrix = new Float32Array(buf.buffer.slice(buf.byteOffset, buf.byteOffset + buf.byteLength));
+      this.chunks.forEach((chunk, i) => { chunk.embedding = matrix.subarray(i * dim, (i + 1) * dim); });
+    }
+    console.log(`  📦 RAG index v${manifest.version} loaded — ${this.chunks.length} chunks, ` +
+      `${dim > 0 ? `${dim}-d embeddings` : 'lexical only'} (built ${manifest.built_at})`);
+    return true;
+  }
+
   private async loadReports(): Promise<void> {
     const reportsDir = path.join(getProjectRoot(), 'reports');
     const files = (await fs.readdir(reportsDir)).filter(f => f.endsWith('.md'));
@@ -287,7 +369,7 @@ export class RAGSystem {
     }
   }
 
-  private async loadJobsFromCSV(): Promise<void> {
+  private async loadJobsFromCSV(addChunks = true): Promise<void> {
     const csvPath = path.join(getProjectRoot(), 'constellation_data_full.csv');
     const fileContent = await fs.readFile(csvPath, 'utf-8');
     const { data: records } = Papa.parse(fileContent, { header: true, skipEmptyLines: true });
@@ -315,7 +397,7 @@ export class RAGSystem {
     }));
 
     // Add each job as a RAG chunk (compressed to key fields only for performance)
-    for (const job of this.jobs) {
+    for (const job of addChunks ? this.jobs : []) {
       this.chunks.push({
         id: `job-${job.id}`,
         content: this.formatJobForRAG(job),
@@ -522,25 +604,50 @@ ${sample}
   }
 
   private async embedAllChunks(): Promise<void> {
-    console.log(`  🔢 Embedding ${this.chunks.length} chunks...`);
+    // Chunks loaded from rag_index already carry their embeddings
+    const pending = this.chunks.filter(c => !c.embedding || c.embedding.length === 0);
+    if (pending.length === 0) return;
+    console.log(`  🔢 Embedding ${pending.length} chunks...`);
     const BATCH = 20; // Gemini embedding API allows batching
     let done = 0;
 
-    for (let i = 0; i < this.chunks.length; i += BATCH) {
-      const batch = this.chunks.slice(i, i + BATCH);
+    for (let i = 0; i < pending.length; i += BATCH) {
+      const batch = pending.slice(i, i + BATCH);
       await Promise.all(
         batch.map(async (chunk) => {
           chunk.embedding = await this.embedText(chunk.content);
         })
       );
       done += batch.length;
-      if (done % 200 === 0) console.log(`    ... ${done}/${this.chunks.length}`);
+      if (done % 200 === 0) console.log(`    ... ${done}/${pending.length}`);
     }
     console.log(`  ✅ All chunks embedded`);
   }
 
   // ── Retrieval ─────────────────────────────────────────────────────────────
 
+  // BM25 for every chunk from the prebuilt postings (only the query terms' lists are touched),
+  // normalized to [0, 1] by the best achievable score for the matched terms
+  private bm25Scores(query: string): Float32Array | null {
+    if (!this.bm25) return null;
+    const { k1, b, avgdl, doc_lengths, terms } = this.bm25;
+    const scores = new Float32Array(this.chunks.length);
+    const queryTerms = query.toLowerCase().match(/\b\w{2,}\b/g) || [];
+    let maxScore = 0;
+    for (const term of queryTerms) {
+      const entry = terms[term];
+      if (!entry) continue;
+      const [idf, ids, tfs] = entry;
+      maxScore += idf * (k1 + 1);
+      for (let i = 0; i < ids.length; i++) {
+        const tf = tfs[i];
+        scores[ids[i]] += idf * (tf * (k1 + 1)) / (tf + k1 * (1 - b + b * (doc_lengths[ids[i]] / avgdl)));
+      }
+    }
+    if (maxScore > 0) for (let i = 0; i < scores.length; i++) scores[i] /= maxScore;
+    return scores;
+  }
+
   async retrieve(query: string, topK = 8): Promise<RetrievalResult[]> {
     await this.initialize();
 
@@ -556,18 +663,22 @@ ${sample}
       console.warn('Query embedding failed — falling back to BM25');
     }
 
-    const results: RetrievalResult[] = this.chunks.map(chunk => {
+    const lexicalScores = this.bm25Scores(query);
+    const lexicalScore = (chunk: TextChunk, i: number) =>
+      lexicalScores ? lexicalScores[i] : bm25Score(query, chunk.content);
+
+    const results: RetrievalResult[] = this.chunks.map((chunk, i) => {
       let score = 0;
 
       if (queryEmbedding.length > 0 && chunk.embedding && chunk.embedding.length > 0) {
         // Primary: semantic cosine similarity
         const semantic = cosineSimilarity(queryEmbedding, chunk.embedding);
         // Secondary: BM25 lexical boost
-        const lexical = bm25Score(query, chunk.content);
+        const lexical = lexicalScore(chunk, i);
         score = 0.75 * semantic + 0.25 * lexical;
       } else {
         // Fallback if embedding failed
-        score = bm25Score(query, chunk.content);
+        score = lexicalScore(chunk, i);
       }
 
       // Boost certain chunk types based on query intent
@@ -821,6 +932,7 @@ export const ragEngine = {
     const reportSources = [...new Set(chunks.filter(c => c.type === 'report').map(c => c.source))];
     return {
       initialized: (rag as any).isInitialized || false,
+      index_loaded: (rag as any).indexLoaded || false,
       chunk_count: chunks.length,
       job_count: (rag as any).jobs?.length || 0,
       reports_loaded: chunks.filter(c => c.type === 'report').length,
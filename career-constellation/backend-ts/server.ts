@@ -19,17 +19,81 @@ const app = express();
 app.use(cors());
 app.use(express.json());
 
-// Load static data
-const constellationData = JSON.parse(
-  fs.readFileSync(path.join(projectRoot, 'frontend', 'public', 'constellation_data.json'), 'utf-8')
-);
+const publicDir = path.join(projectRoot, 'frontend', 'public');
+const constellationPath = path.join(publicDir, 'constellation_data.json');
+
+// Random-access job store (jobs.ndjson + jobs.idx, written by generate_constellation_data.py):
+// the index maps id → (offset, length), so one job is a single positioned read
+interface JobStore {
+  get(id: number): any | undefined;
+}
+
+function openJobStore(ndjsonPath: string, indexPath: string): JobStore | null {
+  if (!fs.existsSync(ndjsonPath) || !fs.existsSync(indexPath)) return null;
+  const index = fs.readFileSync(indexPath);
+  if (index.toString('latin1', 0, 8) !== 'JOBIDX01') return null;
+  const count = index.readUInt32LE(8);
+  const HEADER = 16, RECORD = 16;   // u32 id, u32 length, u64 offset
+  const fd = fs.openSync(ndjsonPath, 'r');
+  return {
+    get(id: number) {
+      let lo = 0, hi = count - 1;
+      while (lo <= hi) {
+        const mid = (lo + hi) >> 1;
+        const at = HEADER + mid * RECORD;
+        const midId = index.readUInt32LE(at);
+        if (midId < id) lo = mid + 1;
+        else if (midId > id) hi = mid - 1;
+        else {
+          const length = index.readUInt32LE(at + 4);
+          const buf = Buffer.alloc(length);
+          fs.readSync(fd, buf, 0, length, Number(index.readBigUInt64LE(at + 8)));
+          return JSON.parse(buf.toString('utf-8'));
+        }
+      }
+      return undefined;
+    },
+  };
+}
+
+// Load static data: with the job store only the jobs-free summary is parsed at startup
+const jobStore = openJobStore(path.join(publicDir, 'jobs.ndjson'), path.join(publicDir, 'jobs.idx'));
+const summaryPath = path.join(publicDir, 'constellation_summary.json');
+const constellationData = jobStore && fs.existsSync(summaryPath)
+  ? null
+  : JSON.parse(fs.readFileSync(constellationPath, 'utf-8'));
+const summary = constellationData ?? JSON.parse(fs.readFileSync(summaryPath, 'utf-8'));
 const statsData = JSON.parse(
   fs.readFileSync(path.join(projectRoot, 'frontend', 'public', 'stats_data.json'), 'utf-8')
 );
 
+// Skill/keyword inverted index + facet counts (written by generate_constellation_data.py)
+const skillIndexPath = path.join(projectRoot, 'frontend', 'public', 'skill_index.json');
+const skillIndex = fs.existsSync(skillIndexPath)
+  ? JSON.parse(fs.readFileSync(skillIndexPath, 'utf-8'))
+  : null;
+
+// Intersection of two ascending id lists
+function intersectSorted(a: number[], b: number[]): number[] {
+  const out: number[] = [];
+  let i = 0, j = 0;
+  while (i < a.length && j < b.length) {
+    if (a[i] === b[j]) { out.push(a[i]); i++; j++; }
+    else if (a[i] < b[j]) i++;
+    else j++;
+  }
+  return out;
+}
+
 // Create lookup maps
-const jobMap = new Map(constellationData.jobs.map((j: any) => [j.id, j]));
-const clusterMap = new Map(constellationData.clusters.map((c: any) => [c.id, c]));
+const jobMap = constellationData
+  ? new Map(constellationData.jobs.map((j: any) => [j.id, j]))
+  : null;
+const clusterMap = new Map(summary.clusters.map((c: any) => [c.id, c]));
+
+function getJob(id: number): any | undefined {
+  return jobMap ? jobMap.get(id) : jobStore!.get(id);
+}
 
 // Initialize RAG on startup
 ragEngine.initialize().catch(console.error);
@@ -39,14 +103,22 @@ app.get('/', (req, res) => {
   res.json({
     message: 'Career Constellation API (TypeScript + RAG)',
     status: 'running',
-    clusters: constellationData.num_clusters,
-    jobs: constellationData.total_jobs,
+    clusters: summary.num_clusters,
+    jobs: summary.total_jobs,
     rag: 'enabled',
   });
 });
 
 app.get('/api/constellation', (req, res) => {
-  res.json(constellationData);
+  res.sendFile(constellationPath);
+});
+
+// Every job, one JSON object per line (streamed from disk)
+app.get('/api/jobs.ndjson', (req, res) => {
+  res.type('application/x-ndjson');
+  res.sendFile(path.join(publicDir, 'jobs.ndjson'), (err) => {
+    if (err && !res.headersSent) res.status(503).json({ error: 'jobs.ndjson not generated' });
+  });
 });
 
 app.get('/api/stats', (req, res) => {
@@ -54,13 +126,15 @@ app.get('/api/stats', (req, res) => {
 });
 
 app.get('/api/job/:id', (req, res) => {
-  const job = jobMap.get(parseInt(req.params.id));
+  const job = getJob(parseInt(req.params.id));
   if (!job) return res.status(404).json({ error: 'Job not found' });
 
   const jobData = job as any;
   const similarJobs = (jobData.similar_jobs || [])
     .map((s: any) => {
-      const similarJob = constellationData.jobs.find((j: any) => j.employee_id === s.employee_id);
+      const similarJob = s.id !== undefined
+        ? getJob(s.id)
+        : constellationData?.jobs.find((j: any) => j.employee_id === s.employee_id);
       if (!similarJob) return null;
       return {
         id: similarJob.id,
@@ -76,63 +150,44 @@ app.get('/api/job/:id', (req, res) => {
   res.json({
     ...jobData,
     similar_jobs: similarJobs,
-    coordinates: { x: jobData.x, y: jobData.y, z: 0 },
+    coordinates: { x: jobData.x, y: jobData.y, z: jobData.z ?? 0 },
   });
 });
 
-app.get('/api/clusters/:id/details', (req, res) => {
-  const cluster = clusterMap.get(parseInt(req.params.id));
-  if (!cluster) return res.status(404).json({ error: 'Cluster not found' });
-
-  const clusterData = cluster as any;
-  const clusterJobs = constellationData.jobs.filter((j: any) => j.cluster_id === clusterData.id);
-
-  const skillCounts: Record<string, number> = {};
-  clusterJobs.forEach((j: any) => j.skills.forEach((s: string) => {
-    skillCounts[s] = (skillCounts[s] || 0) + 1;
-  }));
+// Per-cluster details are precomputed by generate_constellation_data.py (static, ETag-cacheable)
+const clusterDetailsDir = path.join(projectRoot, 'frontend', 'public', 'cluster_details');
+const clusterMessinessPath = path.join(projectRoot, 'frontend', 'public', 'cluster_messiness.json');
 
-  const keywordCounts: Record<string, number> = {};
-  clusterJobs.forEach((j: any) => j.keywords.forEach((k: string) => {
-    keywordCounts[k] = (keywordCounts[k] || 0) + 1;
-  }));
+app.get('/api/clusters/:id/details', (req, res) => {
+  const id = parseInt(req.params.id);
+  if (!clusterMap.has(id)) return res.status(404).json({ error: 'Cluster not found' });
+  res.sendFile(path.join(clusterDetailsDir, `${id}.json`), (err) => {
+    if (err && !res.headersSent) res.status(503).json({ error: 'Cluster details not generated' });
+  });
+});
 
-  // Get real near-duplicate pairs for this cluster from the RAG system
-  const allPairs = ragEngine.getNearDuplicatePairs(0.95);
-  const clusterPairs = allPairs.filter(
-    (p: any) => clusterJobs.some((j: any) => j.employee_id === p.emp1 || j.employee_id === p.emp2)
-  );
+// Jobs having every requested skill (?skill=A&skill=B), optionally within a cluster/department
+app.get('/api/skills/jobs', (req, res) => {
+  if (!skillIndex) return res.status(503).json({ error: 'skill_index.json not generated' });
+  const skills = ([] as string[]).concat((req.query.skill as string | string[]) || []);
+  if (skills.length === 0) return res.status(400).json({ error: 'skill is required' });
 
-  // Messiness score = duplicate pairs / cluster size
-  const messinessRaw = clusterJobs.length > 0 ? clusterPairs.length / clusterJobs.length : 0;
-  const messinessScore = Math.min(messinessRaw, 1.0);
+  let ids: number[] = skillIndex.skill_jobs[skills[0]] || [];
+  for (const skill of skills.slice(1)) ids = intersectSorted(ids, skillIndex.skill_jobs[skill] || []);
+  for (const kind of ['cluster', 'department']) {
+    const key = req.query[kind] as string | undefined;
+    if (key !== undefined) ids = intersectSorted(ids, skillIndex.facets[kind][key]?.jobs || []);
+  }
+  res.json({ skills, total: ids.length, job_ids: ids });
+});
 
-  res.json({
-    cluster_id: clusterData.id,
-    label: clusterData.label,
-    size: clusterData.size,
-    messiness_score: messinessScore,
-    jobs: clusterJobs.map((j: any) => ({
-      id: j.id,
-      employee_id: j.employee_id,
-      title: j.title,
-      summary: j.summary?.slice(0, 150) || '',
-    })),
-    top_skills: Object.entries(skillCounts)
-      .sort((a, b) => b[1] - a[1])
-      .slice(0, 10)
-      .map(([skill, count]) => ({ skill, count })),
-    top_keywords: Object.entries(keywordCounts)
-      .sort((a, b) => b[1] - a[1])
-      .slice(0, 10)
-      .map(([keyword, count]) => ({ keyword, count })),
-    standardization_candidates: clusterJobs.slice(0, 5).map((j: any) => j.title),
-    near_duplicate_pairs: clusterPairs.slice(0, 20).map((p: any) => ({
-      emp1: p.emp1, title1: p.title1,
-      emp2: p.emp2, title2: p.title2,
-      similarity: p.score,
-    })),
-  });
+// Precomputed facet counts: /api/facets/cluster/3, /api/facets/department/Finance
+app.get('/api/facets/:kind/:key', (req, res) => {
+  if (!skillIndex) return res.status(503).json({ error: 'skill_index.json not generated' });
+  const facet = skillIndex.facets[req.params.kind]?.[req.params.key];
+  if (!facet) return res.status(404).json({ error: 'Facet not found' });
+  const { jobs, ...counts } = facet;
+  res.json({ kind: req.params.kind, key: req.params.key, ...counts });
 });
 
 // AI Chat with RAG
@@ -219,18 +274,17 @@ app.get('/api/standardization/duplicates', (req, res) => {
   });
 });
 
-// Cluster messiness ranking
+// Cluster messiness ranking (precomputed)
 app.get('/api/standardization/messiness', (req, res) => {
-  const messiness = ragEngine.getClusterMessiness();
-  const ranked = Object.entries(messiness)
-    .map(([id, v]: [string, any]) => ({ cluster_id: id, ...v }))
-    .sort((a: any, b: any) => b.messiness - a.messiness);
-  res.json({ clusters: ranked, total_clusters: ranked.length });
+  res.sendFile(clusterMessinessPath, (err) => {
+    if (err && !res.headersSent) res.status(503).json({ error: 'Messiness ranking not generated' });
+  });
 });
 
 const PORT = process.env.PORT || 8000;
 app.listen(PORT, () => {
   console.log(`🚀 TypeScript RAG Backend running on http://localhost:${PORT}`);
-  console.log(`📊 Serving ${constellationData.total_jobs} jobs in ${constellationData.num_clusters} clusters`);
+  console.log(`📊 Serving ${summary.total_jobs} jobs in ${summary.num_clusters} clusters` +
+    (jobStore ? ' (job store: one seek per job)' : ''));
   console.log(`🤖 RAG Chat: Enabled with Gemini 2.0 Flash`);
 });
@@ -103,7 +103,7 @@ app.get('/api/job/:id', (c) => {
     return c.json({
         ...job,
         similar_jobs: similarJobs,
-        coordinates: { x: job.x, y: job.y, z: 0 },
+        coordinates: { x: job.x, y: job.y, z: job.z ?? 0 },
     });
 });
 
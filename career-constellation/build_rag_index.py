@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Build the versioned RAG index artifact that backend-ts/rag.ts loads at startup.
+
+The backend used to chunk the reports, build job / similarity / cluster-profile
+chunks from the CSVs and embed every chunk on each start, then re-tokenize every
+chunk for BM25 on each query. All of that is done once here:
+
+  rag_index/
+    manifest.json    version, counts, embedding model + dimension, BM25 parameters,
+                     size:mtime_ns of every source file (rag.ts rebuilds in memory on a mismatch)
+    chunks.json      chunk texts + metadata (same ids/content as rag.ts builds)
+    embeddings.f32   packed little-endian float32 matrix (n_chunks × dim), L2-normalized
+    bm25.json        inverted index: term → [idf, doc ids, term freqs], doc lengths, avgdl
+
+Embeddings use the same Gemini model as query embedding in rag.ts
+(text-embedding-004) and need google-generativeai plus GEMINI_API_KEY; without
+them the artifact is written lexical-only and the server falls back to BM25.
+
+Usage:
+    cd career-constellation/
+    python build_rag_index.py
+    python build_rag_index.py --no-embeddings
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from collections import Counter
+from pathlib import Path
+
+# ── Paths ─────────────────────────────────────────────────────────────────────
+
+PROJECT_ROOT   = Path(__file__).parent.resolve()          # career-constellation/
+HACKATHON_ROOT = PROJECT_ROOT.parent
+
+REPORTS_DIR     = PROJECT_ROOT / 'reports'
+JOBS_CSV        = PROJECT_ROOT / 'constellation_data_full.csv'
+SIMILARITY_CSVS = [HACKATHON_ROOT / 'employees_with_skills_and_similarity.csv',
+                   PROJECT_ROOT / 'employees_with_skills_and_similarity.csv']
+OUTPUT_DIR      = PROJECT_ROOT / 'rag_index'
+
+INDEX_VERSION   = 2
+EMBEDDING_MODEL = 'text-embedding-004'
+BM25_K1, BM25_B = 1.5, 0.75
+
+TOKEN_RE = re.compile(r'\b\w{2,}\b', re.ASCII)            # same tokens as rag.ts
+
+# ── Sources ───────────────────────────────────────────────────────────────────
+
+def source_fingerprints() -> dict[str, str]:
+    """size:mtime_ns of every input, keyed by path relative to PROJECT_ROOT (same as rag.ts)."""
+    similarity = next((p for p in SIMILARITY_CSVS if p.exists()), None)
+    paths = [*sorted(REPORTS_DIR.glob('*.md')), JOBS_CSV, *([similarity] if similarity else [])]
+    sources = {}
+    for path in paths:
+        stat = path.stat()
+        sources[Path(os.path.relpath(path, PROJECT_ROOT)).as_posix()] = f"{stat.st_size}:{stat.st_mtime_ns}"
+    return sources
+
+# ── Chunking (mirrors rag.ts) ─────────────────────────────────────────────────
+
+def split_into_chunks(text: str, max_len: int = 900, overlap: int = 120) -> list[str]:
+    """Overlapping chunks of roughly max_len chars on sentence boundaries."""
+    chunks, current = [], ''
+    for sentence in re.split(r'(?<=[.!?])\s+', text):
+        if len(current + sentence) > max_len and current:
+            chunks.append(current.strip())
+            carry, carry_len = [], 0
+            for word in reversed(current.split(' ')):
+                carry_len += len(word) + 1
+                if carry_len > overlap:
+                    break
+                carry.insert(0, word)
+            current = ' '.join(carry) + ' ' + sentence
+        else:
+            current += (' ' if current else '') + sentence
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks or [text]
+
+
+def report_chunks(chunks: list[dict]) -> None:
+    for path in sorted(REPORTS_DIR.glob('*.md')):
+        content = path.read_text(encoding='utf-8')
+        for section in re.split(r'\n(?=#{1,3} )', content):
+            if not section.strip() or not re.match(r'#{1,3}\s+.+', section):
+                continue
+            lines = section.split('\n')
+            header, body = lines[0], '\n'.join(lines[1:]).strip()
+            for sub in split_into_chunks(f'{header}\n\n{body}'):
+                chunks.append({
+                    'id':       f'report-{path.name}-{len(chunks)}',
+                    'content':  sub,
+                    'type':     'report',
+                    'source':   path.name,
+                    'metadata': {'header': header, 'sourceFile': path.name},
+                })
+        print(f"  📄 {path.name} chunked")
+
+
+def split_list(value: str) -> list[str]:
+    return [v.strip() for v in value.split(',')] if value and value != 'None' else []
+
+
+def to_float(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return 0.0
+
+
+def format_job(job: dict) -> str:
+    parts = [f"Job: {job['title']} | Employee: {job['employee_id']} | "
+             f"Cluster: {job['cluster_label']} ({job['cluster_id']})"]
+    if job['job_level']:
+        parts.append(f"Level: {job['job_level']}")
+    if job['summary']:
+        parts.append(f"Summary: {job['summary'][:400]}")
+    if job['responsibilities']:
+        parts.append(f"Responsibilities: {job['responsibilities'][:400]}")
+    if job['qualifications']:
+        parts.append(f"Qualifications: {job['qualifications'][:300]}")
+    if job['keywords']:
+        parts.append(f"Keywords: {', '.join(job['keywords'][:10])}")
+    if job['seniority_score']:
+        buckets = f" ({job['top_seniority_buckets']})" if job['top_seniority_buckets'] else ''
+        parts.append(f"Seniority score: {job['seniority_score']:.2f}{buckets}")
+    parts.append(f"Distance to cluster center: {job['distance_to_center']:.3f} (lower = more typical)")
+    return '\n'.join(parts)
+
+
+def job_chunks(chunks: list[dict]) -> None:
+    rows = pd.read_csv(JOBS_CSV, dtype=str, keep_default_na=False).to_dict('records')
+    for i, r in enumerate(rows):
+        job = {
+            'id':                    i,
+            'employee_id':           r.get('employee_id') or f'EMP_{i + 1:04d}',
+            'title':                 r.get('Unified Job Title (display)') or r.get('title_clean', ''),
+            'summary':               r.get('position_summary', ''),
+            'responsibilities':      r.get('responsibilities', ''),
+            'qualifications':        r.get('qualifications', ''),
+            'cluster_id':            int(float(r['cluster'])),
+            'cluster_label':         r.get('Label', ''),
+            'keywords':              [k.strip() for k in r['Keywords'].split(',')] if r.get('Keywords') else [],
+            'job_level':             r.get('job_level', ''),
+            'seniority_score':       to_float(r.get('seniority_score', '')),
+            'top_seniority_buckets': r.get('top_seniority_buckets', ''),
+            'distance_to_center':    to_float(r.get('Distance_to_Center', '')),
+        }
+        chunks.append({
+            'id':       f"job-{i}",
+            'content':  format_job(job),
+            'type':     'job',
+            'source':   'constellation_data',
+            'metadata': {'job_id': i} | {k: job[k] for k in ('employee_id', 'title', 'cluster_id', 'cluster_label')},
+        })
+    print(f"  💼 {len(rows)} jobs chunked")
+
+
+def similarity_chunks(chunks: list[dict]) -> None:
+    path = next((p for p in SIMILARITY_CSVS if p.exists()), None)
+    if path is None:
+        print("  ⚠️  Similarity CSV not found — skipping near-duplicate chunks")
+        records = []
+    else:
+        records = [{
+            'employee_id':   r['Employee_ID'],
+            'title':         r['title_clean'],
+            'cluster_label': r['Cluster_Label'],
+            'skills':        split_list(r.get('Skills_String', '')),
+            'skills_count':  int(to_float(r.get('Skills_Count', ''))),
+            'similar':       [(r.get(f'Similar_Employee_{n}', ''), to_float(r.get(f'Similar_Employee_{n}_Score', '')))
+                              for n in (1, 2, 3)],
+        } for r in pd.read_csv(path, dtype=str, keep_default_na=False).to_dict('records')]
+
+    by_id = {}
+    for rec in records:
+        by_id.setdefault(rec['employee_id'], rec)
+    pairs, seen = [], set()
+    for rec in records:
+        for sid, score in rec['similar']:
+            if not sid or score < 0.95:
+                continue
+            key = tuple(sorted((rec['employee_id'], sid)))
+            if key in seen:
+                continue
+            seen.add(key)
+            if sid in by_id:
+                pairs.append({'title1': rec['title'], 'title2': by_id[sid]['title'],
+                              'score': score, 'cluster': rec['cluster_label']})
+
+    # 1) Global near-duplicate summary
+    by_cluster: dict[str, list] = {}
+    for p in pairs:
+        by_cluster.setdefault(p['cluster'], []).append(p)
+    summary = '\n\n'.join(
+        f"**{cluster}** — {len(cp)} near-duplicate pairs:\n" + '\n'.join(
+            f'  • "{p["title1"]}" ↔ "{p["title2"]}" (score: {p["score"] * 100:.1f}%)' for p in cp[:3]
+        )
+        for cluster, cp in sorted(by_cluster.items(), key=lambda kv: -len(kv[1]))
+    )
+    chunks.append({
+        'id': 'similarity-global-near-duplicates',
+        'content': f"""# Near-Duplicate Job Pairs — Standardization Candidates
+
+Total near-duplicate pairs (cosine similarity ≥ 0.95): **{len(pairs)}**
+
+These pairs have almost identical job descriptions and are prime candidates for title/role standardization.
+
+{summary}
+
+**Recommendation:** Merging near-duplicate roles within the same cluster would reduce the total job description count by up to {len(pairs)} profiles, moving Methanex toward fewer, standardized job families.""",
+        'type': 'similarity',
+        'source': 'similarity_analysis',
+        'metadata': {'type': 'near_duplicates_global', 'count': len(pairs)},
+    })
+
+    # 2) Per-cluster skill profiles
+    groups: dict[str, list] = {}
+    for rec in records:
+        groups.setdefault(rec['cluster_label'], []).append(rec)
+    for label, members in groups.items():
+        counts = Counter(s for m in members for s in m['skills'])
+        top = ', '.join(f"{sk} ({cnt}/{len(members)} employees)"
+                        for sk, cnt in sorted(counts.items(), key=lambda kv: -kv[1])[:8])
+        avg = f"{sum(m['skills_count'] for m in members) / len(members):.1f}"
+        dups = by_cluster.get(label, [])
+        if dups:
+            opportunity = (f"**Standardization opportunity:** {len(dups)} role pairs in this cluster are "
+                           f"≥95% similar and could be merged into a single job profile.\n"
+                           f"Example: \"{dups[0]['title1']}\" and \"{dups[0]['title2']}\" "
+                           f"({dups[0]['score'] * 100:.1f}% match)")
+        else:
+            opportunity = 'No near-duplicate pairs — roles in this cluster are well-differentiated.'
+        slug = re.sub(r'\s+', '-', label)
+        chunks.append({
+            'id': f"cluster-profile-{slug}",
+            'content': f"""# Cluster: {label}
+
+**Size:** {len(members)} employees
+**Average skills per employee:** {avg}
+**Top skills:** {top or 'None identified'}
+**Near-duplicate pairs within cluster:** {len(dups)}
+
+{opportunity}""",
+            'type': 'cluster_profile',
+            'source': 'cluster_analysis',
+            'metadata': {'cluster_label': label, 'size': len(members), 'dup_count': len(dups)},
+        })
+
+    # 3) Outlier / unique roles
+    outliers = [r for r in records if r['similar'][0][1] < 0.80 and r['skills_count'] <= 1]
+    if outliers:
+        sample = '\n'.join(f"• {r['title']} ({r['cluster_label']})" for r in outliers[:10])
+        chunks.append({
+            'id': 'similarity-outliers',
+            'content': f"""# Unique / Outlier Roles — Potential Niche Positions
+
+These {len(outliers)} roles have low similarity to any other position (max neighbor score < 80%) and very few identifiable skills. They may represent truly unique specialized roles, or job descriptions that need improvement.
+
+Sample outlier roles:
+{sample}
+
+**Recommendation:** Review these roles for completeness. Some may represent genuinely unique specialist positions; others may simply have sparse job descriptions that prevented proper clustering.""",
+            'type': 'similarity',
+            'source': 'similarity_analysis',
+            'metadata': {'type': 'outliers', 'count': len(outliers)},
+        })
+    print(f"  🧩 {len(pairs)} near-duplicate pairs, {len(groups)} cluster profiles")
+
+# ── BM25 ──────────────────────────────────────────────────────────────────────
+
+def build_bm25(texts: list[str]) -> dict:
+    """Inverted index with Lucene-style IDF, so queries only touch their terms' postings."""
+    postings: dict[str, tuple[list[int], list[int]]] = {}
+    doc_lengths = []
+    for doc, text in enumerate(texts):
+        terms = TOKEN_RE.findall(text.lower())
+        doc_lengths.append(len(terms))
+        for term, tf in Counter(terms).items():
+            ids, tfs = postings.setdefault(term, ([], []))
+            ids.append(doc)
+            tfs.append(tf)
+    n = len(texts)
+    return {
+        'k1':          BM25_K1,
+        'b':           BM25_B,
+        'n_docs':      n,
+        'avgdl':       float(np.mean(doc_lengths)) if doc_lengths else 0.0,
+        'doc_lengths': doc_lengths,
+        'terms': {
+            term: [round(float(np.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))), 6), ids, tfs]
+            for term, (ids, tfs) in sorted(postings.items())
+        },
+    }
+
+# ── Embeddings ────────────────────────────────────────────────────────────────
+
+def embed_chunks(texts: list[str]) -> np.ndarray | None:
+    """L2-normalized float32 embeddings, or None when Gemini is not available."""
+    api_key = os.environ.get('GEMINI_API_KEY')
+    try:
+        import google.generativeai as genai
+    except ImportError:
+        print("  ⚠️  google-generativeai not installed — writing a lexical-only index "
+              "(pip install google-generativeai)")
+        return None
+    if not api_key:
+        print("  ⚠️  GEMINI_API_KEY not set — writing a lexical-only index")
+        return None
+
+    if str(HACKATHON_ROOT) not in sys.path:
+        sys.path.insert(0, str(HACKATHON_ROOT))
+    from embedding_batches import embed_packed
+
+    genai.configure(api_key=api_key.strip())
+
+    def embed_batch(batch):
+        result = genai.embed_content(model=f'models/{EMBEDDING_MODEL}',
+                                     content=[t[:8000] for t in batch], task_type='retrieval_document')
+        return result['embedding']
+
+    print(f"  🔢 Embedding {len(texts)} chunks with {EMBEDDING_MODEL}…")
+    X = embed_packed(embed_batch, texts, max_instances=100, verbose=True)
+    return X / np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-12)
+
+# ── Main ──────────────────────────────────────────────────────────────────────
+
+def build_index(output_dir: Path = OUTPUT_DIR, embed: bool = True) -> dict:
+    sources = source_fingerprints()          # taken first: an edit during the build reads as stale
+    chunks: list[dict] = []
+    report_chunks(chunks)
+    job_chunks(chunks)
+    similarity_chunks(chunks)
+
+    texts = [c['content'] for c in chunks]
+    bm25 = build_bm25(texts)
+    X = embed_chunks(texts) if embed else None
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(output_dir / 'chunks.json', 'w') as f:
+        json.dump(chunks, f, ensure_ascii=False)
+    with open(output_dir / 'bm25.json', 'w') as f:
+        json.dump(bm25, f, ensure_ascii=False, separators=(',', ':'))
+    embeddings_file = output_dir / 'embeddings.f32'
+    if X is not None:
+        X.astype('<f4').tofile(embeddings_file)
+    elif embeddings_file.exists():
+        embeddings_file.unlink()
+
+    # Written last: the server treats the index as present only when the manifest is
+    manifest = {
+        'version':         INDEX_VERSION,
+        'built_at':        time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'n_chunks':        len(chunks),
+        'embedding_model': EMBEDDING_MODEL if X is not None else None,
+        'dim':             int(X.shape[1]) if X is not None else 0,
+        'files':           {'chunks': 'chunks.json', 'bm25': 'bm25.json',
+                            'embeddings': 'embeddings.f32' if X is not None else None},
+        'bm25':            {'k1': BM25_K1, 'b': BM25_B, 'n_terms': len(bm25['terms'])},
+        'sources':         sources,
+    }
+    with open(output_dir / 'manifest.json', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Build the RAG index artifact for backend-ts.")
+    parser.add_argument('--output', type=Path, default=OUTPUT_DIR, help="Output directory")
+    parser.add_argument('--no-embeddings', action='store_true', help="Write a lexical-only index")
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print("RAG Index Builder")
+    print("=" * 60)
+    manifest = build_index(args.output, embed=not args.no_embeddings)
+    print(f"\n  ✅ {manifest['n_chunks']} chunks, {manifest['bm25']['n_terms']} terms, "
+          f"embeddings: {manifest['dim'] or 'none'}-d → {args.output}/")
+    print("\n" + "=" * 60)
+    print("Done! Restart the backend to load the new index.")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Skill/keyword inverted index and facet counts for the constellation export.
+
+Skills and keywords are stored per job as lists, so filtering by skill or
+counting skills per cluster means scanning every job. Here the lists are
+turned into sparse job×skill and job×keyword incidence matrices once, at
+export time, and everything the API needs is read off them:
+
+  - inverted index: skill / keyword → sorted job ids (a CSC column slice)
+  - facet counts:   per cluster and per department, one sparse product
+                    (group indicator × incidence matrix)
+
+Usage:
+    from constellation_index import build_skill_index
+
+    index = build_skill_index(constellation)   # → skill_index.json
+"""
+
+import numpy as np
+from scipy import sparse
+
+INDEX_VERSION = 1
+
+# ── Incidence matrices ────────────────────────────────────────────────────────
+
+def incidence_matrix(values: list[list[str]]) -> tuple[sparse.csr_matrix, list[str]]:
+    """Sparse 0/1 matrix (jobs × vocabulary) plus the sorted vocabulary."""
+    vocab = sorted({v for row in values for v in row})
+    col = {v: i for i, v in enumerate(vocab)}
+    rows = np.repeat(np.arange(len(values)), [len(row) for row in values])
+    cols = np.fromiter((col[v] for row in values for v in row), dtype=np.int64, count=len(rows))
+    M = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(len(values), len(vocab))
+    )
+    M.data[:] = 1                       # a skill listed twice on one job still counts once
+    return M, vocab
+
+
+def group_indicator(groups: list) -> tuple[sparse.csr_matrix, list]:
+    """Sparse (groups × jobs) indicator so G @ M gives per-group column totals."""
+    keys, codes = np.unique(np.asarray(groups, dtype=object).astype(str), return_inverse=True)
+    n = len(groups)
+    G = sparse.csr_matrix(
+        (np.ones(n, dtype=np.int32), (codes, np.arange(n))), shape=(len(keys), n)
+    )
+    return G, list(keys)
+
+
+def inverted_index(M: sparse.spmatrix, vocab: list[str], job_ids: np.ndarray) -> dict[str, list[int]]:
+    """term → sorted job ids, read straight off the CSC column pointers."""
+    C = sparse.csc_matrix(M)
+    C.sort_indices()
+    return {
+        term: np.sort(job_ids[C.indices[C.indptr[j]:C.indptr[j + 1]]]).tolist()
+        for j, term in enumerate(vocab)
+    }
+
+
+def facet_counts(G: sparse.spmatrix, keys: list, M: sparse.spmatrix, vocab: list[str]) -> dict:
+    """group → {term: job count}, most frequent first."""
+    counts = sparse.csr_matrix(G @ M)
+    facets = {}
+    for g, key in enumerate(keys):
+        start, end = counts.indptr[g], counts.indptr[g + 1]
+        cols, vals = counts.indices[start:end], counts.data[start:end]
+        order = np.lexsort((cols, -vals))
+        facets[key] = {vocab[c]: int(v) for c, v in zip(cols[order], vals[order])}
+    return facets
+
+# ── Export ────────────────────────────────────────────────────────────────────
+
+def build_skill_index(constellation: dict) -> dict:
+    print("Building skill_index.json…")
+    jobs    = constellation['jobs']
+    job_ids = np.array([j['id'] for j in jobs], dtype=np.int64)
+
+    S, skills   = incidence_matrix([j['skills'] for j in jobs])
+    K, keywords = incidence_matrix([j['keywords'] for j in jobs])
+
+    facets = {}
+    for name, field in (('cluster', 'cluster_id'), ('department', 'department')):
+        groups = [j.get(field) if j.get(field) not in (None, '') else 'Unknown' for j in jobs]
+        G, keys = group_indicator(groups)
+        members        = inverted_index(G.T, keys, job_ids)
+        skill_facets   = facet_counts(G, keys, S, skills)
+        keyword_facets = facet_counts(G, keys, K, keywords)
+        facets[name] = {
+            key: {
+                'size':     len(members[key]),
+                'jobs':     members[key],
+                'skills':   skill_facets[key],
+                'keywords': keyword_facets[key],
+            }
+            for key in keys
+        }
+
+    print(f"  {len(skills)} skills, {len(keywords)} keywords, "
+          f"{S.nnz + K.nnz} job-term links")
+    return {
+        'version':      INDEX_VERSION,
+        'total_jobs':   len(jobs),
+        'skill_jobs':   inverted_index(S, skills, job_ids),
+        'keyword_jobs': inverted_index(K, keywords, job_ids),
+        'skill_counts': dict(zip(skills, np.asarray(S.sum(axis=0)).ravel().tolist())),
+        'facets':       facets,
+    }
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Build stats_data.json from a constellation export.
+
+generate_constellation_data.py calls build_stats as part of a full export.
+Run this module directly to regenerate stats_data.json from the existing
+constellation_data.json without the pandas merge (it only needs numpy, so
+it starts in a fraction of a second).
+
+Usage:
+    cd career-constellation/
+    python constellation_stats.py
+"""
+
+import json
+import numpy as np
+from collections import Counter
+from pathlib import Path
+
+# ── Paths ─────────────────────────────────────────────────────────────────────
+
+PROJECT_ROOT       = Path(__file__).parent.resolve()          # career-constellation/
+CONSTELLATION_JSON = PROJECT_ROOT / 'frontend' / 'public' / 'constellation_data.json'
+OUTPUT_STATS       = PROJECT_ROOT / 'frontend' / 'public' / 'stats_data.json'
+
+# ── Build stats_data.json ──────────────────────────────────────────────────────
+
+def build_stats(constellation: dict) -> dict:
+    print("Building stats_data.json…")
+    jobs     = constellation['jobs']
+    clusters = constellation['clusters']
+
+    # Cluster distribution
+    cluster_dist = [
+        {'cluster_id': c['id'], 'label': c['label'], 'count': c['size']}
+        for c in clusters
+    ]
+
+    # Keyword / skill frequency
+    all_keywords = [kw for j in jobs for kw in j['keywords']]
+    all_skills   = [sk for j in jobs for sk in j['skills']]
+    top_keywords = [{'keyword': k, 'count': v}
+                    for k, v in Counter(all_keywords).most_common(20)]
+    top_skills   = [{'skill': s, 'count': v}
+                    for s, v in Counter(all_skills).most_common(20)]
+
+    # Near-duplicate pairs (cosine similarity ≥ 0.95)
+    seen: set[tuple] = set()
+    dup_count = 0
+    for job in jobs:
+        for sim in job['similar_jobs']:
+            if sim['similarity'] >= 0.95:
+                pair_key = tuple(sorted([job['employee_id'], sim['employee_id']]))
+                if pair_key not in seen:
+                    seen.add(pair_key)
+                    dup_count += 1
+
+    # Job-level distribution
+    job_level_dist = dict(Counter(
+        j['job_level'] for j in jobs if j['job_level']
+    ))
+
+    # Seniority score distribution (bucketed)
+    seniority_scores = [j['seniority_score'] for j in jobs if j['seniority_score']]
+    seniority_dist = {
+        'mean':   round(float(np.mean(seniority_scores)), 4) if seniority_scores else 0,
+        'median': round(float(np.median(seniority_scores)), 4) if seniority_scores else 0,
+        'min':    round(float(np.min(seniority_scores)), 4) if seniority_scores else 0,
+        'max':    round(float(np.max(seniority_scores)), 4) if seniority_scores else 0,
+    }
+
+    # Cluster labels map (id → label)
+    cluster_labels = {str(c['id']): c['label'] for c in clusters}
+
+    return {
+        'total_jobs':             len(jobs),
+        'num_clusters':           len(clusters),
+        'avg_jobs_per_cluster':   round(len(jobs) / len(clusters), 2),
+        'cluster_distribution':   cluster_dist,
+        'cluster_labels':         cluster_labels,
+        'top_keywords_overall':   top_keywords,
+        'top_skills_overall':     top_skills,
+        'standardization_pairs':  dup_count,
+        'job_level_distribution': job_level_dist,
+        'seniority_distribution': seniority_dist,
+    }
+
+# ── Main ───────────────────────────────────────────────────────────────────────
+
+def main(constellation_path: Path = CONSTELLATION_JSON, output_path: Path = OUTPUT_STATS) -> None:
+    with open(constellation_path) as f:
+        constellation = json.load(f)
+
+    stats = build_stats(constellation)
+    print(f"Saving {output_path.name}…")
+    with open(output_path, 'w') as f:
+        json.dump(stats, f, indent=2, ensure_ascii=False)
+    print(f"  ✅ {stats['total_jobs']} jobs, "
+          f"{stats['standardization_pairs']} near-duplicate pairs (≥0.95)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 export interface JobPoint {
   id: number;
+  job_key?: string;  // stable across refreshes; `id` is positional
   employee_id?: string;
   title: string;
   summary: string;
@@ -7,6 +8,7 @@ export interface JobPoint {
   qualifications: string;
   cluster_id: number;
   cluster_label?: string;
+  department?: string;
   x: number;
   y: number;
   z: number;
@@ -97,6 +99,22 @@ export interface ClusterDetails {
   }[];
   standardization_candidates: string[];
   near_duplicate_pairs?: NearDuplicatePair[];
+  label?: string;
+  messiness?: {
+    dup_pairs: number;
+    unique_titles: number;
+    title_variety: number;
+    mean_distance: number;
+    std_distance: number;
+    max_distance: number;
+  };
+  level_mix?: Record<string, number>;
+  nearest_clusters?: {
+    cluster_id: number;
+    label: string;
+    shared_links: number;
+    distance: number;
+  }[];
 }
 
 export interface StandardizationDuplicate {
@@ -2,17 +2,31 @@
 """
 Generate constellation_data.json, stats_data.json, and constellation_data_full.csv.
 
-Sources (all 622 rows, aligned by row index):
+Sources (joined on employee_id, not on row position):
   - cleaned_output_11pm.csv       → main truth: titles, text, cluster, labels, keywords,
                                     job_level, seniority_score, top_seniority_buckets
   - employees_with_skills_and_similarity.csv
-                                  → Employee_ID, skills, correct top-3 similar jobs + scores
-  - constellation_data_full.csv   → x, y coordinates (only source that has them)
+                                  → Employee_ID, skills, correct top-3 similar jobs + scores,
+                                    x, y and cluster keywords (when written by
+                                    generate_backend_data.py; these override the main CSV)
+  - constellation_data_full.csv   → x, y coordinates from the previous export (fallback)
+
+Every job also gets a stable `job_key` (hash of its source filename and title,
+or of its cleaned title and text when there is no filename) so changes can be
+tracked across refreshes even when rows are inserted or removed. Similar jobs
+carry the neighbour's job_key too, since employee ids are positional.
 
 Outputs:
   - constellation_data_full.csv         (updated, in career-constellation/)
+  - constellation_manifest.json         (job_key → content hash of the last export)
   - frontend/public/constellation_data.json
+  - frontend/public/constellation_delta.json  (added / changed / removed since last export)
   - frontend/public/stats_data.json
+  - frontend/public/skill_index.json          (skill/keyword → job ids, per-cluster and
+                                               per-department facet counts)
+  - frontend/public/cluster_details/<id>.json (size, top skills, level mix, messiness,
+                                               nearest clusters, duplicate pairs)
+  - frontend/public/cluster_messiness.json    (clusters ranked by messiness)
 
 Usage:
     cd career-constellation/
@@ -21,11 +35,15 @@ Usage:
 
 import json
 import sys
+import hashlib
 import numpy as np
 import pandas as pd
-from collections import Counter
 from pathlib import Path
 
+from constellation_index import build_skill_index
+from constellation_stats import build_stats
+from job_store import write_job_store
+
 # ── Paths ─────────────────────────────────────────────────────────────────────
 
 PROJECT_ROOT    = Path(__file__).parent.resolve()          # career-constellation/
@@ -38,6 +56,21 @@ EXISTING_FULL   = PROJECT_ROOT  / 'constellation_data_full.csv'   # x/y source
 OUTPUT_FULL_CSV = PROJECT_ROOT  / 'constellation_data_full.csv'
 OUTPUT_JSON     = PROJECT_ROOT  / 'frontend' / 'public' / 'constellation_data.json'
 OUTPUT_STATS    = PROJECT_ROOT  / 'frontend' / 'public' / 'stats_data.json'
+OUTPUT_DELTA    = PROJECT_ROOT  / 'frontend' / 'public' / 'constellation_delta.json'
+OUTPUT_INDEX    = PROJECT_ROOT  / 'frontend' / 'public' / 'skill_index.json'
+OUTPUT_DETAILS  = PROJECT_ROOT  / 'frontend' / 'public' / 'cluster_details'   # <id>.json
+OUTPUT_MESSINESS = PROJECT_ROOT / 'frontend' / 'public' / 'cluster_messiness.json'
+OUTPUT_JOBS     = PROJECT_ROOT  / 'frontend' / 'public' / 'jobs.ndjson'
+OUTPUT_JOBS_IDX = PROJECT_ROOT  / 'frontend' / 'public' / 'jobs.idx'
+OUTPUT_SUMMARY  = PROJECT_ROOT  / 'frontend' / 'public' / 'constellation_summary.json'
+MANIFEST_FILE   = PROJECT_ROOT  / 'constellation_manifest.json'
+
+MANIFEST_VERSION = 2
+
+DUPLICATE_THRESHOLD = 0.95   # similarity at which two postings count as near-duplicates
+N_TOP_TERMS         = 10
+N_NEAREST_CLUSTERS  = 5
+N_DETAIL_PAIRS      = 20
 
 # 25 visually distinct colours, one per cluster (index == cluster id)
 CLUSTER_COLORS = [
@@ -69,58 +102,161 @@ def safe_str(value, default: str = '') -> str:
         return default
     return str(value).strip()
 
+def stable_hash(value: str, length: int = 16) -> str:
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()[:length]
+
+
+def occurrence_keys(df: pd.DataFrame, columns: list[str]) -> pd.Series:
+    """Content key per row: the given columns plus an occurrence number for exact repeats."""
+    basis = df[columns[0]].fillna('').astype(str)
+    for col in columns[1:]:
+        basis = basis + '\x1f' + df[col].fillna('').astype(str)
+    return basis + '\x1f' + basis.groupby(basis).cumcount().astype(str)
+
+
+def normalize_employee_id(df: pd.DataFrame, name: str,
+                          reference: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Expose the employee id column as `employee_id` (sources spell it differently).
+
+    A source without ids takes them from `reference` by matching title_clean
+    (plus occurrence), so the join stays keyed on content rather than row order.
+    """
+    if 'employee_id' not in df.columns and 'Employee_ID' in df.columns:
+        df = df.rename(columns={'Employee_ID': 'employee_id'})
+    if 'employee_id' not in df.columns:
+        if reference is not None and 'Employee_ID' in reference.columns:
+            reference = reference.rename(columns={'Employee_ID': 'employee_id'})
+        if (reference is not None and 'employee_id' in reference.columns
+                and 'title_clean' in df.columns and 'title_clean' in reference.columns):
+            ids = pd.Series(reference['employee_id'].astype(str).values,
+                            index=occurrence_keys(reference, ['title_clean']).values)
+            matched = occurrence_keys(df, ['title_clean']).map(ids)
+            print(f"  ⚠️  {name} has no employee id column — matched {int(matched.notna().sum())} "
+                  f"of {len(df)} rows to another source on title_clean")
+            unmatched = [f'UNMATCHED_{i + 1:04d}' for i in range(len(df))]
+            df = df.assign(employee_id=matched.fillna(pd.Series(unmatched, index=df.index)).values)
+        else:
+            # Legacy exports without ids and nothing to match against: positional EMP_#### scheme
+            print(f"  ⚠️  {name} has no employee id column — assuming row order (EMP_0001, …)")
+            df = df.assign(employee_id=[f'EMP_{i + 1:04d}' for i in range(len(df))])
+    if df['employee_id'].duplicated().any():
+        dupes = df.loc[df['employee_id'].duplicated(), 'employee_id'].head(5).tolist()
+        sys.exit(f"ERROR: duplicate employee ids in {name}: {dupes}")
+    return df
+
+
+def add_job_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """Stable per-posting key: hash of filename + job title, else of title_clean + text.
+
+    Never the employee id: those are assigned by row position and shift on insertions.
+    """
+    content = [c for c in ('title_clean', 'text', 'position_summary') if c in df.columns]
+    fallback = occurrence_keys(df, content).map(stable_hash) if content else \
+        df['employee_id'].astype(str)
+    if 'filename' in df.columns:
+        if 'job_title' not in df.columns:
+            df = df.assign(job_title='')
+        keys = occurrence_keys(df, ['filename', 'job_title']).map(stable_hash)
+        df['job_key'] = np.where(df['filename'].notna(), keys, fallback)
+    else:
+        df['job_key'] = fallback
+    return df
+
+
+def add_departments(df: pd.DataFrame) -> pd.DataFrame:
+    """Department per job: from the source CSV when present, else from the file path
+    (falling back to content rules) via extract_departments_final.py."""
+    if 'department' in df.columns and df['department'].notna().all():
+        return df
+    if str(HACKATHON_ROOT) not in sys.path:
+        sys.path.insert(0, str(HACKATHON_ROOT))
+    from extract_departments_final import extract_and_map_department, determine_department_from_content
+
+    def department(row) -> str:
+        return (extract_and_map_department(safe_str(row.get('filename')))
+                or determine_department_from_content(safe_str(row.get('job_title')),
+                                                     safe_str(row.get('position_summary')),
+                                                     safe_str(row.get('responsibilities'))))
+
+    derived = df.apply(department, axis=1)
+    df['department'] = df['department'].fillna(derived) if 'department' in df.columns else derived
+    return df
+
+
 # ── Load ───────────────────────────────────────────────────────────────────────
 
-def load_sources() -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+def load_sources() -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame | None]:
     print("Loading source files…")
-    for p in (MAIN_CSV, SKILLS_CSV, EXISTING_FULL):
+    for p in (MAIN_CSV, SKILLS_CSV):
         if not p.exists():
             sys.exit(f"ERROR: required file not found: {p}")
 
-    main    = pd.read_csv(MAIN_CSV).reset_index(drop=True)
-    skills  = pd.read_csv(SKILLS_CSV).reset_index(drop=True)
-    existing = pd.read_csv(EXISTING_FULL).reset_index(drop=True)
+    main_raw, skills_raw = pd.read_csv(MAIN_CSV), pd.read_csv(SKILLS_CSV)
+    main    = normalize_employee_id(main_raw, MAIN_CSV.name, reference=skills_raw)
+    skills  = normalize_employee_id(skills_raw, SKILLS_CSV.name, reference=main)
+    existing = None
+    if EXISTING_FULL.exists():
+        existing = normalize_employee_id(pd.read_csv(EXISTING_FULL), EXISTING_FULL.name, reference=main)
 
     print(f"  main CSV:    {main.shape}")
     print(f"  skills CSV:  {skills.shape}")
-    print(f"  existing CSV (x/y): {existing.shape}")
-
-    # Sanity-check alignment
-    assert len(main) == len(skills), \
-        f"Row count mismatch: main={len(main)}, skills={len(skills)}"
-    assert len(main) == len(existing), \
-        f"Row count mismatch: main={len(main)}, existing={len(existing)}"
-    assert (main['title_clean'] == skills['title_clean']).all(), \
-        "title_clean mismatch between main and skills CSV — files are not aligned!"
-    assert (main['cluster'] == skills['cluster'].astype(int)).all(), \
-        "cluster mismatch between main and skills CSV — files are not aligned!"
-
-    print("  ✅ Row alignment verified (title_clean + cluster match on all 622 rows)")
+    print(f"  existing CSV (x/y): {existing.shape if existing is not None else 'not found'}")
+
+    missing = ~main['employee_id'].isin(skills['employee_id'])
+    if missing.any():
+        print(f"  ⚠️  {int(missing.sum())} jobs in main CSV have no skills/similarity row")
+
+    # Sanity-check that the join pairs up the same postings
+    joined = main[['employee_id', 'title_clean', 'cluster']].merge(
+        skills[['employee_id', 'title_clean', 'cluster']], on='employee_id', suffixes=('', '_skills'),
+    )
+    mismatched = (joined['title_clean'] != joined['title_clean_skills']) | \
+        (joined['cluster'].astype(int) != joined['cluster_skills'].astype(int))
+    if mismatched.any():
+        sys.exit(f"ERROR: {int(mismatched.sum())} employee ids disagree on title_clean/cluster "
+                 f"between main and skills CSV — files come from different runs")
+
+    print(f"  ✅ Keyed join verified ({len(joined)} of {len(main)} jobs matched on employee_id)")
     return main, skills, existing
 
 # ── Merge ──────────────────────────────────────────────────────────────────────
 
-def merge(main: pd.DataFrame, skills: pd.DataFrame, existing: pd.DataFrame) -> pd.DataFrame:
-    print("Merging…")
-    df = main.copy()
-
-    # From skills CSV
-    df['employee_id']              = skills['Employee_ID'].values
-    df['Skills_String']            = skills['Skills_String'].values
-    df['Skills_Count']             = skills['Skills_Count'].values
-    df['Individual_Skills']        = skills['Individual_Skills'].values
-    df['Cluster_Label']            = skills['Cluster_Label'].values
-    df['Similar_Employee_1']       = skills['Similar_Employee_1'].values
-    df['Similar_Employee_1_Score'] = skills['Similar_Employee_1_Score'].values
-    df['Similar_Employee_2']       = skills['Similar_Employee_2'].values
-    df['Similar_Employee_2_Score'] = skills['Similar_Employee_2_Score'].values
-    df['Similar_Employee_3']       = skills['Similar_Employee_3'].values
-    df['Similar_Employee_3_Score'] = skills['Similar_Employee_3_Score'].values
-
-    # x / y from existing (only source that has them)
-    df['x'] = existing['x'].values
-    df['y'] = existing['y'].values
+SKILL_COLUMNS = [
+    'Skills_String', 'Skills_Count', 'Individual_Skills', 'Cluster_Label', 'Keywords',
+    'Similar_Employee_1', 'Similar_Employee_1_Score',
+    'Similar_Employee_2', 'Similar_Employee_2_Score',
+    'Similar_Employee_3', 'Similar_Employee_3_Score',
+]
+
 
+def merge(main: pd.DataFrame, skills: pd.DataFrame, existing: pd.DataFrame | None) -> pd.DataFrame:
+    print("Merging…")
+    df = main.set_index('employee_id')
+    skills = skills.set_index('employee_id')
+
+    # From skills CSV (indexed join, so row order and insertions don't matter)
+    cols = [c for c in SKILL_COLUMNS if c in skills.columns]
+    df = df.drop(columns=[c for c in cols if c in df.columns]).join(skills[cols], how='left')
+
+    # x / y / z: prefer the fresh coordinates from the skills CSV, else the previous export
+    # (z only exists for 3D layouts: generate_backend_data.py --layout-dims 3)
+    xy = pd.DataFrame(index=df.index, columns=['x', 'y', 'z'], dtype=float)
+    if existing is not None and {'x', 'y'} <= set(existing.columns):
+        prev = existing.set_index('employee_id')
+        xy.update(prev[[c for c in ('x', 'y', 'z') if c in prev.columns]])
+    if {'x', 'y'} <= set(skills.columns):
+        fresh = skills[[c for c in ('x', 'y', 'z') if c in skills.columns]]
+        if 'z' not in fresh.columns:
+            fresh = fresh.assign(z=0.0)      # a 2D run flattens any previous 3D positions
+        xy.update(fresh)
+    df['x'] = xy['x']
+    df['y'] = xy['y']
+    df['z'] = xy['z'].fillna(0.0)
+    no_xy = int(df['x'].isna().sum())
+    if no_xy:
+        print(f"  ⚠️  {no_xy} jobs have no x/y coordinates (placed at the origin)")
+
+    df = add_departments(add_job_keys(df.reset_index()))
     print(f"  Merged: {df.shape[0]} rows, {df.shape[1]} columns")
     return df
 
@@ -145,6 +281,7 @@ def build_constellation(df: pd.DataFrame) -> dict:  # noqa: C901
 
         jobs.append({
             'id':                    i,
+            'job_key':               safe_str(row['job_key']),
             'employee_id':           safe_str(row['employee_id']),
             'title':                 safe_str(row.get('Unified Job Title (display)', row['title_clean'])),
             'title_clean':           safe_str(row['title_clean']),
@@ -153,9 +290,10 @@ def build_constellation(df: pd.DataFrame) -> dict:  # noqa: C901
             'qualifications':        safe_str(row.get('qualifications')),
             'cluster_id':            cluster_id,
             'cluster_label':         safe_str(row['Label']),
+            'department':            safe_str(row.get('department')),
             'x':                     round(safe_float(row['x']), 6),
             'y':                     round(safe_float(row['y']), 6),
-            'z':                     0.0,
+            'z':                     round(safe_float(row['z']), 6),
             'size':                  2.0,
             'color':                 CLUSTER_COLORS[cluster_id % len(CLUSTER_COLORS)],
             'keywords':              parse_list(row.get('Keywords', '')),
@@ -186,6 +324,7 @@ def build_constellation(df: pd.DataFrame) -> dict:  # noqa: C901
     for cid, cjobs in sorted(cluster_groups.items()):
         xs = [j['x'] for j in cjobs]
         ys = [j['y'] for j in cjobs]
+        zs = [j['z'] for j in cjobs]
         meta = cluster_meta.get(cid, {})
         clusters.append({
             'id':             cid,
@@ -197,11 +336,17 @@ def build_constellation(df: pd.DataFrame) -> dict:  # noqa: C901
             'centroid':       {
                 'x': round(float(np.mean(xs)), 4),
                 'y': round(float(np.mean(ys)), 4),
-                'z': 0.0,
+                'z': round(float(np.mean(zs)), 4),
             },
             'jobs':           [j['id'] for j in cjobs],
         })
 
+    # Neighbours also by job_key: employee ids are positional, job keys survive insertions
+    key_of = {j['employee_id']: j['job_key'] for j in jobs}
+    for job in jobs:
+        for s in job['similar_jobs']:
+            s['job_key'] = key_of.get(s['employee_id'], '')
+
     return {
         'jobs':         jobs,
         'clusters':     clusters,
@@ -209,67 +354,214 @@ def build_constellation(df: pd.DataFrame) -> dict:  # noqa: C901
         'num_clusters': len(clusters),
     }
 
-# ── Build stats_data.json ──────────────────────────────────────────────────────
-
-def build_stats(constellation: dict) -> dict:
-    print("Building stats_data.json…")
-    jobs     = constellation['jobs']
-    clusters = constellation['clusters']
-
-    # Cluster distribution
-    cluster_dist = [
-        {'cluster_id': c['id'], 'label': c['label'], 'count': c['size']}
-        for c in clusters
-    ]
-
-    # Keyword / skill frequency
-    all_keywords = [kw for j in jobs for kw in j['keywords']]
-    all_skills   = [sk for j in jobs for sk in j['skills']]
-    top_keywords = [{'keyword': k, 'count': v}
-                    for k, v in Counter(all_keywords).most_common(20)]
-    top_skills   = [{'skill': s, 'count': v}
-                    for s, v in Counter(all_skills).most_common(20)]
-
-    # Near-duplicate pairs (cosine similarity ≥ 0.95)
-    seen: set[tuple] = set()
-    dup_count = 0
-    for job in jobs:
-        for sim in job['similar_jobs']:
-            if sim['similarity'] >= 0.95:
-                pair_key = tuple(sorted([job['employee_id'], sim['employee_id']]))
-                if pair_key not in seen:
-                    seen.add(pair_key)
-                    dup_count += 1
-
-    # Job-level distribution
-    job_level_dist = dict(Counter(
-        j['job_level'] for j in jobs if j['job_level']
-    ))
-
-    # Seniority score distribution (bucketed)
-    seniority_scores = [j['seniority_score'] for j in jobs if j['seniority_score']]
-    seniority_dist = {
-        'mean':   round(float(np.mean(seniority_scores)), 4) if seniority_scores else 0,
-        'median': round(float(np.median(seniority_scores)), 4) if seniority_scores else 0,
-        'min':    round(float(np.min(seniority_scores)), 4) if seniority_scores else 0,
-        'max':    round(float(np.max(seniority_scores)), 4) if seniority_scores else 0,
-    }
-
-    # Cluster labels map (id → label)
-    cluster_labels = {str(c['id']): c['label'] for c in clusters}
+# ── Delta since last export ──────────────────────────────────────────────────
+
+def job_fingerprint(job: dict) -> str:
+    """Content hash of a job, ignoring its positional id and employee ids (own and neighbours')."""
+    payload = {k: v for k, v in job.items() if k not in ('id', 'employee_id', 'similar_jobs')}
+    payload['similar_jobs'] = [{k: v for k, v in s.items() if k not in ('id', 'employee_id')}
+                               for s in job.get('similar_jobs', [])]
+    return stable_hash(json.dumps(payload, sort_keys=True, ensure_ascii=False), length=20)
+
+
+def load_manifest() -> dict | None:
+    if not MANIFEST_FILE.exists():
+        return None
+    with open(MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def build_manifest(constellation: dict) -> dict:
+    jobs = {j['job_key']: {'hash': job_fingerprint(j), 'id': j['id'], 'employee_id': j['employee_id']}
+            for j in constellation['jobs']}
+    export_id = stable_hash(json.dumps(sorted((k, v['hash']) for k, v in jobs.items())))
+    return {'version': MANIFEST_VERSION, 'export_id': export_id, 'jobs': jobs}
+
+
+def build_delta(constellation: dict, previous: dict | None, manifest: dict) -> dict:
+    """Jobs added, changed or removed since the previous export, keyed by job_key.
+
+    Unchanged jobs whose positional id or employee id moved are listed in
+    `id_changes` / `employee_id_changes` so a client can patch its lookups
+    without reloading the full file.
+    """
+    prev_jobs = previous['jobs'] if previous else {}
+    added, changed, id_changes, employee_id_changes = [], [], {}, {}
+    for job in constellation['jobs']:
+        key = job['job_key']
+        old = prev_jobs.get(key)
+        if old is None:
+            added.append(job)
+        elif old['hash'] != manifest['jobs'][key]['hash']:
+            changed.append(job)
+        else:
+            if old['id'] != job['id']:
+                id_changes[key] = job['id']
+            if old['employee_id'] != job['employee_id']:
+                employee_id_changes[key] = job['employee_id']
+    current = manifest['jobs']
+    removed = sorted(k for k in prev_jobs if k not in current)
 
     return {
-        'total_jobs':             len(jobs),
-        'num_clusters':           len(clusters),
-        'avg_jobs_per_cluster':   round(len(jobs) / len(clusters), 2),
-        'cluster_distribution':   cluster_dist,
-        'cluster_labels':         cluster_labels,
-        'top_keywords_overall':   top_keywords,
-        'top_skills_overall':     top_skills,
-        'standardization_pairs':  dup_count,
-        'job_level_distribution': job_level_dist,
-        'seniority_distribution': seniority_dist,
+        'base_export_id': previous['export_id'] if previous else None,
+        'export_id':      manifest['export_id'],
+        'full_reload':    previous is None,
+        'added':          added,
+        'changed':        changed,
+        'removed':        removed,
+        'id_changes':     id_changes,
+        'employee_id_changes': employee_id_changes,
+        'clusters':       constellation['clusters'],
+        'total_jobs':     constellation['total_jobs'],
+        'num_clusters':   constellation['num_clusters'],
+    }
+
+# ── Per-cluster details + messiness ranking ─────────────────────────────────
+
+def near_duplicate_pairs(jobs: pd.DataFrame, threshold: float = DUPLICATE_THRESHOLD) -> pd.DataFrame:
+    """Unique job pairs from the top-3 similar lists with similarity ≥ threshold.
+
+    A pair belongs to the cluster of the job that lists it first (same rule
+    as the backend's RAG summaries).
+    """
+    links = similar_links(jobs)
+    links = links[links['similarity'] >= threshold]
+    pair_key = np.where(links['emp1'] < links['emp2'],
+                        links['emp1'] + '|' + links['emp2'], links['emp2'] + '|' + links['emp1'])
+    links = links[~pd.Series(pair_key, index=links.index).duplicated()]
+    return links[links['cluster2'].notna()]
+
+
+def similar_links(jobs: pd.DataFrame) -> pd.DataFrame:
+    """One row per (job, similar job) edge with both endpoints' cluster and title."""
+    links = jobs[['employee_id', 'title', 'cluster_id', 'similar_jobs']].explode('similar_jobs')
+    links = links.dropna(subset=['similar_jobs'])
+    by_emp = jobs.set_index('employee_id')
+    by_emp = by_emp[~by_emp.index.duplicated()]
+    emp2 = links['similar_jobs'].str['employee_id']
+    return pd.DataFrame({
+        'emp1':       links['employee_id'],
+        'title1':     links['title'],
+        'cluster_id': links['cluster_id'],
+        'emp2':       emp2,
+        'title2':     emp2.map(by_emp['title']),
+        'cluster2':   emp2.map(by_emp['cluster_id']),
+        'similarity': links['similar_jobs'].str['similarity'].astype(float),
+    }).reset_index(drop=True)
+
+
+def build_cluster_details(constellation: dict, index: dict) -> tuple[dict[int, dict], dict]:
+    """Per-cluster detail documents and the ranked messiness table, from one groupby pass."""
+    print("Building cluster details…")
+    jobs = pd.DataFrame(constellation['jobs'])
+    clusters = {c['id']: c for c in constellation['clusters']}
+
+    groups = jobs.groupby('cluster_id')
+    stats = groups.agg(
+        size=('id', 'size'),
+        unique_titles=('title_clean', 'nunique'),
+        mean_distance=('distance_to_center', 'mean'),
+        std_distance=('distance_to_center', 'std'),
+        max_distance=('distance_to_center', 'max'),
+        mean_seniority=('seniority_score', 'mean'),
+    )
+    level_mix = pd.crosstab(jobs['cluster_id'], jobs['job_level'].replace('', 'Unspecified'))
+
+    links = similar_links(jobs)
+    pairs = near_duplicate_pairs(jobs)
+    stats['dup_pairs'] = pairs.groupby('cluster_id').size().reindex(stats.index, fill_value=0)
+    stats['messiness'] = stats['dup_pairs'] / stats['size']     # unclipped, like rag.ts getClusterMessiness
+    stats['title_variety'] = stats['unique_titles'] / stats['size']
+
+    # Neighbouring clusters: similar-job edges that cross clusters, then layout distance
+    cross = links[links['cluster2'].notna() & (links['cluster_id'] != links['cluster2'])]
+    edge_counts = pd.crosstab(cross['cluster_id'], cross['cluster2'].astype(int))
+    centroids = pd.DataFrame({cid: c['centroid'] for cid, c in clusters.items()}).T[['x', 'y', 'z']]
+    gaps = np.sqrt(((centroids.values[:, None, :] - centroids.values[None, :, :]) ** 2).sum(-1))
+    gaps = pd.DataFrame(gaps, index=centroids.index, columns=centroids.index)
+
+    stats = stats.fillna(0.0)
+    members = groups.indices
+    details: dict[int, dict] = {}
+    for cid, row in stats.iterrows():
+        cid = int(cid)
+        cjobs = jobs.iloc[members[cid]]
+        facet = index['facets']['cluster'].get(str(cid), {'skills': {}, 'keywords': {}})
+        shared = edge_counts.loc[cid] if cid in edge_counts.index else pd.Series(dtype=float)
+        nearest = pd.DataFrame({
+            'shared_links': shared.reindex(gaps.columns, fill_value=0).astype(int),
+            'distance':     gaps.loc[cid],
+        }).drop(index=cid).sort_values(['shared_links', 'distance'], ascending=[False, True])
+        # Detail view lists every pair touching the cluster; the ranking counts each pair once
+        cpairs = pairs[(pairs['cluster_id'] == cid) | (pairs['cluster2'] == cid)]
+        cpairs = cpairs.sort_values('similarity', ascending=False, kind='stable')
+
+        details[cid] = {
+            'cluster_id':      cid,
+            'label':           clusters[cid]['label'],
+            'size':            int(row['size']),
+            'messiness_score': round(min(len(cpairs) / row['size'], 1.0), 4),
+            'messiness': {
+                'dup_pairs':      int(row['dup_pairs']),
+                'unique_titles':  int(row['unique_titles']),
+                'title_variety':  round(float(row['title_variety']), 4),
+                'mean_distance':  round(float(row['mean_distance']), 6),
+                'std_distance':   round(float(row['std_distance']), 6),
+                'max_distance':   round(float(row['max_distance']), 6),
+            },
+            'mean_seniority':  round(float(row['mean_seniority']), 4),
+            'level_mix':       {lvl: int(n) for lvl, n in level_mix.loc[cid].items() if n},
+            'jobs': [
+                {'id': int(j.id), 'employee_id': j.employee_id, 'title': j.title,
+                 'summary': (j.summary or '')[:150]}
+                for j in cjobs.itertuples()
+            ],
+            'top_skills':   [{'skill': k, 'count': v}
+                             for k, v in list(facet['skills'].items())[:N_TOP_TERMS]],
+            'top_keywords': [{'keyword': k, 'count': v}
+                             for k, v in list(facet['keywords'].items())[:N_TOP_TERMS]],
+            'standardization_candidates': cjobs['title'].head(5).tolist(),
+            'nearest_clusters': [
+                {'cluster_id': int(n), 'label': clusters[n]['label'],
+                 'shared_links': int(r.shared_links), 'distance': round(float(r.distance), 4)}
+                for n, r in nearest.head(N_NEAREST_CLUSTERS).iterrows()
+            ],
+            'near_duplicate_pairs': [
+                {'emp1': p.emp1, 'title1': p.title1, 'emp2': p.emp2, 'title2': p.title2,
+                 'similarity': p.similarity}
+                for p in cpairs.head(N_DETAIL_PAIRS).itertuples()
+            ],
+        }
+
+    ranked = stats.sort_values(['messiness', 'mean_distance'], ascending=False)
+    messiness = {
+        'threshold':      DUPLICATE_THRESHOLD,
+        'total_clusters': len(ranked),
+        'clusters': [
+            {'rank': rank, 'cluster_id': str(cid), 'label': clusters[cid]['label'],
+             'size': int(r['size']), 'dupPairs': int(r['dup_pairs']),
+             'messiness': round(float(r['messiness']), 4),
+             'title_variety': round(float(r['title_variety']), 4),
+             'mean_distance': round(float(r['mean_distance']), 6)}
+            for rank, (cid, r) in enumerate(ranked.iterrows(), 1)
+        ],
     }
+    return details, messiness
+
+
+def save_cluster_details(details: dict[int, dict], messiness: dict) -> None:
+    OUTPUT_DETAILS.mkdir(parents=True, exist_ok=True)
+    for stale in OUTPUT_DETAILS.glob('*.json'):
+        if stale.stem.isdigit() and int(stale.stem) not in details:
+            stale.unlink()
+    for cid, detail in details.items():
+        with open(OUTPUT_DETAILS / f'{cid}.json', 'w') as f:
+            json.dump(detail, f, ensure_ascii=False)
+    with open(OUTPUT_MESSINESS, 'w') as f:
+        json.dump(messiness, f, indent=2, ensure_ascii=False)
 
 # ── Main ───────────────────────────────────────────────────────────────────────
 
@@ -294,6 +586,43 @@ def main() -> None:
         json.dump(constellation, f, indent=2, ensure_ascii=False)
     print(f"  ✅ {len(constellation['jobs'])} jobs, {len(constellation['clusters'])} clusters")
 
+    # 2a. Random-access job store + jobs-free summary (the backend never parses the full JSON)
+    print(f"\nSaving {OUTPUT_JOBS.name}, {OUTPUT_JOBS_IDX.name} and {OUTPUT_SUMMARY.name}…")
+    size = write_job_store(constellation['jobs'], OUTPUT_JOBS, OUTPUT_JOBS_IDX)
+    with open(OUTPUT_SUMMARY, 'w') as f:
+        json.dump({k: v for k, v in constellation.items() if k != 'jobs'}, f, ensure_ascii=False)
+    print(f"  ✅ {len(constellation['jobs'])} jobs, {size / 1024**2:.1f} MB NDJSON")
+
+    # 2b. Delta against the previous export's manifest
+    previous = load_manifest()
+    manifest = build_manifest(constellation)
+    delta = build_delta(constellation, previous, manifest)
+    print(f"\nSaving {OUTPUT_DELTA.name}…")
+    with open(OUTPUT_DELTA, 'w') as f:
+        json.dump(delta, f, ensure_ascii=False)
+    with open(MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f)
+    if delta['full_reload']:
+        print("  ✅ No previous manifest — delta marks a full reload")
+    else:
+        print(f"  ✅ +{len(delta['added'])} added, ~{len(delta['changed'])} changed, "
+              f"-{len(delta['removed'])} removed, {len(delta['id_changes'])} renumbered")
+
+    # 2c. Skill/keyword inverted index + facet counts
+    index = build_skill_index(constellation)
+    print(f"\nSaving {OUTPUT_INDEX.name}…")
+    with open(OUTPUT_INDEX, 'w') as f:
+        json.dump(index, f, ensure_ascii=False)
+    print(f"  ✅ {len(index['skill_jobs'])} skills, "
+          f"{len(index['facets']['department'])} departments")
+
+    # 2d. Per-cluster detail files + messiness ranking
+    details, messiness = build_cluster_details(constellation, index)
+    print(f"\nSaving {OUTPUT_DETAILS.name}/ and {OUTPUT_MESSINESS.name}…")
+    save_cluster_details(details, messiness)
+    print(f"  ✅ {len(details)} cluster files, most messy: "
+          f"{messiness['clusters'][0]['label'] if messiness['clusters'] else '—'}")
+
     # 3. Build + save stats_data.json
     stats = build_stats(constellation)
     print(f"\nSaving {OUTPUT_STATS.name}…")
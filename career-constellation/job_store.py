@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Random-access job store: newline-delimited JSON plus a binary offset index.
+
+constellation_data.json has to be parsed whole to read a single job. Here
+every job is one compact JSON line in jobs.ndjson, and jobs.idx maps job id
+→ (byte offset, length), so a reader does one seek per job and can stream
+the full list line by line.
+
+jobs.idx layout (little-endian):
+    header   8s magic b'JOBIDX01', u32 record count, u32 reserved
+    records  u32 id, u32 length, u64 offset — sorted by id (binary search)
+
+Each NDJSON job also carries `id` on its similar_jobs entries, so a reader
+can resolve neighbours through the same index.
+
+Usage:
+    from job_store import write_job_store, read_job
+
+    write_job_store(constellation['jobs'], 'jobs.ndjson', 'jobs.idx')
+    job = read_job('jobs.ndjson', 'jobs.idx', 42)
+"""
+
+import json
+
+import numpy as np
+
+INDEX_MAGIC = b'JOBIDX01'
+INDEX_RECORD = np.dtype([('id', '<u4'), ('length', '<u4'), ('offset', '<u8')])
+HEADER_SIZE = 16
+
+
+def write_job_store(jobs: list[dict], ndjson_path, index_path) -> int:
+    """Write jobs.ndjson and jobs.idx. Returns the NDJSON size in bytes."""
+    id_of = {j['employee_id']: j['id'] for j in jobs}
+    records = np.zeros(len(jobs), dtype=INDEX_RECORD)
+    offset = 0
+    with open(ndjson_path, 'wb') as f:
+        for i, job in enumerate(jobs):
+            similar = [{**s, 'id': id_of[s['employee_id']]} if s['employee_id'] in id_of else s
+                       for s in job.get('similar_jobs', [])]
+            line = json.dumps({**job, 'similar_jobs': similar}, ensure_ascii=False,
+                              separators=(',', ':')).encode('utf-8')
+            f.write(line + b'\n')
+            records[i] = (job['id'], len(line), offset)
+            offset += len(line) + 1
+
+    records.sort(order='id')
+    with open(index_path, 'wb') as f:
+        f.write(INDEX_MAGIC + np.array([len(records), 0], dtype='<u4').tobytes())
+        f.write(records.tobytes())
+    return offset
+
+
+def load_index(index_path) -> np.ndarray:
+    with open(index_path, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+        if header[:8] != INDEX_MAGIC:
+            raise ValueError(f"{index_path}: not a job index")
+        count = int(np.frombuffer(header[8:12], dtype='<u4')[0])
+        return np.frombuffer(f.read(count * INDEX_RECORD.itemsize), dtype=INDEX_RECORD)
+
+
+def read_job(ndjson_path, index_path, job_id: int, index: np.ndarray | None = None) -> dict | None:
+    """One job by id (binary search in the index, one seek in the NDJSON), or None."""
+    index = load_index(index_path) if index is None else index
+    pos = int(np.searchsorted(index['id'], job_id))
+    if pos == len(index) or int(index['id'][pos]) != job_id:
+        return None
+    with open(ndjson_path, 'rb') as f:
+        f.seek(int(index['offset'][pos]))
+        return json.loads(f.read(int(index['length'][pos])))
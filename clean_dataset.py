@@ -2,12 +2,8 @@ import pandas as pd
 import re
 import os
 
-# 1. Load the dataset
-input_file = '/Users/rohanjasani/Desktop/Hackathon/Hackathon Challenge #1 Datasets Cleaned.csv'
-output_file = '/Users/rohanjasani/Desktop/Hackathon/Hackathon_Datasets_Refined_v2.csv'
-
-print(f"Loading data from {input_file}...")
-df = pd.read_csv(input_file)
+INPUT_FILE = '/Users/rohanjasani/Desktop/Hackathon/Hackathon Challenge #1 Datasets Cleaned.csv'
+OUTPUT_FILE = '/Users/rohanjasani/Desktop/Hackathon/Hackathon_Datasets_Refined_v2.csv'
 
 # --- Cleaning Functions ---
 
@@ -87,37 +83,46 @@ def create_unified_title(row):
     else:
         return "Unknown Position"
 
-# --- Apply Logic ---
+def main(input_file=INPUT_FILE, output_file=OUTPUT_FILE):
+    # 1. Load the dataset
+    print(f"Loading data from {input_file}...")
+    df = pd.read_csv(input_file)
+
+    # --- Apply Logic ---
+
+    print("Cleaning filenames...")
+    # Apply the cleaning function to create a temporary column for inspection if needed, 
+    # but we'll go straight to the Unified Title.
+
+    print("Generating Unified Job Titles...")
+    df['Unified Job Title'] = df.apply(create_unified_title, axis=1)
 
-print("Cleaning filenames...")
-# Apply the cleaning function to create a temporary column for inspection if needed, 
-# but we'll go straight to the Unified Title.
+    print("Determining Internal Posting status...")
+    df['Internal Posting'] = df.apply(determine_internal, axis=1)
 
-print("Generating Unified Job Titles...")
-df['Unified Job Title'] = df.apply(create_unified_title, axis=1)
+    # --- Additional Cleaning ---
 
-print("Determining Internal Posting status...")
-df['Internal Posting'] = df.apply(determine_internal, axis=1)
+    # Fill NaN values in updateable text fields to avoid backend errors
+    text_columns = ['position_summary', 'responsibilities', 'qualifications']
+    for col in text_columns:
+        if col in df.columns:
+            df[col] = df[col].fillna("")
 
-# --- Additional Cleaning ---
+    # Remove duplicates based on the new Unified Title (optional, but good for clean datasets)
+    # We will keep the first occurrence.
+    # initial_count = len(df)
+    # df = df.drop_duplicates(subset=['Unified Job Title'], keep='first')
+    # print(f"Removed {initial_count - len(df)} duplicate job titles.")
 
-# Fill NaN values in updateable text fields to avoid backend errors
-text_columns = ['position_summary', 'responsibilities', 'qualifications']
-for col in text_columns:
-    if col in df.columns:
-        df[col] = df[col].fillna("")
+    # --- Export ---
 
-# Remove duplicates based on the new Unified Title (optional, but good for clean datasets)
-# We will keep the first occurrence.
-# initial_count = len(df)
-# df = df.drop_duplicates(subset=['Unified Job Title'], keep='first')
-# print(f"Removed {initial_count - len(df)} duplicate job titles.")
+    print(f"Saving refined dataset to {output_file}...")
+    df.to_csv(output_file, index=False)
 
-# --- Export ---
+    # Preview results
+    print("\nPreview of the first 5 rows:")
+    print(df[['filename', 'Unified Job Title', 'Internal Posting']].head())
 
-print(f"Saving refined dataset to {output_file}...")
-df.to_csv(output_file, index=False)
 
-# Preview results
-print("\nPreview of the first 5 rows:")
-print(df[['filename', 'Unified Job Title', 'Internal Posting']].head())
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Keep cluster ids, labels and colours stable across reclustering runs.
+
+KMeans ids are arbitrary: any data change can permute them, silently
+scrambling the curated id → label map and the colour palette. Here new
+clusters are matched to the previous run's persisted centroids by optimal
+assignment (Hungarian algorithm on centroid distance), and the new
+partition is renumbered so matched clusters keep their old ids and names.
+
+Usage:
+    from cluster_alignment import align_clusters
+
+    labels, centroids, names = align_clusters(labels, centroids, prev_centroids, prev_names)
+"""
+
+import numpy as np
+
+
+def match_clusters(new_centroids: np.ndarray, old_centroids: np.ndarray) -> dict[int, int]:
+    """Optimal one-to-one matching new id → old id minimizing total centroid distance.
+
+    When the cluster counts differ, the surplus clusters stay unmatched.
+    """
+    from scipy.optimize import linear_sum_assignment
+
+    new_centroids = np.asarray(new_centroids, dtype=np.float64)
+    old_centroids = np.asarray(old_centroids, dtype=np.float64)
+    cost = np.sqrt(np.maximum(
+        (new_centroids ** 2).sum(1)[:, None]
+        - 2 * new_centroids @ old_centroids.T
+        + (old_centroids ** 2).sum(1)[None, :],
+        0.0,
+    ))
+    rows, cols = linear_sum_assignment(cost)
+    return {int(r): int(c) for r, c in zip(rows, cols)}
+
+
+def align_clusters(labels, centroids, old_centroids, old_names: dict | None = None):
+    """Renumber a partition so clusters matched to the previous run keep their ids.
+
+    Ids stay dense (0..k-1). A matched cluster keeps its old id when that id
+    still exists in the new range; otherwise it takes a free id but still
+    inherits the old name. Returns (labels, centroids, names) where names
+    maps every new id to its carried-over name or "Cluster {id}".
+    """
+    labels = np.asarray(labels)
+    centroids = np.asarray(centroids)
+    old_names = {int(k): v for k, v in (old_names or {}).items()}
+    k = len(centroids)
+
+    matches = match_clusters(centroids, old_centroids)
+    new_to_final: dict[int, int] = {}
+    used: set[int] = set()
+    for new_id, old_id in matches.items():
+        if old_id < k:
+            new_to_final[new_id] = old_id
+            used.add(old_id)
+    free = iter(i for i in range(k) if i not in used)
+    for new_id in range(k):
+        if new_id not in new_to_final:
+            new_to_final[new_id] = next(free)
+
+    perm = np.array([new_to_final[i] for i in range(k)])
+    aligned_centroids = np.empty_like(centroids)
+    aligned_centroids[perm] = centroids
+
+    names = {}
+    for new_id, final_id in new_to_final.items():
+        old_id = matches.get(new_id)
+        names[final_id] = old_names.get(old_id, f"Cluster {final_id}") if old_id is not None \
+            else f"Cluster {final_id}"
+
+    return perm[labels], aligned_centroids, dict(sorted(names.items()))
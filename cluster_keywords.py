@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Per-cluster keywords from one global sparse document-term matrix.
+
+The corpus is tokenized once into a CSR document-term matrix. Per-cluster
+term counts are a single sparse product with a cluster-indicator matrix,
+terms are ranked with class-based TF-IDF (c-TF-IDF), and the top-k terms of
+each cluster are picked with argpartition instead of sorting the whole
+vocabulary.
+
+Usage:
+    from cluster_keywords import cluster_keywords
+
+    keywords = cluster_keywords(texts, labels, top_k=5, ngram_range=(1, 2))
+    # {0: ['applications', 'analyst', ...], 1: [...], ...}
+"""
+
+import numpy as np
+from scipy import sparse
+
+# ── Building blocks ───────────────────────────────────────────────────────────
+
+def build_term_matrix(corpus, ngram_range=(1, 2), min_df=2, stop_words='english'):
+    """Tokenize the corpus once. Returns (CSR doc×term counts, vocabulary array)."""
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    vec = CountVectorizer(ngram_range=ngram_range, stop_words=stop_words, min_df=min_df)
+    X = vec.fit_transform(corpus).tocsr()
+    return X, vec.get_feature_names_out()
+
+
+def cluster_indicator(labels, n_clusters: int | None = None) -> sparse.csr_matrix:
+    """Sparse (n_clusters × n_docs) 0/1 matrix with one non-zero per document."""
+    labels = np.asarray(labels, dtype=np.int64)
+    if n_clusters is None:
+        n_clusters = int(labels.max()) + 1 if len(labels) else 0
+    n = len(labels)
+    return sparse.csr_matrix(
+        (np.ones(n, dtype=np.float64), (labels, np.arange(n))),
+        shape=(n_clusters, n),
+    )
+
+
+def cluster_term_counts(X: sparse.spmatrix, labels, n_clusters: int | None = None) -> sparse.csr_matrix:
+    """Per-cluster term counts (n_clusters × n_terms) in one sparse product."""
+    return (cluster_indicator(labels, n_clusters) @ X).tocsr()
+
+
+def class_tfidf(counts: sparse.spmatrix) -> sparse.csr_matrix:
+    """Class-based TF-IDF: tf(t, c) · log(1 + A / f(t)).
+
+    tf is the term frequency within the cluster normalised by cluster length,
+    f(t) is the term's total frequency across all clusters and A is the
+    average number of terms per cluster.
+    """
+    counts = sparse.csr_matrix(counts, dtype=np.float64)
+    row_totals = np.asarray(counts.sum(axis=1)).ravel()
+    term_totals = np.asarray(counts.sum(axis=0)).ravel()
+    avg_len = row_totals.mean() if len(row_totals) else 0.0
+
+    idf = np.log1p(avg_len / np.maximum(term_totals, 1.0))
+    inv_rows = np.divide(1.0, row_totals, out=np.zeros_like(row_totals), where=row_totals > 0)
+    return (sparse.diags(inv_rows) @ counts @ sparse.diags(idf)).tocsr()
+
+
+def top_k_per_row(scores: sparse.csr_matrix, top_k: int) -> list[np.ndarray]:
+    """Column indices of the top_k scores in each row, best first (argpartition)."""
+    scores = sparse.csr_matrix(scores)
+    result = []
+    for r in range(scores.shape[0]):
+        start, end = scores.indptr[r], scores.indptr[r + 1]
+        data, cols = scores.data[start:end], scores.indices[start:end]
+        if len(data) > top_k:
+            part = np.argpartition(-data, top_k - 1)[:top_k]
+            data, cols = data[part], cols[part]
+        # Stable ordering: score desc, then column index for ties
+        order = np.lexsort((cols, -data))
+        result.append(cols[order])
+    return result
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+def cluster_keywords(corpus, labels, top_k: int = 5, ngram_range=(1, 2),
+                     min_df: int = 2, stop_words='english') -> dict[int, list[str]]:
+    """Top-k c-TF-IDF terms for every cluster in one call.
+
+    Clusters with no surviving terms map to an empty list.
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    X, vocab = build_term_matrix(corpus, ngram_range=ngram_range,
+                                 min_df=min_df, stop_words=stop_words)
+    scores = class_tfidf(cluster_term_counts(X, labels))
+    top = top_k_per_row(scores, top_k)
+    return {cid: [str(vocab[j]) for j in top[cid]] for cid in np.unique(labels).tolist()}
@@ -29,16 +29,26 @@ import seaborn as sns
 from sentence_transformers import SentenceTransformer
 from sklearn.cluster import KMeans
 from sklearn.decomposition import PCA
-from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.metrics import silhouette_score
 from scipy.cluster.hierarchy import dendrogram, linkage, fcluster
+from job_hierarchy import build_hierarchy, save_tree
+from cluster_keywords import cluster_keywords
 
 # Configuration
 INPUT_FILE = 'Hackathon_Datasets_Refined_v5.csv'
 MODEL_NAME = 'all-MiniLM-L6-v2'
 RANDOM_STATE = 42
 
+# Hierarchy Settings
+# 'exact' runs Ward on every job (O(N²) memory, fine for a few thousand rows);
+# 'micro' runs Ward over KMeans/BIRCH micro-clusters and scales to the full corpus.
+HIERARCHY_MODE = 'micro'
+MICRO_METHOD = 'kmeans'         # 'kmeans' or 'birch'
+N_MICRO_CLUSTERS = None         # None → ≈10·√N leaves
+TREE_OUTPUT_FILE = 'job_taxonomy_tree.json'
+
 # Output Settings
 pd.set_option('display.max_colwidth', None)
 plt.style.use('seaborn-v0_8-whitegrid')
@@ -87,12 +97,22 @@ print(f"Embeddings Matrix Shape: {embeddings.shape}")
 
 # ## 3. Phase 1: High-Resolution Hierarchical Clustering
 # Investigating the natural taxonomy of the organization using Ward's method. This visualization helps us see how major departments break down into sub-families.
+# In `micro` mode the tree is built over micro-clusters, every job is mapped to its leaf, and the full tree is saved to JSON so other cut levels can be read later with `job_hierarchy.cut_tree`.
 
 # In[5]:
 
 
 # Compute Linkage Matrix (Ward's Method minimizes variance within clusters)
-linked = linkage(embeddings, 'ward')
+if HIERARCHY_MODE == 'exact':
+    linked = linkage(embeddings, 'ward')
+else:
+    taxonomy_tree = build_hierarchy(
+        embeddings, n_micro=N_MICRO_CLUSTERS, method=MICRO_METHOD, random_state=RANDOM_STATE
+    )
+    linked = taxonomy_tree['linkage']
+    save_tree(taxonomy_tree, TREE_OUTPUT_FILE)
+    print(f"Built taxonomy over {taxonomy_tree['n_leaves']} micro-clusters "
+          f"({taxonomy_tree['n_jobs']} jobs) → {TREE_OUTPUT_FILE}")
 
 # Plot Dendrogram (Truncated for readability)
 plt.figure(figsize=(15, 8))
@@ -142,14 +162,12 @@ print("Cluster Assignments Completed.")
 # In[7]:
 
 
-def get_top_ngrams(corpus, n=2, top_k=5):
-    """Extract frequent n-grams from a text corpus excluding stop words."""
-    vec = CountVectorizer(ngram_range=(n, n), stop_words='english', min_df=2).fit(corpus)
-    bag_of_words = vec.transform(corpus)
-    sum_words = bag_of_words.sum(axis=0)
-    words_freq = [(word, sum_words[0, idx]) for word, idx in vec.vocabulary_.items()]
-    words_freq = sorted(words_freq, key=lambda x: x[1], reverse=True)
-    return [w[0] for w in words_freq[:top_k]]
+# One global document-term matrix; per-cluster counts come from a sparse
+# cluster-indicator product and are ranked with class-based TF-IDF.
+# We focus on Title + Summary for cleaner keywords
+profile_corpus = (df['Unified Job Title'] + " " + df['position_summary']).tolist()
+cluster_bigrams = cluster_keywords(profile_corpus, df['Cluster_ID'], top_k=4, ngram_range=(2, 2))
+df['Keywords'] = df['Cluster_ID'].map(lambda cid: ", ".join(cluster_bigrams.get(cid, [])))
 
 cluster_profiles = []
 
@@ -157,15 +175,11 @@ print("Profiling Candidates...")
 for cid in range(NUM_CLUSTERS):
     cluster_df = df[df['Cluster_ID'] == cid]
 
-    # Representative text for N-gram extraction
-    # We focus on Title + Summary for cleaner keywords
-    text_corpus = (cluster_df['Unified Job Title'] + " " + cluster_df['position_summary']).tolist()
-
     # Catch empty or too small clusters
-    if len(text_corpus) < 2:
+    if len(cluster_df) < 2:
         continue
 
-    top_bigrams = get_top_ngrams(text_corpus, n=2, top_k=4)
+    top_bigrams = cluster_bigrams.get(cid, [])
     sample_titles = cluster_df['Unified Job Title'].value_counts().head(3).index.tolist()
 
     # Calculate "Tightness" (Lower Std Dev of Distance means more consistent)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Token-budgeted batch packing for embedding requests.
+
+A fixed batch size ignores text length: batches of short titles waste
+requests while batches of long postings risk the per-request token limit.
+Here each text's token count is estimated, texts are grouped by length, and
+each request is packed up to the provider's token and instance limits.
+Requests rejected as too large are split in half and retried automatically.
+
+Usage:
+    from embedding_batches import embed_packed
+
+    X = embed_packed(lambda batch: model_call(batch), texts)
+"""
+
+import sys
+
+import numpy as np
+
+# Vertex AI text-embedding-005 limits (per request / per input)
+MAX_INSTANCES_PER_REQUEST = 250
+MAX_TOKENS_PER_REQUEST = 20_000
+MAX_TOKENS_PER_TEXT = 2_048
+
+# Rough English average; deliberately conservative so packed requests fit
+CHARS_PER_TOKEN = 3.5
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimated token count of a text, capped at the per-input limit (the API truncates)."""
+    return max(1, min(MAX_TOKENS_PER_TEXT, int(len(text) / CHARS_PER_TOKEN) + 1))
+
+
+def pack_batches(texts, max_tokens: int = MAX_TOKENS_PER_REQUEST,
+                 max_instances: int = MAX_INSTANCES_PER_REQUEST) -> list[list[int]]:
+    """Group text indices into requests that respect both limits.
+
+    Texts are sorted by estimated length so each request holds texts of
+    similar size, then packed greedily until the next text would exceed the
+    token budget or the instance limit.
+    """
+    tokens = np.array([estimate_tokens(t) for t in texts], dtype=np.int64)
+    order = np.argsort(-tokens, kind='stable')
+
+    batches, current, used = [], [], 0
+    for i in order:
+        t = int(tokens[i])
+        if current and (used + t > max_tokens or len(current) >= max_instances):
+            batches.append(current)
+            current, used = [], 0
+        current.append(int(i))
+        used += t
+    if current:
+        batches.append(current)
+    return batches
+
+
+def is_oversized_error(exc: Exception) -> bool:
+    """Whether an embedding error means the request was too large (vs. quota/auth)."""
+    name = type(exc).__name__
+    message = str(exc).lower()
+    if name in ('ResourceExhausted', 'TooManyRequests', 'PermissionDenied', 'Unauthenticated'):
+        return False
+    return name in ('InvalidArgument', 'BadRequest') or any(
+        hint in message for hint in ('token', 'too large', 'too long', 'exceeds', 'instances')
+    )
+
+
+def embed_packed(embed_fn, texts, max_tokens: int = MAX_TOKENS_PER_REQUEST,
+                 max_instances: int = MAX_INSTANCES_PER_REQUEST, on_batch=None,
+                 verbose: bool = False) -> np.ndarray:
+    """Embed texts with token-packed requests, returning vectors in input order.
+
+    embed_fn(list[str]) -> list of vectors. on_batch(indices, vectors), if
+    given, is called after every successful request (for progress/journaling).
+    verbose reports request progress on stderr; library callers stay silent.
+    """
+    texts = list(texts)
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    results: list = [None] * len(texts)
+    stats = {'requests': 0, 'splits': 0}
+
+    def run(indices):
+        try:
+            vectors = embed_fn([texts[i] for i in indices])
+        except Exception as exc:
+            if len(indices) == 1 or not is_oversized_error(exc):
+                raise
+            stats['splits'] += 1
+            mid = len(indices) // 2
+            run(indices[:mid])
+            run(indices[mid:])
+            return
+        stats['requests'] += 1
+        for i, v in zip(indices, vectors):
+            results[i] = v
+        if on_batch is not None:
+            on_batch(indices, vectors)
+
+    batches = pack_batches(texts, max_tokens=max_tokens, max_instances=max_instances)
+    for n, batch in enumerate(batches, 1):
+        run(batch)
+        if verbose and (n % 10 == 0 or n == len(batches)):
+            done = sum(r is not None for r in results)
+            print(f"  Request {n}/{len(batches)}: {done}/{len(texts)} texts embedded", file=sys.stderr)
+
+    if verbose and stats['splits']:
+        print(f"  Split {stats['splits']} oversized request(s); {stats['requests']} requests total",
+              file=sys.stderr)
+    return np.asarray(results, dtype=np.float32)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Write-ahead journal for resumable embedding runs.
+
+Every completed embedding request is appended (and fsynced) to a JSONL
+journal keyed by a hash of the model, task type and text. When a run dies
+partway, e.g. on a quota error at request 400, restarting replays the
+journal and only the remaining texts are sent to the API. A truncated last
+line from a crash mid-write is ignored on replay and cut off before the
+next append, so the new record starts on a line of its own.
+
+Usage:
+    from embedding_journal import EmbeddingJournal, ProgressReport
+
+    journal = EmbeddingJournal('artifacts/embeddings_journal.jsonl', namespace='text-embedding-005')
+    done = journal.replay()                    # key → vector
+    journal.append(keys, vectors)              # after each successful request
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+
+class EmbeddingJournal:
+    """Append-only JSONL journal: one line per completed batch."""
+
+    def __init__(self, path, namespace: str = ''):
+        self.path = Path(path)
+        self.namespace = namespace
+        self._tail_checked = False
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f'{self.namespace}\x1f{text}'.encode('utf-8')).hexdigest()[:32]
+
+    def replay(self) -> dict[str, np.ndarray]:
+        """All vectors recorded so far, keyed by text hash."""
+        done: dict[str, np.ndarray] = {}
+        if not self.path.exists():
+            return done
+        with open(self.path, 'rb') as f:
+            for line_no, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line)
+                    if record.get('ns') != self.namespace:
+                        continue
+                    dim = record['dim']
+                    data = np.frombuffer(base64.b64decode(record['vectors']), dtype=np.float32)
+                    vectors = data.reshape(len(record['keys']), dim)
+                except (ValueError, KeyError):
+                    # Torn write from a crash: everything before it is still valid
+                    print(f"  ⚠️  Ignoring unreadable journal line {line_no} in {self.path}",
+                          file=sys.stderr)
+                    continue
+                for k, v in zip(record['keys'], vectors):
+                    done[k] = v
+        return done
+
+    def _truncate_torn_tail(self) -> None:
+        """Cut a partial last line (no trailing newline) left by a crash mid-write."""
+        if not self.path.exists():
+            return
+        with open(self.path, 'r+b') as f:
+            end = f.seek(0, os.SEEK_END)
+            if end == 0:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b'\n':
+                return
+            pos = end
+            while pos > 0:
+                start = max(0, pos - 65536)
+                f.seek(start)
+                block = f.read(pos - start)
+                cut = block.rfind(b'\n')
+                if cut >= 0:
+                    pos = start + cut + 1
+                    break
+                pos = start
+            print(f"  ⚠️  Dropping {end - pos} bytes of torn journal tail in {self.path}", file=sys.stderr)
+            f.truncate(pos)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, keys: list[str], vectors) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        record = {
+            'ns':      self.namespace,
+            'keys':    list(keys),
+            'dim':     int(vectors.shape[1]),
+            'vectors': base64.b64encode(vectors.tobytes()).decode('ascii'),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not self._tail_checked:
+            self._truncate_torn_tail()
+            self._tail_checked = True
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class ProgressReport:
+    """Prints done/total, throughput and ETA to stderr at most every `interval` seconds."""
+
+    def __init__(self, total: int, already_done: int = 0, interval: float = 5.0):
+        self.total = total
+        self.done = already_done
+        self.session_done = 0
+        self.start = time.perf_counter()
+        self.interval = interval
+        self._last = 0.0
+
+    def update(self, n: int) -> None:
+        self.done += n
+        self.session_done += n
+        now = time.perf_counter()
+        if now - self._last < self.interval and self.done < self.total:
+            return
+        self._last = now
+        elapsed = now - self.start
+        rate = self.session_done / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.done
+        eta = remaining / rate if rate > 0 else float('inf')
+        eta_text = time.strftime('%H:%M:%S', time.gmtime(eta)) if np.isfinite(eta) else '?'
+        print(f"  {self.done}/{self.total} embedded ({self.done / max(self.total, 1):.1%}), "
+              f"{rate:.1f} texts/s, ETA {eta_text}", file=sys.stderr)
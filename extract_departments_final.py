@@ -179,9 +179,8 @@ def determine_department_from_content(job_title, position_summary, responsibilit
     
     return 'Other'
 
-def main():
-    input_file = "Hackathon Challenge #1 Datasets Cleaned.csv"
-    output_file = "job_postings_with_departments.csv"
+def main(input_file="Hackathon Challenge #1 Datasets Cleaned.csv",
+         output_file="job_postings_with_departments.csv"):
     
     rows = []
     
@@ -9,31 +9,132 @@ Prerequisites:
 
 Usage:
     python generate_backend_data.py
+    python generate_backend_data.py --refit-projection --projection-method randomized
+    python generate_backend_data.py --cluster-method graph --knn-k 15
+    python generate_backend_data.py --warm-start   # one KMeans run seeded from last centroids
+    python generate_backend_data.py --low-memory   # drop raw text early, compact dtypes
+    python generate_backend_data.py --layout force --layout-dims 3
+    python generate_backend_data.py --shard-by department --workers 8   # parallel shards
+    python generate_backend_data.py --embeddings lexical          # offline: TF-IDF + LSA, no Vertex AI
+    python generate_backend_data.py --similarity hybrid           # embeddings + TF-IDF similar jobs
+    python generate_backend_data.py --reduce pca --reduce-dims 256 --reduction-report
+    python generate_backend_data.py --preview --preview-size 2000   # sample run → preview/
+    python generate_backend_data.py --skill-weight 0.2            # similar jobs re-ranked by skill overlap
+    python generate_backend_data.py --docs "Full JDs"             # read .docx/.pdf directly (incremental)
 
 Output:
     - employees_with_skills_and_similarity.csv (with x, y coordinates)
+    - artifacts/projection.npz (persisted 2D projection; reused on later runs
+      so existing points keep their positions)
+    - artifacts/knn_graph.npz (sparse CSR kNN graph with similarity weights)
+    - artifacts/skill_bits.npz (skills as packed uint64 bitsets, see skill_bitsets.py)
+    - artifacts/job_texts.bin + job_texts_offsets.npy (text store for subcluster.py)
+    - artifacts/reduction.npz + embeddings_reduced.npy (--reduce: persisted reducer and the
+      matrix clustering and neighbour search ran on)
+    - artifacts/layout.npz (--layout force: positions keyed by text hash; the
+      next run starts from them so the map stays stable)
+    - --preview writes all of the above under preview/ instead, plus
+      preview/preview_report.json (cluster sizes and stats extrapolated to the corpus)
 """
 
 import os
+import sys
+import argparse
 import re
 import ast
+import json
 import pickle
+import hashlib
+import shutil
+import resource
 from pathlib import Path
 from collections import Counter
 
 import numpy as np
 import pandas as pd
-from sklearn.cluster import KMeans
-from sklearn.metrics.pairwise import cosine_similarity
 
-# Try to import Vertex AI
-try:
-    import vertexai
-    from vertexai.language_models import TextEmbeddingModel, TextEmbeddingInput
-    VERTEX_AI_AVAILABLE = True
-except ImportError:
-    VERTEX_AI_AVAILABLE = False
-    print("Warning: vertexai not available. Install with: pip install google-cloud-aiplatform")
+from cluster_alignment import align_clusters
+from cluster_keywords import cluster_keywords
+from embedding_batches import embed_packed
+from embedding_journal import EmbeddingJournal, ProgressReport
+from knn_graph import blocked_top_k, knn_graph, save_graph, graph_communities
+from layout import compute_layout, load_layout, save_layout, seed_from_previous
+from projection import ProjectionModel
+from skill_bitsets import encode_skills, hybrid_rerank, neighbour_skill_scores, save_skill_bits
+
+ARTIFACTS_DIR = Path('artifacts')
+PROJECTION_FILE = ARTIFACTS_DIR / 'projection.npz'
+CENTROIDS_FILE = ARTIFACTS_DIR / 'kmeans_centroids.npy'
+CLUSTER_LABELS_FILE = ARTIFACTS_DIR / 'cluster_labels.json'
+EMBEDDINGS_FILE = ARTIFACTS_DIR / 'embeddings_normalized.npy'
+JOB_INDEX_FILE = ARTIFACTS_DIR / 'job_index.json'
+KNN_GRAPH_FILE = ARTIFACTS_DIR / 'knn_graph.npz'
+JOURNAL_FILE = ARTIFACTS_DIR / 'embeddings_journal.jsonl'
+LAYOUT_FILE = ARTIFACTS_DIR / 'layout.npz'
+SHARD_EMBEDDINGS_FILE = ARTIFACTS_DIR / 'shard_embeddings.npy'   # temporary, --shard-by only
+TEXTS_FILE = ARTIFACTS_DIR / 'job_texts.bin'
+TEXT_OFFSETS_FILE = ARTIFACTS_DIR / 'job_texts_offsets.npy'
+LEXICAL_INDEX_FILE = ARTIFACTS_DIR / 'lexical_index.npz'   # --embeddings lexical only
+REDUCTION_FILE = ARTIFACTS_DIR / 'reduction.npz'              # --reduce only
+REDUCED_EMBEDDINGS_FILE = ARTIFACTS_DIR / 'embeddings_reduced.npy'
+REDUCTION_REPORT_FILE = ARTIFACTS_DIR / 'reduction_report.json'
+SKILL_BITS_FILE = ARTIFACTS_DIR / 'skill_bits.npz'
+
+EMBEDDING_MODEL_NAME = "text-embedding-005"
+
+LOCATION_TOKENS = {"ab", "usa", "canada", "alberta", "calgary", "edmonton",
+                   "vancouver", "toronto", "medicine hat", "texas", "hong kong"}
+
+# Raw posting columns from load_data; --low-memory drops them after the text export
+RAW_TEXT_COLUMNS = ['filename', 'job_title', 'position_summary', 'responsibilities', 'qualifications']
+
+SKILL_LEXICON = {
+    "SQL": [r'\bsql\b', r'\bpostgres\b', r'\bmysql\b', r'\bsnowflake\b', r'\bbigquery\b'],
+    "Python": [r'\bpython\b', r'\bpandas\b', r'\bnumpy\b'],
+    "Excel": [r'\bexcel\b', r'\bpivot table\b', r'\bvlookup\b'],
+    "Oracle/ERP": [r'\boracle\b', r'\berp\b', r'\bebs\b', r'\bpeople soft\b', r'\bsap\b'],
+    "Engineering/Maintenance": [
+        r'\b(cmms|work orders?|preventive maintenance|reliability|root cause|rca)\b',
+    ],
+    "Safety/EHS": [r'\b(ehs|hse)\b', r'\bsafety\b', r'\bloto\b', r'\bosha\b'],
+    "Supply Chain": [r'\bsupply chain\b', r'\bmrp\b', r'\bprocurement\b'],
+    "Audit/SOX": [r'\bsox\b', r'\bsarbanes[- ]oxley\b', r'\binternal audit\b'],
+    "Tax/Transfer Pricing": [r'\btransfer pricing\b', r'\btaxation\b'],
+    "HR/Payroll": [r'\bpayroll\b', r'\bhr\b', r'\bcompensation\b', r'\bbenefits\b'],
+    "ESG/Sustainability": [r'\besg\b', r'\bsustainability\b', r'\bcarbon\b'],
+    "Finance/Reporting": [r'\bfinancial reporting\b', r'\bifrs\b', r'\bgaap\b'],
+    "Legal/Contracts": [r'\blegal counsel\b', r'\bnda\b', r'\bcontract\b'],
+}
+
+# Seed names for the first KMeans run; later runs carry names over from
+# artifacts/cluster_labels.json by matching centroids (see cluster_alignment.py)
+CLUSTER_LABELS = {
+    0: "Applications & Business Systems Analysis",
+    1: "Treasury & Corporate Finance Leadership",
+    2: "Customer Service & Logistics",
+    3: "Corporate Admin Support",
+    4: "IT Applications Support",
+    5: "Process Engineering",
+    6: "Financial Reporting & Accounting",
+    7: "HR Operations",
+    8: "Plant Operations & HSE",
+    9: "Corporate Communications & ESG",
+    10: "Engineering (Electrical / Instrumentation)",
+    11: "Internal Audit & SOX Compliance",
+    12: "Tax & Transfer Pricing",
+    13: "Legal (Corporate Counsel)",
+    14: "Executive & Legal Administrative Support",
+    15: "Front Office & Reception",
+    16: "Process Safety",
+    17: "Maintenance & Reliability Engineering",
+    18: "Oracle Finance Systems",
+    19: "Enterprise IT / Technology Services",
+    20: "Global Supply Chain Planning",
+    21: "Procurement / Buying",
+    22: "IT Service Desk & End-User Support",
+    23: "Mechanical Maintenance Planning",
+    24: "Admin Support (Document Control)",
+}
 
 
 def load_data():
@@ -92,6 +193,30 @@ def clean_title(filename):
     return t
 
 
+def strip_locations(text):
+    """Lowercase text and remove location tokens."""
+    if pd.isna(text):
+        return ""
+    text = str(text).lower()
+    for loc in sorted(LOCATION_TOKENS, key=len, reverse=True):
+        text = re.sub(rf'\b{re.escape(loc)}\b', ' ', text, flags=re.IGNORECASE)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def build_text(df):
+    """Build the embedding text field from the raw posting columns."""
+    text = (
+        df['filename'].fillna('') + ' ' +
+        df['job_title'].fillna('') + ' ' +
+        df['position_summary'].fillna('').str[:1200] + ' ' +
+        df['responsibilities'].fillna('').str[:3000] + ' ' +
+        df['qualifications'].fillna('').str[:1500]
+    ).str.strip()
+    
+    text = text.apply(strip_locations)
+    return text.str.replace('docx', '', regex=True)
+
+
 def extract_skills(text, skill_lexicon):
     """Extract skills from text using regex patterns."""
     if pd.isna(text):
@@ -112,8 +237,39 @@ def extract_skills(text, skill_lexicon):
     return skills_found
 
 
+def load_embedding_model():
+    """Initialize Vertex AI and load the text embedding model.
+    
+    Imported here rather than at module load: vertexai takes seconds to import
+    and most runs are served from the embedding cache.
+    """
+    try:
+        import vertexai
+        from vertexai.language_models import TextEmbeddingModel
+    except ImportError:
+        raise RuntimeError("Vertex AI not available. Install with: pip install google-cloud-aiplatform")
+    
+    print("Initializing Vertex AI...", file=sys.stderr)
+    vertexai.init(project="hackathon-487919", location="us-central1")
+    return TextEmbeddingModel.from_pretrained(EMBEDDING_MODEL_NAME)
+
+
+def embed_texts(model, texts, task_type="RETRIEVAL_DOCUMENT", **packing):
+    """Embed texts with an already-loaded model using token-packed requests."""
+    from vertexai.language_models import TextEmbeddingInput
+    
+    def embed_batch(batch):
+        inputs = [TextEmbeddingInput(task_type=task_type, title="", text=t) for t in batch]
+        return [e.values for e in model.get_embeddings(inputs)]
+    
+    return embed_packed(embed_batch, texts, **packing)
+
+
 def get_embeddings(texts, use_cache=True):
-    """Get embeddings using Vertex AI with caching."""
+    """Get embeddings using Vertex AI with caching.
+    
+    Each completed request is journaled, so an interrupted run resumes where it stopped.
+    """
     cache_file = 'embeddings_cache.pkl'
     
     # Try to load from cache
@@ -126,29 +282,33 @@ def get_embeddings(texts, use_cache=True):
                 return cache['embeddings']
             print("Cache mismatch, recomputing...")
     
-    if not VERTEX_AI_AVAILABLE:
-        raise RuntimeError("Vertex AI not available. Install with: pip install google-cloud-aiplatform")
-    
-    # Initialize Vertex AI
-    print("Initializing Vertex AI...")
-    vertexai.init(project="hackathon-487919", location="us-central1")
-    
-    model = TextEmbeddingModel.from_pretrained("text-embedding-005")
-    
-    print(f"Generating embeddings for {len(texts)} texts...")
-    
-    def embed_batch(texts, batch_size=25):
-        vectors = []
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i+batch_size]
-            inputs = [TextEmbeddingInput(task_type="RETRIEVAL_DOCUMENT", title="", text=t) for t in batch]
-            embeddings = model.get_embeddings(inputs)
-            vectors.extend([e.values for e in embeddings])
-            if (i // batch_size + 1) % 10 == 0:
-                print(f"  Processed {i + len(batch)}/{len(texts)}...")
-        return np.array(vectors, dtype=np.float32)
-    
-    X = embed_batch(texts)
+    # Replay whatever a previous (possibly interrupted) run already embedded
+    journal = EmbeddingJournal(JOURNAL_FILE, namespace=f"{EMBEDDING_MODEL_NAME}:RETRIEVAL_DOCUMENT")
+    keys = [journal.key(t) for t in texts]
+    done = journal.replay()
+    todo = {}
+    for t, key in zip(texts, keys):
+        if key not in done:
+            todo.setdefault(key, t)
+    n_unique = len(set(keys))
+    if n_unique - len(todo):
+        print(f"Resuming: {n_unique - len(todo)}/{n_unique} unique texts replayed from {JOURNAL_FILE}")
+    
+    if todo:
+        model = load_embedding_model()
+        print(f"Generating embeddings for {len(todo)} texts...")
+        todo_keys, todo_texts = list(todo), list(todo.values())
+        progress = ProgressReport(n_unique, already_done=n_unique - len(todo))
+        
+        def record(indices, vectors):
+            batch_keys = [todo_keys[i] for i in indices]
+            journal.append(batch_keys, vectors)
+            done.update(zip(batch_keys, np.asarray(vectors, dtype=np.float32)))
+            progress.update(len(indices))
+        
+        embed_texts(model, todo_texts, on_batch=record, verbose=True)
+    
+    X = np.stack([done[k] for k in keys]).astype(np.float32)
     print(f"Embeddings shape: {X.shape}")
     
     # Save to cache
@@ -160,167 +320,539 @@ def get_embeddings(texts, use_cache=True):
     return X
 
 
-def main():
-    print("=" * 60)
-    print("Backend Data Generation Script")
-    print("=" * 60)
-    
-    # Load data
-    df = load_data()
-    
-    # Clean titles
-    print("\nCleaning job titles...")
-    df['title_clean'] = df['filename'].apply(clean_title)
-    
-    # Remove locations
-    location_tokens = {"ab", "usa", "canada", "alberta", "calgary", "edmonton", 
-                      "vancouver", "toronto", "medicine hat", "texas", "hong kong"}
+def lexical_embeddings(texts, n_components=256):
+    """Offline stand-in for get_embeddings: TF-IDF + LSA, persisted for place_job.py."""
+    from lexical_similarity import LexicalIndex
+    
+    print(f"Building TF-IDF + LSA ({n_components} dims) embeddings...")
+    lex = LexicalIndex.fit(texts)
+    X = lex.fit_lsa(n_components)
+    lex.save(LEXICAL_INDEX_FILE)
+    print(f"Embeddings shape: {X.shape} ({len(lex.terms)} terms); saved {LEXICAL_INDEX_FILE}")
+    return X
+
+
+def reduce_embeddings(X, method='pca', dims=256, refit=False):
+    """Map embeddings through the persisted Reducer, fitting it on first use."""
+    from reduction import Reducer
+    
+    reducer = None
+    if not refit and REDUCTION_FILE.exists():
+        reducer = Reducer.load(REDUCTION_FILE)
+        if (reducer.method, reducer.input_dim, reducer.n_components) != (method, X.shape[1], min(dims, X.shape[1])):
+            print(f"Persisted reducer is {reducer.describe()}; refitting...")
+            reducer = None
+        else:
+            print(f"Using persisted reducer: {REDUCTION_FILE}")
+    
+    if reducer is None:
+        reducer = Reducer.fit(X, method=method, n_components=dims, random_state=42)
+        reducer.save(REDUCTION_FILE)
+        print(f"Saved reducer: {REDUCTION_FILE}")
+    
+    X_reduced = reducer.transform(X)
+    np.save(REDUCED_EMBEDDINGS_FILE, X_reduced)
+    print(f"Reduced embeddings, {reducer.describe()}: {REDUCED_EMBEDDINGS_FILE}")
+    return X_reduced
+
+
+def embedding_space(source='vertex', reduce=None):
+    """Identifies the vector space X lives in (model, LSA basis, reducer), not the rows in it."""
+    def digest(*arrays):
+        h = hashlib.sha256()
+        for a in arrays:
+            h.update(np.ascontiguousarray(a).tobytes())
+        return h.hexdigest()[:16]
+    
+    if source == 'lexical':
+        with np.load(LEXICAL_INDEX_FILE, allow_pickle=False) as data:
+            space = f"lexical:{digest(data['terms'], data['components'])}"
+    else:
+        space = f"vertex:{EMBEDDING_MODEL_NAME}"
+    if reduce:
+        with np.load(REDUCTION_FILE, allow_pickle=False) as data:
+            space += f"|{reduce}:{digest(data['components'], data['mean'])}"
+    return space
+
+
+def project_coordinates(X, refit=False, method='full', dims=2, space=''):
+    """Project embeddings to the persisted [-50, 50] frame, fitting the model on first use."""
+    model = None
+    if not refit and PROJECTION_FILE.exists():
+        model = ProjectionModel.load(PROJECTION_FILE)
+        if model.source != space:
+            print(f"Projection model was fit on other vectors ({model.source or 'unrecorded'}, "
+                  f"now {space}); refitting...")
+            model = None
+        elif model.mean.shape[0] != X.shape[1]:
+            print(f"Projection model expects {model.mean.shape[0]}-d input, "
+                  f"embeddings are {X.shape[1]}-d; refitting...")
+            model = None
+        elif model.n_components != dims:
+            print(f"Projection model has {model.n_components} components, {dims} requested; refitting...")
+            model = None
+        else:
+            print(f"Using persisted projection model: {PROJECTION_FILE}")
+    
+    if model is None:
+        model = ProjectionModel.fit(X, n_components=dims, method=method, random_state=42, source=space)
+        model.save(PROJECTION_FILE)
+        print(f"Saved projection model ({method}): {PROJECTION_FILE}")
+    
+    return model.transform(X)
+
+
+def text_keys(texts):
+    """Stable per-posting keys for the layout (independent of row order and Employee_ID)."""
+    return [hashlib.sha256(t.encode('utf-8')).hexdigest()[:16] for t in texts]
+
+
+def layout_coordinates(X, graph, keys, dims=2, refit=False):
+    """Neighbour-preserving layout from the kNN graph, seeded from the previous run's positions."""
+    init, mask = None, None
+    if not refit:
+        init, mask = seed_from_previous(keys, *load_layout(LAYOUT_FILE), dims)
+    if init is None:
+        print("Cold-start layout (landmark MDS + force refinement)")
+    else:
+        print(f"Seeding layout from {LAYOUT_FILE}: {int(mask.sum())} of {len(keys)} jobs "
+              f"keep their previous positions")
+    coords = compute_layout(X, graph, dim=dims, init=init, init_mask=mask)
+    save_layout(LAYOUT_FILE, keys, coords)
+    print(f"Saved layout ({dims}D): {LAYOUT_FILE}")
+    return coords
+
+
+def load_previous_clusters(dim):
+    """Previous run's centroids and id → name map, or (None, None) if unusable."""
+    if not (CENTROIDS_FILE.exists() and CLUSTER_LABELS_FILE.exists()):
+        return None, None
+    centroids = np.load(CENTROIDS_FILE)
+    if centroids.shape[1] != dim:
+        print(f"Previous centroids are {centroids.shape[1]}-d, embeddings are {dim}-d; ignoring them")
+        return None, None
+    with open(CLUSTER_LABELS_FILE) as f:
+        names = {int(k): v for k, v in json.load(f).items()}
+    return centroids, names
+
+
+def normalize_rows(X):
+    """L2-normalize rows so dot products are cosine similarities."""
+    X = np.asarray(X, dtype=np.float32)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    return X / np.maximum(norms, 1e-12)
+
+
+def save_artifacts(df, X, centroids, label_names=CLUSTER_LABELS):
+    """Persist what is needed to place new postings without rerunning the pipeline."""
+    ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
     
-    def strip_locations(text):
-        if pd.isna(text):
-            return ""
-        text = str(text).lower()
-        for loc in sorted(location_tokens, key=len, reverse=True):
-            text = re.sub(rf'\b{re.escape(loc)}\b', ' ', text, flags=re.IGNORECASE)
-        return re.sub(r'\s+', ' ', text).strip()
+    np.save(CENTROIDS_FILE, np.asarray(centroids, dtype=np.float32))
+    np.save(EMBEDDINGS_FILE, normalize_rows(X))
     
-    df['title_clean'] = df['title_clean'].apply(strip_locations)
+    cluster_labels = {str(c): label_names.get(c, f"Cluster {c}") for c in range(len(centroids))}
+    with open(CLUSTER_LABELS_FILE, 'w') as f:
+        json.dump(cluster_labels, f, indent=2)
     
-    # Create full text
-    print("Creating text field...")
-    df['text'] = (
-        df['filename'].fillna('') + ' ' +
-        df['job_title'].fillna('') + ' ' +
-        df['position_summary'].fillna('').str[:1200] + ' ' +
-        df['responsibilities'].fillna('').str[:3000] + ' ' +
-        df['qualifications'].fillna('').str[:1500]
-    ).str.strip()
+    job_index = [
+        {'employee_id': e, 'title': t, 'cluster': int(c)}
+        for e, t, c in zip(df['Employee_ID'], df['title_clean'], df['cluster'])
+    ]
+    with open(JOB_INDEX_FILE, 'w') as f:
+        json.dump(job_index, f)
     
-    df['text'] = df['text'].apply(strip_locations)
-    df['text'] = df['text'].str.replace('docx', '', regex=True)
+    print(f"✅ Saved placement artifacts to {ARTIFACTS_DIR}/")
+
+
+def save_text_store(texts):
+    """Concatenated UTF-8 texts plus byte offsets, so one row's text is a single seek."""
+    ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    with open(TEXTS_FILE, 'wb') as f:
+        for i, text in enumerate(texts):
+            data = ('' if pd.isna(text) else str(text)).encode('utf-8')
+            f.write(data)
+            offsets[i + 1] = offsets[i] + len(data)
+    np.save(TEXT_OFFSETS_FILE, offsets)
+
+
+def text_dtype():
+    """Arrow-backed string dtype when pyarrow is installed (far smaller than object), else None."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    return 'string[pyarrow]'
+
+
+def compact_columns(df, text_columns=(), category_columns=()):
+    """Convert columns in place to Arrow strings / categoricals for --low-memory."""
+    dtype = text_dtype()
+    for col in text_columns:
+        if dtype and col in df:
+            df[col] = df[col].astype(dtype)
+    for col in category_columns:
+        if col in df:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate backend CSV files with pre-computed data.")
+    parser.add_argument('--refit-projection', action='store_true',
+                        help="Refit the projection (or lay out from scratch with --layout force) "
+                             "instead of reusing the persisted artifact")
+    parser.add_argument('--projection-method', choices=['full', 'randomized', 'incremental'],
+                        default='full', help="PCA variant used when (re)fitting the projection")
+    parser.add_argument('--layout', choices=['pca', 'force'], default='pca',
+                        help="Map coordinates: persisted PCA projection, or a neighbour-preserving "
+                             "force layout of the kNN graph")
+    parser.add_argument('--layout-dims', type=int, choices=[2, 3], default=2,
+                        help="2D (x, y) or 3D (x, y, z) coordinates")
+    parser.add_argument('--knn-k', type=int, default=10,
+                        help="Neighbours per job in the exported kNN graph (at least 3)")
+    parser.add_argument('--knn-weight', choices=['cosine', 'binary'], default='cosine',
+                        help="Edge weights of the exported kNN graph")
+    parser.add_argument('--cluster-method', choices=['kmeans', 'graph'], default='kmeans',
+                        help="KMeans on embeddings, or community detection on the kNN graph")
+    parser.add_argument('--graph-method', choices=['label_propagation', 'louvain'],
+                        default='label_propagation', help="Community detection for --cluster-method graph")
+    parser.add_argument('--n-clusters', type=int, default=25, help="k for KMeans")
+    parser.add_argument('--warm-start', action='store_true',
+                        help="Seed KMeans with the persisted centroids and run a single init")
+    parser.add_argument('--no-align', action='store_true',
+                        help="Do not match cluster ids/labels to the previous run")
+    parser.add_argument('--low-memory', action='store_true',
+                        help="Drop raw text once it is no longer needed and use compact dtypes")
+    parser.add_argument('--embeddings', choices=['vertex', 'lexical'], default='vertex',
+                        help="Vertex AI embeddings, or offline TF-IDF + LSA vectors")
+    parser.add_argument('--lsa-dims', type=int, default=256, help="LSA dimensions for --embeddings lexical")
+    parser.add_argument('--similarity', choices=['embedding', 'hybrid'], default='embedding',
+                        help="Similar jobs by embedding cosine, or blended with TF-IDF cosine "
+                             "(lexical top candidates re-scored with embeddings)")
+    parser.add_argument('--hybrid-alpha', type=float, default=0.7,
+                        help="Embedding weight in --similarity hybrid")
+    parser.add_argument('--skill-weight', type=float, default=0.0,
+                        help="Weight of skill Jaccard when ranking similar jobs (0: embeddings only)")
+    parser.add_argument('--reduce', choices=['pca', 'prefix'],
+                        help="Reduce embeddings before clustering and neighbour search")
+    parser.add_argument('--reduce-dims', type=int, default=256, help="Target dimension for --reduce")
+    parser.add_argument('--refit-reduction', action='store_true',
+                        help="Refit the reducer instead of reusing artifacts/reduction.npz")
+    parser.add_argument('--reduction-report', action='store_true',
+                        help="Report neighbour recall and cluster agreement versus full dimension")
+    parser.add_argument('--preview', action='store_true',
+                        help="Run on a sample and extrapolate cluster stats; outputs go to --preview-dir")
+    parser.add_argument('--preview-size', type=int, default=2000, help="Postings in the --preview sample")
+    parser.add_argument('--preview-sample', choices=['stratified', 'coreset'], default='stratified',
+                        help="Stratified by department and title family, or a k-means++ coreset")
+    parser.add_argument('--preview-dir', default='preview', help="Output directory for --preview")
+    parser.add_argument('--docs', help="Ingest .docx/.pdf postings from this folder (only new or "
+                                       "changed files are parsed) instead of reading the dataset CSV")
+    parser.add_argument('--shard-by', choices=['department', 'hash'],
+                        help="Run cleaning, skills, top-k and KMeans per shard in worker processes")
+    parser.add_argument('--n-shards', type=int, default=8, help="Shard count for --shard-by hash")
+    parser.add_argument('--workers', type=int,
+                        help="Worker processes for --shard-by and --docs (default: all cores)")
+    args = parser.parse_args(argv)
+    if args.preview and args.shard_by:
+        parser.error("--preview runs in a single process; drop --shard-by")
+    return args
+
+
+def embed_corpus(low_memory=False, df=None, runner=None, source='vertex', lsa_dims=256):
+    """Load, clean and embed the dataset. Returns (df, X); embeddings are cached/journaled.
+
+    With a sharded_pipeline.ShardedRunner, cleaning and skill extraction run per shard.
+    """
+    # Load data
+    if df is None:
+        df = load_data()
+    
+    if runner is not None:
+        print("\nCleaning titles, building text and extracting skills per shard...")
+        prepared = runner.prepare(df)
+        for col in prepared.columns:
+            df[col] = prepared[col]
+    else:
+        # Clean titles
+        print("\nCleaning job titles...")
+        df['title_clean'] = df['filename'].apply(clean_title)
+        
+        # Remove locations
+        df['title_clean'] = df['title_clean'].apply(strip_locations)
+        
+        # Create full text
+        print("Creating text field...")
+        df['text'] = build_text(df)
+    df['Employee_ID'] = [f'EMP_{i+1:04d}' for i in range(len(df))]
+    if low_memory:
+        if text_dtype() is None:
+            print("pyarrow not installed; text columns stay as Python objects (pip install pyarrow)")
+        compact_columns(df, text_columns=RAW_TEXT_COLUMNS + ['text'], category_columns=['title_clean'])
     
     # Get embeddings
     print("\nGenerating embeddings...")
     texts = df['text'].fillna('').tolist()
-    X = get_embeddings(texts)
+    if source == 'lexical':
+        X = lexical_embeddings(texts, n_components=lsa_dims)
+    else:
+        X = get_embeddings(texts)
+        if LEXICAL_INDEX_FILE.exists():
+            LEXICAL_INDEX_FILE.unlink()        # place_job.py must embed with Vertex AI again
+    del texts
+    return df, np.asarray(X, dtype=np.float32)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    
+    print("=" * 60)
+    print("Backend Data Generation Script")
+    print("=" * 60)
+    
+    df = None
+    if args.docs:
+        from ingest_documents import ingest_folder
+        
+        df = ingest_folder(args.docs, workers=args.workers)
+    if args.preview:
+        return run_preview(args, df=df)
+    if not args.shard_by:
+        return run(args, df=df)
+    
+    from sharded_pipeline import ShardedRunner, shard_assignments
+    
+    df = load_data() if df is None else df
+    shard_ids, shard_names = shard_assignments(df, by=args.shard_by, n_shards=args.n_shards)
+    with ShardedRunner(shard_ids, shard_names, workers=args.workers) as runner:
+        print(f"Sharded run ({args.shard_by}): {runner.describe()}")
+        run(args, df=df, runner=runner)
+
+
+def enter_preview_dir(path):
+    """Make `path` the working directory so a preview never overwrites full-run outputs.
+    
+    The embedding journal stays shared (sampled texts replay from it), and the
+    full run's centroids are copied in so preview cluster ids and names match it.
+    """
+    global JOURNAL_FILE
+    JOURNAL_FILE = JOURNAL_FILE.resolve()
+    previous = [p.resolve() for p in (CENTROIDS_FILE, CLUSTER_LABELS_FILE) if p.exists()]
+    Path(path).mkdir(parents=True, exist_ok=True)
+    os.chdir(path)
+    ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+    for p in previous:
+        shutil.copy(p, ARTIFACTS_DIR / p.name)
+
+
+def run_preview(args, df=None):
+    """--preview: the full pipeline on a sample, with corpus-level stats extrapolated from it."""
+    import time
+    from preview import draw_sample, preview_report, print_report
+    
+    start = time.perf_counter()
+    df = load_data() if df is None else df
+    sample = draw_sample(df, size=args.preview_size, method=args.preview_sample)
+    print(f"Preview sample: {sample.describe()} → {args.preview_dir}/")
+    df = df.iloc[sample.rows].reset_index(drop=True)
+    enter_preview_dir(args.preview_dir)
+    
+    df = run(args, df=df, sample_weight=sample.weights)
+    clusters = df['cluster'].to_numpy().astype(np.int64)
+    label_names = dict(zip(clusters.tolist(), df['Cluster_Label'].astype(str)))
+    report = preview_report(sample, clusters, df['Individual_Skills'].tolist(), label_names)
+    print_report(report)
+    with open('preview_report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Preview report: {Path(args.preview_dir) / 'preview_report.json'} "
+          f"({time.perf_counter() - start:.1f}s)")
+
+
+def run(args, df=None, runner=None, sample_weight=None):
+    """All stages after argument parsing; `runner` spreads the heavy ones over shards.
+    
+    `sample_weight` (postings each row stands for, --preview) weights KMeans.
+    Returns the exported DataFrame.
+    """
+    df, X = embed_corpus(low_memory=args.low_memory, df=df, runner=runner,
+                         source=args.embeddings, lsa_dims=args.lsa_dims)
+    
+    # Optional reduction: everything below (clustering, neighbours, placement) uses the reduced X
+    X_full = None
+    if args.reduce:
+        print(f"\nReducing embeddings ({args.reduce}, {args.reduce_dims} dims)...")
+        ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+        X_full, X = X, reduce_embeddings(X, args.reduce, args.reduce_dims, refit=args.refit_reduction)
+        if not args.reduction_report:
+            X_full = None
+    else:
+        for stale in (REDUCTION_FILE, REDUCED_EMBEDDINGS_FILE):
+            if stale.exists():
+                stale.unlink()                 # place_job.py must not reduce full-dim embeddings
+    
+    # Nearest neighbours (blocked top-k, never materializes the N×N matrix)
+    print("\nFinding nearest neighbours...")
+    knn_k = max(args.knn_k, 3)
+    if runner is not None:
+        ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+        runner.share_embeddings(X, SHARD_EMBEDDINGS_FILE)
+    if args.similarity == 'hybrid':
+        from lexical_similarity import LexicalIndex, hybrid_top_k
+        
+        print(f"Hybrid similarity: TF-IDF pre-filter, alpha={args.hybrid_alpha} on embeddings")
+        lex = LexicalIndex.fit(df['text'].fillna('').tolist())
+        nn_idx, nn_sim = hybrid_top_k(lex.matrix(), X, knn_k, alpha=args.hybrid_alpha)
+        del lex
+    elif runner is not None:
+        nn_idx, nn_sim = runner.top_k(knn_k)
+    else:
+        nn_idx, nn_sim = blocked_top_k(X, knn_k)
+    graph = knn_graph(k=knn_k, weight=args.knn_weight, neighbors=(nn_idx, nn_sim))
+    ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+    save_graph(graph, KNN_GRAPH_FILE)
+    print(f"Saved kNN graph (k={knn_k}, {graph.nnz} edges): {KNN_GRAPH_FILE}")
     
     # Clustering
     print("\nClustering...")
-    k = 25
-    kmeans = KMeans(n_clusters=k, random_state=42, n_init=30)
-    df['cluster'] = kmeans.fit_predict(X)
+    prev_centroids, prev_names = load_previous_clusters(X.shape[1])
+    if args.cluster_method == 'graph':
+        df['cluster'] = graph_communities(graph, method=args.graph_method, random_state=42)
+        n_clusters = int(df['cluster'].max()) + 1
+        centroids = np.vstack([X[df['cluster'].values == c].mean(axis=0) for c in range(n_clusters)])
+        print(f"Found {n_clusters} communities ({args.graph_method})")
+    elif runner is not None:
+        warm = args.warm_start and prev_centroids is not None and len(prev_centroids) == args.n_clusters
+        print(f"Per-shard KMeans, reconciled to k={args.n_clusters}"
+              + (f" (seeded from {CENTROIDS_FILE})" if warm else ""))
+        labels, centroids = runner.kmeans(X, args.n_clusters, init=prev_centroids if warm else None)
+        df['cluster'] = labels
+    else:
+        from sklearn.cluster import KMeans
+        
+        k = args.n_clusters
+        if args.warm_start and prev_centroids is not None and len(prev_centroids) == k:
+            print(f"Warm-starting KMeans from {CENTROIDS_FILE} (single init)")
+            kmeans = KMeans(n_clusters=k, init=prev_centroids.astype(X.dtype), n_init=1, random_state=42)
+        else:
+            if args.warm_start:
+                print(f"No usable centroids for k={k}; falling back to a cold start")
+            kmeans = KMeans(n_clusters=k, random_state=42, n_init=30)
+        df['cluster'] = kmeans.fit_predict(X, sample_weight=sample_weight)
+        centroids = kmeans.cluster_centers_
+    
+    # Keep ids, labels and colours stable relative to the previous run
+    if prev_centroids is not None and not args.no_align:
+        labels, centroids, label_names = align_clusters(
+            df['cluster'].values, centroids, prev_centroids, prev_names
+        )
+        moved = int((labels != df['cluster'].values).sum())
+        df['cluster'] = labels
+        print(f"Matched cluster ids to previous run ({moved} jobs renumbered)")
+    elif args.cluster_method == 'kmeans':
+        label_names = CLUSTER_LABELS
+    else:
+        label_names = {}
+    
+    if X_full is not None:
+        from reduction import reduction_report
+        
+        print("Comparing against full dimension...")
+        report = reduction_report(X_full, X, df['cluster'].values, k=knn_k)
+        with open(REDUCTION_REPORT_FILE, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"  recall@{knn_k}: {report[f'recall_at_{knn_k}']:.3f}, "
+              f"ARI: {report['cluster_ari']:.3f}, NMI: {report['cluster_nmi']:.3f} "
+              f"→ {REDUCTION_REPORT_FILE}")
+        X_full = None
     
     # Calculate distance to center
     print("Calculating distances to centroids...")
-    centroids = kmeans.cluster_centers_
-    distances = []
-    for i, (idx, row) in enumerate(df.iterrows()):
-        cluster_id = row['cluster']
-        dist = np.linalg.norm(X[i] - centroids[cluster_id])
-        distances.append(dist)
-    df['Distance_to_Center'] = distances
-    
-    # 2D coordinates using PCA (lighter than UMAP)
-    print("Generating 2D coordinates...")
-    from sklearn.decomposition import PCA
-    pca = PCA(n_components=2, random_state=42)
-    coords_2d = pca.fit_transform(X)
-    df['x'] = coords_2d[:, 0]
-    df['y'] = coords_2d[:, 1]
-    
-    # Normalize to [-50, 50]
-    for col in ['x', 'y']:
-        df[col] = (df[col] - df[col].min()) / (df[col].max() - df[col].min())
-        df[col] = df[col] * 100 - 50
-    
-    # Skill extraction
-    print("Extracting skills...")
-    skill_lexicon = {
-        "SQL": [r'\bsql\b', r'\bpostgres\b', r'\bmysql\b', r'\bsnowflake\b', r'\bbigquery\b'],
-        "Python": [r'\bpython\b', r'\bpandas\b', r'\bnumpy\b'],
-        "Excel": [r'\bexcel\b', r'\bpivot table\b', r'\bvlookup\b'],
-        "Oracle/ERP": [r'\boracle\b', r'\berp\b', r'\bebs\b', r'\bpeople soft\b', r'\bsap\b'],
-        "Engineering/Maintenance": [
-            r'\b(cmms|work orders?|preventive maintenance|reliability|root cause|rca)\b',
-        ],
-        "Safety/EHS": [r'\b(ehs|hse)\b', r'\bsafety\b', r'\bloto\b', r'\bosha\b'],
-        "Supply Chain": [r'\bsupply chain\b', r'\bmrp\b', r'\bprocurement\b'],
-        "Audit/SOX": [r'\bsox\b', r'\bsarbanes[- ]oxley\b', r'\binternal audit\b'],
-        "Tax/Transfer Pricing": [r'\btransfer pricing\b', r'\btaxation\b'],
-        "HR/Payroll": [r'\bpayroll\b', r'\bhr\b', r'\bcompensation\b', r'\bbenefits\b'],
-        "ESG/Sustainability": [r'\besg\b', r'\bsustainability\b', r'\bcarbon\b'],
-        "Finance/Reporting": [r'\bfinancial reporting\b', r'\bifrs\b', r'\bgaap\b'],
-        "Legal/Contracts": [r'\blegal counsel\b', r'\bnda\b', r'\bcontract\b'],
-    }
-    
-    df['Individual_Skills'] = df['text'].apply(lambda x: extract_skills(x, skill_lexicon))
+    df['Distance_to_Center'] = np.linalg.norm(X - centroids[df['cluster'].values], axis=1)
+    
+    # Cluster keywords (class-TF-IDF over one global term matrix)
+    print("Extracting cluster keywords...")
+    keywords = cluster_keywords(df['text'].tolist(), df['cluster'], top_k=5, ngram_range=(1, 2))
+    df['Keywords'] = df['cluster'].map(lambda c: ', '.join(keywords.get(c, [])))
+    
+    # Skill extraction (already done per shard in a sharded run)
+    if 'Individual_Skills' not in df.columns:
+        print("Extracting skills...")
+        df['Individual_Skills'] = df['text'].apply(lambda x: extract_skills(x, SKILL_LEXICON))
     df['Skills_Count'] = df['Individual_Skills'].apply(len)
     df['Skills_String'] = df['Individual_Skills'].apply(lambda x: ', '.join(x) if x else '')
+    skill_bits = encode_skills(df['Individual_Skills'].tolist(), list(SKILL_LEXICON))
+    save_skill_bits(SKILL_BITS_FILE, skill_bits, list(SKILL_LEXICON))
     
-    # Calculate similarities
-    print("Calculating similarities...")
-    sim_matrix = cosine_similarity(X)
-    
-    similar_employees = []
-    for i in range(len(df)):
-        sim_scores = sim_matrix[i]
-        # Get top 3 (excluding self)
-        top_indices = np.argsort(sim_scores)[::-1][1:4]
-        similar_employees.append({
-            'Similar_Employee_1': f'EMP_{top_indices[0]+1:04d}',
-            'Similar_Employee_1_Score': round(float(sim_scores[top_indices[0]]), 6),
-            'Similar_Employee_2': f'EMP_{top_indices[1]+1:04d}',
-            'Similar_Employee_2_Score': round(float(sim_scores[top_indices[1]]), 6),
-            'Similar_Employee_3': f'EMP_{top_indices[2]+1:04d}',
-            'Similar_Employee_3_Score': round(float(sim_scores[top_indices[2]]), 6),
-        })
-    
-    similar_df = pd.DataFrame(similar_employees)
-    df = pd.concat([df.reset_index(drop=True), similar_df], axis=1)
-    
-    # Add Employee_ID
-    df['Employee_ID'] = [f'EMP_{i+1:04d}' for i in range(len(df))]
+    # Text content export; after this the raw text is no longer needed
+    print("\nExporting CSV files...")
+    main_output_cols = [
+        'Employee_ID', 'filename', 'job_title', 'position_summary',
+        'responsibilities', 'qualifications', 'title_clean', 'text',
+        'cluster', 'Keywords', 'Distance_to_Center'
+    ]
+    layout_keys = text_keys(df['text']) if args.layout == 'force' else None
+    main_output_file = 'main_output_with_coords.csv'
+    df[main_output_cols].to_csv(main_output_file, index=False)
+    print(f"✅ Exported: {main_output_file} ({len(df)} rows)")
+    save_text_store(df['text'])           # row-aligned with the embeddings (subcluster.py)
+    if args.low_memory:
+        df.drop(columns=RAW_TEXT_COLUMNS + ['text'], inplace=True)
+    
+    # Map coordinates: persisted projection, or force layout of the kNN graph (lighter than UMAP)
+    print(f"Generating {args.layout_dims}D coordinates ({args.layout})...")
+    if args.layout == 'force':
+        coords = layout_coordinates(X, graph, layout_keys, dims=args.layout_dims,
+                                    refit=args.refit_projection)
+    else:
+        coords = project_coordinates(X, refit=args.refit_projection, method=args.projection_method,
+                                     dims=args.layout_dims,
+                                     space=embedding_space(args.embeddings, args.reduce))
+        if LAYOUT_FILE.exists():
+            LAYOUT_FILE.unlink()               # place_job.py must not use a stale layout
+    coord_columns = ['x', 'y', 'z'][:args.layout_dims]
+    for d, col in enumerate(coord_columns):
+        df[col] = coords[:, d]
+    
+    # Top-3 similar jobs (from the blocked top-k pass above), assigned column by column
+    print("Collecting similar jobs...")
+    if args.skill_weight > 0:
+        print(f"Re-ranking neighbours by embedding + skill Jaccard (skill weight {args.skill_weight})")
+        nn_idx, nn_sim, nn_skill = hybrid_rerank(nn_idx, nn_sim, skill_bits, skill_weight=args.skill_weight)
+    else:
+        nn_skill = neighbour_skill_scores(skill_bits, nn_idx)
+    employee_ids = df['Employee_ID'].to_numpy()
+    for j in range(3):
+        if args.low_memory:
+            similar = pd.Categorical.from_codes(nn_idx[:, j], categories=employee_ids)
+        else:
+            similar = employee_ids[nn_idx[:, j]]
+        df[f'Similar_Employee_{j+1}'] = similar
+        df[f'Similar_Employee_{j+1}_Score'] = np.round(nn_sim[:, j].astype(np.float64), 6)
+        df[f'Similar_Employee_{j+1}_Skill_Jaccard'] = np.round(nn_skill[:, j].astype(np.float64), 4)
     
     # Cluster labels
-    cluster_labels = {
-        0: "Applications & Business Systems Analysis",
-        1: "Treasury & Corporate Finance Leadership",
-        2: "Customer Service & Logistics",
-        3: "Corporate Admin Support",
-        4: "IT Applications Support",
-        5: "Process Engineering",
-        6: "Financial Reporting & Accounting",
-        7: "HR Operations",
-        8: "Plant Operations & HSE",
-        9: "Corporate Communications & ESG",
-        10: "Engineering (Electrical / Instrumentation)",
-        11: "Internal Audit & SOX Compliance",
-        12: "Tax & Transfer Pricing",
-        13: "Legal (Corporate Counsel)",
-        14: "Executive & Legal Administrative Support",
-        15: "Front Office & Reception",
-        16: "Process Safety",
-        17: "Maintenance & Reliability Engineering",
-        18: "Oracle Finance Systems",
-        19: "Enterprise IT / Technology Services",
-        20: "Global Supply Chain Planning",
-        21: "Procurement / Buying",
-        22: "IT Service Desk & End-User Support",
-        23: "Mechanical Maintenance Planning",
-        24: "Admin Support (Document Control)",
-    }
-    df['Cluster_Label'] = df['cluster'].map(lambda x: cluster_labels.get(x, f"Cluster {x}"))
-    
-    # Export
-    print("\nExporting CSV files...")
+    df['Cluster_Label'] = df['cluster'].map(lambda x: label_names.get(x, f"Cluster {x}"))
+    if args.low_memory:
+        compact_columns(df, category_columns=['cluster', 'Cluster_Label', 'Keywords'])
+    
+    save_artifacts(df, X, centroids, label_names)
     
     export_columns = [
-        'Employee_ID', 'title_clean', 'cluster', 'Cluster_Label',
+        'Employee_ID', 'title_clean', 'cluster', 'Cluster_Label', 'Keywords',
         'Individual_Skills', 'Skills_String', 'Skills_Count',
-        'x', 'y', 'Distance_to_Center',
+        *coord_columns, 'Distance_to_Center',
         'Similar_Employee_1', 'Similar_Employee_1_Score',
         'Similar_Employee_2', 'Similar_Employee_2_Score',
-        'Similar_Employee_3', 'Similar_Employee_3_Score'
+        'Similar_Employee_3', 'Similar_Employee_3_Score',
+        'Similar_Employee_1_Skill_Jaccard', 'Similar_Employee_2_Skill_Jaccard',
+        'Similar_Employee_3_Skill_Jaccard'
     ]
     
     export_df = df[export_columns].copy()
@@ -332,20 +864,11 @@ def main():
     export_df.to_csv(output_file, index=False)
     print(f"✅ Exported: {output_file} ({len(export_df)} rows)")
     
-    # Also export main_output.csv with text content
-    main_output_cols = [
-        'Employee_ID', 'filename', 'job_title', 'position_summary',
-        'responsibilities', 'qualifications', 'title_clean', 'text',
-        'cluster', 'Distance_to_Center'
-    ]
-    main_output_df = df[main_output_cols].copy()
-    main_output_file = 'main_output_with_coords.csv'
-    main_output_df.to_csv(main_output_file, index=False)
-    print(f"✅ Exported: {main_output_file} ({len(main_output_df)} rows)")
-    
+    print(f"\nPeak RSS: {peak_rss_mb():.0f} MB (embeddings: {X.nbytes / 1024**2:.0f} MB)")
     print("\n" + "=" * 60)
     print("Done! You can now start the backend.")
     print("=" * 60)
+    return df
 
 
 if __name__ == '__main__':
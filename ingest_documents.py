@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Incremental ingestion of job descriptions straight from the document tree.
+
+Walks a folder such as `Full JDs/<Dept>/...`, extracts the title, summary,
+responsibilities and qualifications of every .docx / .pdf in a process pool,
+and returns the columns load_data() reads from the flattened CSV:
+
+    filename, job_title, position_summary, responsibilities, qualifications
+
+`filename` is written the way the CSV has it (`Full JDs\\Finance\\x.docx`),
+so department extraction and title cleaning work unchanged.
+
+A manifest (artifacts/ingest_manifest.json) keeps size, mtime and SHA-256 per
+file together with the extracted record. On the next run a file with the same
+size and mtime is not opened; one whose stat changed is hashed and only
+re-parsed if the hash changed too. Files that failed to parse are retried on
+every run. Deleted files drop out.
+
+.docx is read with the standard library (zipfile + XML); .pdf needs pypdf
+(pip install pypdf). Legacy .doc files are skipped with a warning.
+
+Usage:
+    python ingest_documents.py "Full JDs" --output jds.csv --workers 8
+    python generate_backend_data.py --docs "Full JDs"     # ingest, then the full run
+
+    from ingest_documents import ingest_folder
+    df = ingest_folder('Full JDs')
+"""
+
+import io
+import os
+import re
+import json
+import zipfile
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree
+
+import pandas as pd
+
+import generate_backend_data as gbd
+
+MANIFEST_FILE = gbd.ARTIFACTS_DIR / 'ingest_manifest.json'
+MANIFEST_VERSION = 1
+DOCUMENT_SUFFIXES = {'.docx', '.pdf'}
+
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+# Section headings (whole paragraph, or followed by a colon and inline text)
+SECTION_HEADINGS = {
+    'position_summary': r'(?:position|job|role)?\s*(?:summary|purpose|overview|description)'
+                        r'|about (?:the|this) (?:role|position)|purpose of (?:the )?(?:position|role)',
+    'responsibilities': r'(?:key|main|primary|major)?\s*(?:responsibilities|duties|accountabilities)'
+                        r'(?:\s*(?:and|&)\s*(?:duties|responsibilities|accountabilities))?'
+                        r'|what you will do',
+    'qualifications':   r'(?:required|preferred|minimum)?\s*(?:qualifications|requirements|skills|'
+                        r'experience|education)(?:\s*(?:and|&|,)\s*(?:experience|skills|education|'
+                        r'qualifications|requirements))*|what you bring|who you are',
+}
+HEADING_RE = re.compile(
+    r'^\s*(?:' + '|'.join(f'(?P<{name}>{pattern})' for name, pattern in SECTION_HEADINGS.items())
+    + r')\s*(?::\s*(?P<inline>.*))?$',
+    re.IGNORECASE,
+)
+TITLE_RE = re.compile(r'^\s*(?:job|position)\s+title\s*[:\-–]\s*(?P<title>.+)$', re.IGNORECASE)
+
+# ── Extraction (runs in worker processes) ─────────────────────────────────────
+
+def docx_paragraphs(data: bytes) -> list[str]:
+    """Paragraph texts of a .docx (body and tables, document order)."""
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        root = ElementTree.fromstring(z.read('word/document.xml'))
+    paragraphs = []
+    for p in root.iter(f'{WORD_NS}p'):
+        text = ''.join(node.text or '' for node in p.iter()
+                       if node.tag == f'{WORD_NS}t').strip()
+        if text:
+            paragraphs.append(text)
+    return paragraphs
+
+
+def pdf_paragraphs(data: bytes) -> list[str]:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError("PDF support needs pypdf. Install with: pip install pypdf")
+    reader = PdfReader(io.BytesIO(data))
+    lines = []
+    for page in reader.pages:
+        lines.extend(line.strip() for line in (page.extract_text() or '').splitlines())
+    return [line for line in lines if line]
+
+
+def split_sections(paragraphs: list[str], fallback_title: str = '') -> dict:
+    """Title plus summary / responsibilities / qualifications text from a paragraph list."""
+    title = None
+    sections = {name: [] for name in SECTION_HEADINGS}
+    current = None
+    for text in paragraphs:
+        m = TITLE_RE.match(text)
+        if m and title is None:
+            title = m.group('title').strip()
+            continue
+        m = HEADING_RE.match(text) if len(text.split()) <= 8 or ':' in text else None
+        if m:
+            current = next(name for name in SECTION_HEADINGS if m.group(name))
+            if m.group('inline'):
+                sections[current].append(m.group('inline').strip())
+            continue
+        if current is None:
+            # Before the first heading: the first short line is the title, the rest is summary
+            if title is None and len(text.split()) <= 12:
+                title = text
+            else:
+                sections['position_summary'].append(text)
+            continue
+        sections[current].append(text)
+
+    record = {'job_title': title or fallback_title}
+    for name, parts in sections.items():
+        record[name] = '\n'.join(parts) if parts else None
+    return record
+
+
+def _parse_task(path: str, known_hash: str | None):
+    """(sha256, record or None if the hash is unchanged, error or None) for one file."""
+    digest = None
+    try:
+        data = Path(path).read_bytes()        # deleted or unreadable since the scan: an error too
+        digest = hashlib.sha256(data).hexdigest()
+        if digest == known_hash:
+            return digest, None, None
+        suffix = Path(path).suffix.lower()
+        paragraphs = docx_paragraphs(data) if suffix == '.docx' else pdf_paragraphs(data)
+        return digest, split_sections(paragraphs, fallback_title=Path(path).stem), None
+    except Exception as e:                 # one bad file must not stop the batch
+        return digest, None, f"{type(e).__name__}: {e}"
+
+# ── Manifest ──────────────────────────────────────────────────────────────────
+
+def load_manifest(path=MANIFEST_FILE) -> dict:
+    if not Path(path).exists():
+        return {}
+    with open(path) as f:
+        manifest = json.load(f)
+    return manifest.get('files', {}) if manifest.get('version') == MANIFEST_VERSION else {}
+
+
+def save_manifest(files: dict, root, path=MANIFEST_FILE) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(str(path) + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump({'version': MANIFEST_VERSION, 'root': str(root), 'files': files}, f)
+    os.replace(tmp, path)
+
+
+def scan_documents(root: Path) -> list[Path]:
+    """Every .docx / .pdf below root (Word lock files skipped), in a stable order."""
+    paths = [p for p in root.rglob('*') if p.is_file() and p.suffix.lower() in DOCUMENT_SUFFIXES
+             and not p.name.startswith('~$')]
+    skipped = sum(1 for p in root.rglob('*.doc') if p.is_file())
+    if skipped:
+        print(f"  ⚠️  {skipped} legacy .doc files skipped (convert them to .docx)")
+    return sorted(paths, key=lambda p: p.relative_to(root).as_posix().lower())
+
+
+def dataset_filename(root: Path, path: Path) -> str:
+    """Path as the flattened CSV records it: `<root name>\\<dept>\\...\\file.docx`."""
+    return '\\'.join((root.name, *path.relative_to(root).parts))
+
+# ── Ingestion ─────────────────────────────────────────────────────────────────
+
+def ingest_folder(root, manifest_path=MANIFEST_FILE, workers: int | None = None,
+                  force: bool = False) -> pd.DataFrame:
+    """Extract every document below root, re-parsing only new or changed files."""
+    root = Path(root).resolve()
+    if not root.is_dir():
+        raise FileNotFoundError(f"Document folder not found: {root}")
+    print(f"Scanning {root}...")
+    previous = {} if force else load_manifest(manifest_path)
+    files, todo = {}, []
+    for path in scan_documents(root):
+        key = path.relative_to(root).as_posix()
+        stat = path.stat()
+        entry = previous.get(key)
+        if entry and entry.get('error'):
+            todo.append((key, path, stat, None))      # failed last time (e.g. pypdf missing): retry
+        elif entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            files[key] = entry
+        else:
+            todo.append((key, path, stat, entry))
+    removed = len(set(previous) - {key for key, *_ in todo} - set(files))
+    retried = sum(1 for key, *_ in todo if previous.get(key, {}).get('error'))
+    print(f"  {len(files) + len(todo)} documents: {len(files)} unchanged, {len(todo) - retried} new or "
+          f"modified, {retried} previously failed, {removed} removed")
+
+    if todo:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_parse_task, [str(path) for _, path, _, _ in todo],
+                               [entry['sha256'] if entry else None for *_, entry in todo],
+                               chunksize=max(1, len(todo) // (4 * workers)))
+            reparsed = 0
+            for (key, path, stat, entry), (digest, record, error) in zip(todo, results):
+                if record is None and error is None:
+                    record, error = entry.get('record'), entry.get('error')   # touched, same content
+                else:
+                    reparsed += 1
+                files[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest,
+                              'record': record, 'error': error}
+        print(f"  Parsed {reparsed} documents ({len(todo) - reparsed} had unchanged content)")
+    save_manifest(files, root, manifest_path)
+
+    failed = {key: e['error'] for key, e in files.items() if e.get('error')}
+    for key, error in list(failed.items())[:5]:
+        print(f"  ⚠️  {key}: {error}")
+    if len(failed) > 5:
+        print(f"  ⚠️  ... and {len(failed) - 5} more unreadable documents (see {manifest_path})")
+
+    rows = [{'filename': dataset_filename(root, root / key), **entry['record']}
+            for key, entry in sorted(files.items()) if entry.get('record')]
+    df = pd.DataFrame(rows, columns=gbd.RAW_TEXT_COLUMNS)
+    print(f"Ingested {len(df)} rows from {root.name}")
+    return df
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract JD sections from a .docx/.pdf folder.")
+    parser.add_argument('root', help="Document folder (e.g. 'Full JDs')")
+    parser.add_argument('--output', default='ingested_jds.csv', help="CSV with the load_data columns")
+    parser.add_argument('--manifest', default=str(MANIFEST_FILE), help="Incremental manifest path")
+    parser.add_argument('--workers', type=int, help="Parser processes (default: all cores)")
+    parser.add_argument('--force', action='store_true', help="Ignore the manifest and re-parse everything")
+    args = parser.parse_args(argv)
+
+    df = ingest_folder(args.root, manifest_path=args.manifest, workers=args.workers, force=args.force)
+    df.to_csv(args.output, index=False)
+    print(f"✅ Exported: {args.output} ({len(df)} rows)")
+
+
+if __name__ == '__main__':
+    main()
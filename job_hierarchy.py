@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Scalable hierarchical job taxonomy.
+
+Full Ward linkage (`scipy.cluster.hierarchy.linkage(X, 'ward')`) needs the
+O(N²) pairwise distance matrix and stops working past a few tens of
+thousands of postings. This module builds the same kind of dendrogram in
+two stages instead:
+
+  1. Compress the corpus into micro-clusters (KMeans or BIRCH).
+  2. Run size-weighted Ward over the micro-cluster centroids, so every
+     merge cost is exactly the Ward cost of merging the underlying jobs.
+
+Every job is mapped back to its leaf (micro-cluster), and the tree is
+exported as JSON so any cut level can be read out later without
+recomputing embeddings or linkage.
+
+Usage:
+    from job_hierarchy import build_hierarchy, save_tree, load_tree, cut_tree
+
+    tree = build_hierarchy(embeddings, n_micro=500, method='kmeans')
+    save_tree(tree, 'job_taxonomy_tree.json')
+    labels = cut_tree(load_tree('job_taxonomy_tree.json'), n_clusters=12)
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+TREE_VERSION = 1
+
+# ── Micro-clusters ────────────────────────────────────────────────────────────
+
+def default_n_micro(n_jobs: int) -> int:
+    """Number of leaves to use for a corpus of n_jobs (≈10·√N, capped at 2000)."""
+    return int(min(n_jobs, max(50, min(2000, round(10 * np.sqrt(n_jobs))))))
+
+
+def build_micro_clusters(X: np.ndarray, n_micro: int | None = None,
+                         method: str = 'kmeans', random_state: int = 42,
+                         birch_threshold: float = 0.5):
+    """Compress X into micro-clusters.
+
+    Returns (job_leaf, centroids, sizes) where job_leaf[i] is the leaf id of
+    row i, centroids is (n_leaves, d) and sizes is (n_leaves,). Empty leaves
+    are dropped and the remaining ids are renumbered densely.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    n = len(X)
+    if n_micro is None:
+        n_micro = default_n_micro(n)
+    n_micro = min(n_micro, n)
+
+    if method == 'kmeans':
+        from sklearn.cluster import KMeans, MiniBatchKMeans
+        if n > 20_000:
+            model = MiniBatchKMeans(n_clusters=n_micro, random_state=random_state,
+                                    batch_size=4096, n_init=3)
+        else:
+            model = KMeans(n_clusters=n_micro, random_state=random_state, n_init=1)
+        job_leaf = model.fit_predict(X)
+    elif method == 'birch':
+        from sklearn.cluster import Birch
+        # The CF-tree subclusters are merged (agglomeratively) down to n_micro leaves,
+        # so both methods hand the same number of leaves to the Ward step
+        model = Birch(n_clusters=n_micro, threshold=birch_threshold)
+        job_leaf = model.fit_predict(X)
+    else:
+        raise ValueError(f"Unknown micro-cluster method: {method!r} (use 'kmeans' or 'birch')")
+
+    # Recompute exact centroids from the assignment and drop empty leaves
+    used, job_leaf = np.unique(job_leaf, return_inverse=True)
+    sizes = np.bincount(job_leaf, minlength=len(used)).astype(np.int64)
+    centroids = np.zeros((len(used), X.shape[1]), dtype=np.float64)
+    np.add.at(centroids, job_leaf, X)
+    centroids /= sizes[:, None]
+    return job_leaf.astype(np.int64), centroids, sizes
+
+# ── Weighted Ward ─────────────────────────────────────────────────────────────
+
+def weighted_ward(centroids: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """Ward linkage over weighted centroids using the nearest-neighbour chain.
+
+    The distance between clusters A and B is scipy's Ward distance
+    sqrt(2·nA·nB/(nA+nB))·‖cA − cB‖, so with unit sizes the result matches
+    `linkage(X, 'ward')`. Runs in O(m²·d) time and O(m·d) memory for m
+    leaves. Returns a scipy-compatible (m-1, 4) linkage matrix whose count
+    column is the number of leaves (job counts are in `tree_nodes`).
+    """
+    C = np.array(centroids, dtype=np.float64, copy=True)
+    w = np.asarray(sizes, dtype=np.float64).copy()
+    m = len(C)
+    if m < 2:
+        return np.zeros((0, 4))
+
+    leaves = np.ones(m, dtype=np.int64)
+    active = np.ones(m, dtype=bool)
+    merges = []
+    chain: list[int] = []
+
+    def ward_to_all(i):
+        d2 = ((C - C[i]) ** 2).sum(axis=1)
+        d = np.sqrt(2.0 * w[i] * w / (w[i] + w) * d2)
+        d[~active] = np.inf
+        d[i] = np.inf
+        return d
+
+    remaining = m
+    while remaining > 1:
+        if not chain:
+            chain.append(int(np.flatnonzero(active)[0]))
+        while True:
+            a = chain[-1]
+            d = ward_to_all(a)
+            b = int(np.argmin(d))
+            # Prefer the previous chain element on ties so the chain terminates
+            if len(chain) > 1 and d[chain[-2]] <= d[b]:
+                b = chain[-2]
+            if len(chain) > 1 and b == chain[-2]:
+                break
+            chain.append(b)
+        b = chain.pop()
+        a = chain.pop()
+        dist = float(ward_to_all(a)[b])
+
+        # Merge b into a (a's slot now holds the merged cluster)
+        wa, wb = w[a], w[b]
+        C[a] = (wa * C[a] + wb * C[b]) / (wa + wb)
+        w[a] = wa + wb
+        leaves[a] += leaves[b]
+        active[b] = False
+        merges.append((a, b, dist, leaves[a]))
+        remaining -= 1
+
+    return _merges_to_linkage(merges, m)
+
+
+def _merges_to_linkage(merges, m: int) -> np.ndarray:
+    """Sort NN-chain merges by height and relabel them in scipy's convention."""
+    merges = sorted(merges, key=lambda t: t[2])
+    parent = list(range(m))
+    node_of = list(range(m))  # root slot → current scipy node id
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    Z = np.zeros((m - 1, 4))
+    for k, (a, b, dist, count) in enumerate(merges):
+        ra, rb = find(a), find(b)
+        na, nb = node_of[ra], node_of[rb]
+        Z[k] = (min(na, nb), max(na, nb), dist, count)
+        parent[rb] = ra
+        node_of[ra] = m + k
+    return Z
+
+# ── Build / export ────────────────────────────────────────────────────────────
+
+def build_hierarchy(X: np.ndarray, n_micro: int | None = None, method: str = 'kmeans',
+                    random_state: int = 42, birch_threshold: float = 0.5) -> dict:
+    """Micro-cluster X and build the weighted Ward tree over the leaves."""
+    job_leaf, centroids, sizes = build_micro_clusters(
+        X, n_micro=n_micro, method=method,
+        random_state=random_state, birch_threshold=birch_threshold,
+    )
+    Z = weighted_ward(centroids, sizes)
+    return {
+        'version':    TREE_VERSION,
+        'method':     method,
+        'n_jobs':     int(len(job_leaf)),
+        'n_leaves':   int(len(sizes)),
+        'job_leaf':   job_leaf,
+        'leaf_sizes': sizes,
+        'linkage':    Z,
+    }
+
+
+def tree_nodes(tree: dict) -> list[dict]:
+    """Explicit node list (leaves first, then internal merges) for the JSON export."""
+    m = tree['n_leaves']
+    sizes = [int(s) for s in tree['leaf_sizes']]
+    nodes = [{'id': i, 'height': 0.0, 'size': sizes[i]} for i in range(m)]
+    for k, (a, b, dist, _) in enumerate(np.asarray(tree['linkage'])):
+        sizes.append(sizes[int(a)] + sizes[int(b)])
+        nodes.append({
+            'id':       m + k,
+            'children': [int(a), int(b)],
+            'height':   round(float(dist), 6),
+            'size':     sizes[-1],
+        })
+    return nodes
+
+
+def save_tree(tree: dict, path) -> None:
+    """Write the tree as JSON (job→leaf map, leaf sizes, linkage and node list)."""
+    payload = {
+        'version':    tree['version'],
+        'method':     tree['method'],
+        'n_jobs':     tree['n_jobs'],
+        'n_leaves':   tree['n_leaves'],
+        'job_leaf':   np.asarray(tree['job_leaf']).tolist(),
+        'leaf_sizes': np.asarray(tree['leaf_sizes']).tolist(),
+        'linkage':    np.asarray(tree['linkage']).round(6).tolist(),
+        'nodes':      tree_nodes(tree),
+    }
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(payload, f)
+
+
+def load_tree(path) -> dict:
+    with open(path) as f:
+        payload = json.load(f)
+    payload['job_leaf'] = np.asarray(payload['job_leaf'], dtype=np.int64)
+    payload['leaf_sizes'] = np.asarray(payload['leaf_sizes'], dtype=np.int64)
+    payload['linkage'] = np.asarray(payload['linkage'], dtype=np.float64).reshape(-1, 4)
+    return payload
+
+
+def cut_tree(tree: dict, n_clusters: int | None = None, height: float | None = None) -> np.ndarray:
+    """Per-job cluster ids (0-based) for a cut by cluster count or by height."""
+    from scipy.cluster.hierarchy import fcluster
+
+    if (n_clusters is None) == (height is None):
+        raise ValueError("Pass exactly one of n_clusters or height")
+
+    Z = np.asarray(tree['linkage'])
+    if tree['n_leaves'] < 2:
+        leaf_labels = np.zeros(tree['n_leaves'], dtype=np.int64)
+    elif n_clusters is not None:
+        leaf_labels = fcluster(Z, t=n_clusters, criterion='maxclust') - 1
+    else:
+        leaf_labels = fcluster(Z, t=height, criterion='distance') - 1
+    return leaf_labels[np.asarray(tree['job_leaf'])]
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Neighbour-preserving 2D/3D layout for the constellation map.
+
+PCA keeps the two directions of largest variance, which collapses most
+cluster structure; UMAP preserves neighbourhoods but takes hours at 100k+
+jobs. This engine lays points out in near-linear time from the sparse kNN
+graph:
+
+  1. Landmark MDS: classical MDS on m landmarks, every other point
+     triangulated from its distances to the landmarks — O(N·m).
+  2. Force-directed refinement: attraction along kNN edges (one sparse
+     product) and Barnes-Hut style repulsion, where each point is pushed by
+     the centres of mass of a uniform grid of cells instead of by every
+     other point — O(edges + N·cells) per iteration.
+
+A layout can be seeded from the previous run (known points start where they
+were and only drift under a low temperature), and new points can be placed
+incrementally at the similarity-weighted mean of their nearest neighbours
+without moving anything else.
+
+Usage:
+    from layout import compute_layout, place_points, save_layout, load_layout
+
+    Y = compute_layout(X, G, dim=3)                       # G: sparse kNN graph
+    Y = compute_layout(X, G, init=Y_prev, init_mask=known)
+    Y_new = place_points(X_new, X, Y)
+"""
+
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from knn_graph import blocked_top_k, normalize_rows
+
+LAYOUT_VERSION = 1
+SCALE_MIN, SCALE_MAX = -50.0, 50.0
+
+# ── Landmark MDS ──────────────────────────────────────────────────────────────
+
+def default_n_landmarks(n: int) -> int:
+    return int(min(n, max(50, min(1000, 10 * np.sqrt(n)))))
+
+
+def landmark_mds(X, dim: int = 2, n_landmarks: int | None = None, block_size: int = 8192,
+                 random_state: int = 42) -> np.ndarray:
+    """Landmark MDS (de Silva & Tenenbaum) on cosine geometry.
+
+    Distances are Euclidean between L2-normalized rows, so d² = 2 - 2·cos.
+    """
+    X = normalize_rows(X)
+    n = len(X)
+    m = min(n, n_landmarks or default_n_landmarks(n))
+    rng = np.random.default_rng(random_state)
+    L = X[np.sort(rng.choice(n, m, replace=False))]
+
+    D2 = np.maximum(2.0 - 2.0 * (L @ L.T), 0.0).astype(np.float64)
+    J = np.eye(m) - 1.0 / m
+    B = -0.5 * J @ D2 @ J
+    eigvals, eigvecs = np.linalg.eigh(B)
+    top = np.argsort(eigvals)[::-1][:dim]
+    lam = np.maximum(eigvals[top], 1e-12)
+    pinv = eigvecs[:, top] / np.sqrt(lam)                  # m × dim
+    mean_d2 = D2.mean(axis=0)
+
+    Y = np.empty((n, dim), dtype=np.float64)
+    for start in range(0, n, block_size):
+        Xb = X[start:start + block_size]
+        d2 = np.maximum(2.0 - 2.0 * (Xb @ L.T), 0.0)
+        Y[start:start + block_size] = -0.5 * (d2 - mean_d2) @ pinv
+    return Y
+
+# ── Force-directed refinement ─────────────────────────────────────────────────
+
+def grid_repulsion(Y: np.ndarray, cells_per_axis: int, block_size: int = 512) -> np.ndarray:
+    """Far-field repulsion from a uniform grid of cells, Barnes-Hut style.
+
+    Every occupied cell acts as a single mass at its centre of mass. Forces
+    are evaluated cell-to-cell (O(cells²), independent of N) and handed to
+    the cell's points, plus a term pushing each point away from its own
+    cell's centre. Softening by the cell diagonal keeps adjacent cells
+    bounded. Returns Σ_c m_c·(y - c)/(|y - c|² + s) / N per point.
+    """
+    n, dim = Y.shape
+    lo = Y.min(axis=0)
+    size = np.maximum((Y.max(axis=0) - lo) / cells_per_axis, 1e-9)
+    cell = np.minimum(((Y - lo) / size).astype(np.int64), cells_per_axis - 1)
+    flat = np.ravel_multi_index(cell.T, (cells_per_axis,) * dim)
+
+    occupied, member = np.unique(flat, return_inverse=True)
+    mass = np.bincount(member).astype(np.float64)
+    centres = np.stack([np.bincount(member, weights=Y[:, d]) for d in range(dim)], axis=1)
+    centres /= mass[:, None]
+    soft = float((size ** 2).sum())
+
+    cell_force = np.empty_like(centres)
+    for start in range(0, len(centres), block_size):
+        diff = centres[start:start + block_size, None, :] - centres[None, :, :]
+        inv = mass / ((diff ** 2).sum(axis=2) + soft)
+        cell_force[start:start + block_size] = np.einsum('bc,bcd->bd', inv, diff)
+
+    own = Y - centres[member]
+    own *= (mass[member] / ((own ** 2).sum(axis=1) + soft))[:, None]
+    return (cell_force[member] + own) / n
+
+
+def edge_repulsion(Y: np.ndarray, rows: np.ndarray, cols: np.ndarray, spacing: float) -> np.ndarray:
+    """Exact near-field repulsion between graph neighbours: Σ_j spacing²·(y_i - y_j)/|y_i - y_j|².
+
+    The grid far field is too coarse to keep a cluster from collapsing onto
+    its centre of mass; this short-range term gives linked points a preferred
+    distance of about `spacing`, so local structure survives refinement.
+    """
+    diff = Y[rows] - Y[cols]
+    inv = spacing ** 2 / np.maximum((diff ** 2).sum(axis=1), 1e-12)
+    return np.stack([np.bincount(rows, weights=inv * diff[:, d], minlength=len(Y))
+                     for d in range(Y.shape[1])], axis=1)
+
+
+def refine_layout(Y, G, n_iter: int = 150, repulsion: float = 0.1, start_temperature: float = 4.0,
+                  end_temperature: float = 0.05, cells_per_axis: int | None = None,
+                  fixed=None, block_size: int = 512) -> np.ndarray:
+    """Force-directed refinement in the [-50, 50] frame.
+
+    Each step moves every point by the mean offset to its graph neighbours
+    (attraction) plus the near-field edge repulsion and far-field grid
+    repulsion, with the displacement capped by a temperature that cools
+    geometrically. Rows where `fixed` is True do not move (used for
+    incremental placement).
+    """
+    Y = np.array(Y, dtype=np.float64)
+    n, dim = Y.shape
+    G = sparse.csr_matrix(G, dtype=np.float64)
+    deg = np.asarray(G.sum(axis=1)).ravel()
+    linked = (deg > 0)[:, None]
+    inv_deg = np.where(deg > 0, 1.0 / np.maximum(deg, 1e-12), 0.0)[:, None]
+    coo = G.tocoo()
+    inv_count = 1.0 / np.maximum(np.bincount(coo.row, minlength=n), 1)[:, None]
+    cells = cells_per_axis or (64 if dim == 2 else 16)
+    movable = np.ones(n, dtype=bool) if fixed is None else ~np.asarray(fixed, dtype=bool)
+    # Far field spreads the layout over the frame; near field spaces neighbours
+    # as if the N points tiled the frame evenly
+    frame = SCALE_MAX - SCALE_MIN
+    k_far = repulsion * (frame / 4.0) ** 2
+    spacing = frame / max(n, 1) ** (1.0 / dim)
+
+    cooling = (end_temperature / start_temperature) ** (1.0 / max(n_iter - 1, 1))
+    temperature = start_temperature
+    for _ in range(n_iter):
+        force = (G @ Y) * inv_deg - Y * linked
+        force += edge_repulsion(Y, coo.row, coo.col, spacing) * inv_count
+        force += k_far * grid_repulsion(Y, cells, block_size=block_size)
+        step = np.linalg.norm(force, axis=1, keepdims=True)
+        force *= np.minimum(1.0, temperature / np.maximum(step, 1e-12))
+        Y[movable] += force[movable]
+        temperature *= cooling
+    return Y
+
+
+def to_frame(Y: np.ndarray) -> np.ndarray:
+    """Centre and uniformly scale into the [-50, 50] map frame (aspect ratio kept)."""
+    Y = Y - (Y.max(axis=0) + Y.min(axis=0)) / 2.0
+    half = np.abs(Y).max()
+    return Y * ((SCALE_MAX - SCALE_MIN) / 2.0 / half) if half > 0 else Y
+
+
+def anchor_to(Y: np.ndarray, target: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Least-squares scale + shift mapping Y[mask] onto target[mask].
+
+    Refinement slowly expands or contracts the layout; anchoring keeps a
+    seeded run in the previous run's frame so unchanged jobs barely move.
+    """
+    mu_y, mu_t = Y[mask].mean(axis=0), target[mask].mean(axis=0)
+    dy = Y[mask] - mu_y
+    denom = float((dy ** 2).sum())
+    scale = float((dy * (target[mask] - mu_t)).sum()) / denom if denom > 0 else 1.0
+    return (Y - mu_y) * scale + mu_t
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+def place_points(X_new, X_ref, Y_ref, k: int = 10, block_size: int = 2048) -> np.ndarray:
+    """Positions for new rows: similarity-weighted mean of their k nearest reference rows."""
+    idx, sims = blocked_top_k(X_new, k, Y=X_ref, exclude_self=False, block_size=block_size)
+    w = np.clip(sims, 0.0, None) + 1e-6
+    return (np.asarray(Y_ref)[idx] * w[:, :, None]).sum(axis=1) / w.sum(axis=1, keepdims=True)
+
+
+def compute_layout(X, G, dim: int = 2, init=None, init_mask=None, n_iter: int | None = None,
+                   n_landmarks: int | None = None, repulsion: float = 0.1,
+                   random_state: int = 42) -> np.ndarray:
+    """Neighbour-preserving layout in the [-50, 50] frame.
+
+    Cold start: landmark MDS, scaled into the frame, then a full refinement.
+    Seeded: rows with init_mask keep their previous positions as the start,
+    unseeded rows start at the weighted mean of their seeded neighbours, a
+    short low-temperature refinement settles them, and the result is anchored
+    back onto the previous frame.
+    """
+    X = np.asarray(X)
+    G = sparse.csr_matrix(G)
+    if init is None:
+        Y = to_frame(landmark_mds(X, dim=dim, n_landmarks=n_landmarks, random_state=random_state))
+        return to_frame(refine_layout(Y, G, n_iter=n_iter or 150, repulsion=repulsion))
+
+    init = np.asarray(init, dtype=np.float64)
+    mask = np.ones(len(X), dtype=bool) if init_mask is None else np.asarray(init_mask, dtype=bool)
+    if init.shape[1] < dim:                                   # 2D seed for a 3D layout
+        extra = landmark_mds(X, dim=dim, n_landmarks=n_landmarks, random_state=random_state)
+        init = np.hstack([init, to_frame(extra)[:, init.shape[1]:dim] * 0.5])
+    Y = np.zeros((len(X), dim), dtype=np.float64)
+    Y[mask] = init[mask, :dim]
+    if (~mask).any():
+        Y[~mask] = place_points(X[~mask], X[mask], Y[mask])
+    seeded = Y.copy()
+    Y = refine_layout(Y, G, n_iter=n_iter or 40, repulsion=repulsion,
+                      start_temperature=0.5, end_temperature=0.02)
+    return anchor_to(Y, seeded, mask)
+
+
+def save_layout(path, keys, Y) -> None:
+    """Persist positions keyed by a stable per-posting key (e.g. a text hash)."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, version=LAYOUT_VERSION, keys=np.asarray(keys, dtype=str),
+                        positions=np.asarray(Y, dtype=np.float32))
+
+
+def load_layout(path):
+    """(keys, positions) from save_layout, or (None, None) if missing or incompatible."""
+    if not Path(path).exists():
+        return None, None
+    with np.load(path) as data:
+        if int(data['version']) != LAYOUT_VERSION:
+            return None, None
+        return data['keys'].tolist(), data['positions'].astype(np.float64)
+
+
+def seed_from_previous(keys, prev_keys, prev_Y, dim: int):
+    """Align a previous layout to the current rows: (init, init_mask), or (None, None)."""
+    if prev_keys is None:
+        return None, None
+    pos = {k: i for i, k in enumerate(prev_keys)}
+    rows = np.array([pos.get(k, -1) for k in keys])
+    mask = rows >= 0
+    if not mask.any():
+        return None, None
+    init = np.zeros((len(keys), prev_Y.shape[1]))
+    init[mask] = prev_Y[rows[mask]]
+    return init, mask
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Sparse lexical similarity over the job `text` field: TF-IDF, LSA and a
+hybrid scorer that blends it with embedding similarity.
+
+Needs no network and no embedding model, so it doubles as:
+  - an offline stand-in for the embeddings (LSA projection, dense and
+    L2-normalized like the Vertex vectors), and
+  - a pre-filter: lexical top-m candidates per job, so the dense stage only
+    scores N·m pairs instead of N².
+
+The vocabulary grows incrementally: `add()` tokenizes new documents,
+appends unseen terms as new columns and updates document frequencies, so
+IDF weights stay exact without refitting. Top-k search goes through the
+same `blocked_top_k` as the embeddings, with a sparse score function.
+
+Usage:
+    from lexical_similarity import LexicalIndex, lexical_top_k, hybrid_top_k
+
+    lex = LexicalIndex.fit(texts)
+    M = lex.matrix()                                   # N × V sparse, rows L2-normalized
+    idx, sims = lexical_top_k(M, k=10)
+    idx, sims = hybrid_top_k(M, X, k=10, alpha=0.7)    # X: dense embeddings
+    X_lsa = lex.fit_lsa(256)                           # offline dense vectors
+"""
+
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from knn_graph import blocked_top_k, normalize_rows
+
+LEXICAL_VERSION = 1
+
+# ── Sparse helpers ────────────────────────────────────────────────────────────
+
+def normalize_sparse_rows(M: sparse.spmatrix) -> sparse.csr_matrix:
+    M = sparse.csr_matrix(M, dtype=np.float32)
+    norms = np.sqrt(np.asarray(M.multiply(M).sum(axis=1)).ravel())
+    return sparse.diags(1.0 / np.maximum(norms, 1e-12)).dot(M).tocsr()
+
+
+def sparse_scores(A, B) -> np.ndarray:
+    """Dense block of A · Bᵀ for sparse rows (the blocked_top_k score_fn)."""
+    return (A @ B.T).toarray()
+
+# ── Index ─────────────────────────────────────────────────────────────────────
+
+class LexicalIndex:
+    """Vocabulary, document frequencies and (optionally) the corpus term counts."""
+
+    def __init__(self, terms=None, doc_freq=None, n_docs: int = 0, ngram_range=(1, 2),
+                 min_df: int = 2, components=None):
+        self.terms: list[str] = list(terms or [])
+        self.vocabulary = {t: i for i, t in enumerate(self.terms)}
+        self.doc_freq = np.asarray(doc_freq if doc_freq is not None else [], dtype=np.int64)
+        self.n_docs = int(n_docs)
+        self.ngram_range = tuple(ngram_range)
+        self.min_df = int(min_df)
+        self.components = components          # LSA basis (n_components × n_terms at fit time)
+        self.counts = None                    # CSR doc × term counts of the documents added
+        self._analyzer = None
+
+    @classmethod
+    def fit(cls, texts, ngram_range=(1, 2), min_df: int = 2) -> 'LexicalIndex':
+        index = cls(ngram_range=ngram_range, min_df=min_df)
+        index.add(texts)
+        return index
+
+    def analyzer(self):
+        if self._analyzer is None:
+            from sklearn.feature_extraction.text import CountVectorizer
+            self._analyzer = CountVectorizer(ngram_range=self.ngram_range,
+                                             stop_words='english').build_analyzer()
+        return self._analyzer
+
+    def _count(self, texts, grow: bool) -> sparse.csr_matrix:
+        analyze = self.analyzer()
+        indices, indptr = [], [0]
+        for text in texts:
+            for token in analyze('' if text is None or text != text else str(text)):
+                j = self.vocabulary.get(token)
+                if j is None:
+                    if not grow:
+                        continue
+                    j = self.vocabulary[token] = len(self.terms)
+                    self.terms.append(token)
+                indices.append(j)
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.float32)
+        C = sparse.csr_matrix((data, np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+                              shape=(len(indptr) - 1, len(self.terms)))
+        C.sum_duplicates()
+        return C
+
+    def add(self, texts) -> np.ndarray:
+        """Add documents (vocabulary grows). Returns their row indices in `counts`."""
+        C = self._count(texts, grow=True)
+        df = np.bincount(C.indices, minlength=len(self.terms))
+        self.doc_freq = np.concatenate([self.doc_freq, np.zeros(len(self.terms) - len(self.doc_freq),
+                                                                dtype=np.int64)]) + df
+        start = 0 if self.counts is None else self.counts.shape[0]
+        if self.counts is None:
+            self.counts = C
+        else:
+            old = self.counts
+            old.resize((old.shape[0], len(self.terms)))
+            self.counts = sparse.vstack([old, C]).tocsr()
+        self.n_docs += C.shape[0]
+        return np.arange(start, start + C.shape[0])
+
+    def idf(self) -> np.ndarray:
+        """Smoothed IDF (as scikit-learn); terms below min_df get weight 0."""
+        idf = np.log((1.0 + self.n_docs) / (1.0 + self.doc_freq)) + 1.0
+        return np.where(self.doc_freq >= self.min_df, idf, 0.0).astype(np.float32)
+
+    def weight(self, C: sparse.spmatrix) -> sparse.csr_matrix:
+        """Sublinear TF × IDF, rows L2-normalized."""
+        W = sparse.csr_matrix(C, dtype=np.float32, copy=True)
+        W.resize((W.shape[0], len(self.terms)))
+        W.data = 1.0 + np.log(W.data)
+        W = W @ sparse.diags(self.idf())
+        return normalize_sparse_rows(W)
+
+    def matrix(self) -> sparse.csr_matrix:
+        """TF-IDF matrix of every added document."""
+        return self.weight(self.counts)
+
+    def transform(self, texts) -> sparse.csr_matrix:
+        """TF-IDF rows for query texts; unseen terms are ignored and nothing is updated."""
+        return self.weight(self._count(texts, grow=False))
+
+    # ── LSA ───────────────────────────────────────────────────────────────────
+
+    def fit_lsa(self, n_components: int = 256, random_state: int = 42) -> np.ndarray:
+        """Truncated SVD of the corpus matrix. Returns the documents' dense, normalized vectors."""
+        from sklearn.decomposition import TruncatedSVD
+
+        M = self.matrix()
+        n_components = max(1, min(n_components, min(M.shape) - 1))
+        svd = TruncatedSVD(n_components=n_components, algorithm='randomized',
+                           random_state=random_state)
+        Z = svd.fit_transform(M)
+        self.components = svd.components_.astype(np.float32)
+        return normalize_rows(Z)
+
+    def project(self, M: sparse.spmatrix) -> np.ndarray:
+        """Dense LSA vectors for TF-IDF rows; terms added after fit_lsa do not contribute."""
+        if self.components is None:
+            raise RuntimeError("Call fit_lsa() before project()")
+        M = sparse.csr_matrix(M)[:, :self.components.shape[1]]
+        return normalize_rows(np.asarray(M @ self.components.T))
+
+    def embed(self, texts) -> np.ndarray:
+        """Offline embedding function (same signature as the JobPlacer embed_fn)."""
+        return self.project(self.transform(texts))
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+
+    def save(self, path) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path, version=LEXICAL_VERSION, terms=np.asarray(self.terms, dtype=str),
+            doc_freq=self.doc_freq, n_docs=self.n_docs, ngram_range=np.asarray(self.ngram_range),
+            min_df=self.min_df,
+            components=self.components if self.components is not None else np.zeros((0, 0)),
+        )
+
+    @classmethod
+    def load(cls, path) -> 'LexicalIndex':
+        with np.load(path) as data:
+            if int(data['version']) != LEXICAL_VERSION:
+                raise ValueError(f"{path}: unsupported lexical index version {int(data['version'])}")
+            components = data['components']
+            return cls(terms=data['terms'].tolist(), doc_freq=data['doc_freq'],
+                       n_docs=int(data['n_docs']), ngram_range=tuple(data['ngram_range'].tolist()),
+                       min_df=int(data['min_df']), components=components if components.size else None)
+
+# ── Search ────────────────────────────────────────────────────────────────────
+
+def lexical_top_k(M: sparse.spmatrix, k: int, Y=None, block_size: int = 2048):
+    """Top-k TF-IDF cosine neighbours via blocked_top_k with a sparse score function."""
+    M = sparse.csr_matrix(M)
+    return blocked_top_k(M, k, Y=None if Y is None else sparse.csr_matrix(Y),
+                         block_size=block_size, normalize=False, score_fn=sparse_scores)
+
+
+def hybrid_top_k(M: sparse.spmatrix, X: np.ndarray, k: int, alpha: float = 0.7,
+                 n_candidates: int = 50, block_size: int = 2048):
+    """Top-k by alpha·cos(embeddings) + (1 - alpha)·cos(TF-IDF).
+
+    The lexical stage picks n_candidates per job, and only those pairs are
+    scored with the embeddings (N·n_candidates dot products instead of N²).
+    Returns (indices, hybrid scores), best first, self excluded.
+    """
+    cand_idx, cand_lex = lexical_top_k(M, n_candidates, block_size=block_size)
+    Xn = normalize_rows(X)
+    n, m = cand_idx.shape
+    k = min(k, m)
+    indices = np.zeros((n, k), dtype=np.int64)
+    scores = np.zeros((n, k), dtype=np.float32)
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+        ci = cand_idx[start:end]
+        dense = np.einsum('bd,bmd->bm', Xn[start:end], Xn[ci])
+        hybrid = alpha * dense + (1.0 - alpha) * cand_lex[start:end]
+        order = np.argsort(-hybrid, axis=1, kind='stable')[:, :k]
+        indices[start:end] = np.take_along_axis(ci, order, axis=1)
+        scores[start:end] = np.take_along_axis(hybrid, order, axis=1)
+    return indices, scores
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the data pipeline.
+
+Each subcommand imports its heavy dependencies (pandas, scikit-learn,
+vertexai, sentence-transformers, matplotlib) only when it runs, so quick
+tasks such as regenerating stats_data.json start in a fraction of a second.
+Time spent importing is reported for every subcommand.
+
+Usage:
+    python pipeline.py stats                       # stats_data.json from constellation_data.json
+    python pipeline.py ingest "Full JDs" --output jds.csv   # .docx/.pdf folder → dataset columns
+    python pipeline.py clean --input raw.csv --output refined.csv
+    python pipeline.py departments
+    python pipeline.py embed                       # embeddings only (cache + journal)
+    python pipeline.py embed --docs "Full JDs"     # ...of postings read from the document folder
+    python pipeline.py cluster --warm-start        # generate_backend_data.py and its flags
+    python pipeline.py export-constellation
+    python pipeline.py rag-index                   # chunks + embeddings + BM25 for backend-ts
+    python pipeline.py subcluster 7 --k 4          # drill into one cluster (subcluster.py)
+    python pipeline.py analyze                     # comprehensive_job_analysis.py
+"""
+
+import sys
+import time
+import runpy
+import argparse
+import builtins
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.resolve()
+CONSTELLATION_DIR = REPO_ROOT / 'career-constellation'
+
+
+class ImportTimer:
+    """Accumulates wall time spent in outermost import statements while active."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self._depth = 0
+        self._original = builtins.__import__
+
+    def _import(self, *args, **kwargs):
+        if self._depth:
+            return self._original(*args, **kwargs)
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            return self._original(*args, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self._depth -= 1
+
+    def __enter__(self):
+        builtins.__import__ = self._import
+        return self
+
+    def __exit__(self, *exc):
+        builtins.__import__ = self._original
+        return False
+
+
+def load(name, path=REPO_ROOT):
+    """Import one of the pipeline modules (goes through the import timer)."""
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+    __import__(name)
+    return sys.modules[name]
+
+# ── Subcommands ───────────────────────────────────────────────────────────────
+
+def cmd_ingest(args, extra):
+    load('ingest_documents').main(extra)
+
+
+def cmd_clean(args, extra):
+    kwargs = {k: v for k, v in (('input_file', args.input), ('output_file', args.output)) if v}
+    load('clean_dataset').main(**kwargs)
+
+
+def cmd_departments(args, extra):
+    kwargs = {k: v for k, v in (('input_file', args.input), ('output_file', args.output)) if v}
+    load('extract_departments_final').main(**kwargs)
+
+
+def cmd_embed(args, extra):
+    gbd = load('generate_backend_data')
+    df = load('ingest_documents').ingest_folder(args.docs, workers=args.workers) if args.docs else None
+    df, X = gbd.embed_corpus(low_memory=args.low_memory, df=df)
+    print(f"✅ {len(df)} jobs embedded: {X.shape}")
+
+
+def cmd_cluster(args, extra):
+    load('generate_backend_data').main(extra)
+
+
+def cmd_export_constellation(args, extra):
+    load('generate_constellation_data', CONSTELLATION_DIR).main()
+
+
+def cmd_rag_index(args, extra):
+    load('build_rag_index', CONSTELLATION_DIR).main(['--no-embeddings'] if args.no_embeddings else [])
+
+
+def cmd_subcluster(args, extra):
+    load('subcluster').main(extra)
+
+
+def cmd_stats(args, extra):
+    load('constellation_stats', CONSTELLATION_DIR).main()
+
+
+def cmd_analyze(args, extra):
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    runpy.run_path(str(REPO_ROOT / 'comprehensive_job_analysis.py'), run_name='__main__')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Job-architecture data pipeline.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('ingest', help="Extract postings from a .docx/.pdf folder (ingest_documents.py); "
+                                      "remaining arguments are passed through")
+    p.set_defaults(func=cmd_ingest, passthrough=True)
+
+    p = sub.add_parser('clean', help="Unified job titles and internal-posting flags (clean_dataset.py)")
+    p.add_argument('--input', help="Raw dataset CSV")
+    p.add_argument('--output', help="Refined dataset CSV")
+    p.set_defaults(func=cmd_clean)
+
+    p = sub.add_parser('departments', help="Departments from file paths (extract_departments_final.py)")
+    p.add_argument('--input', help="Dataset CSV")
+    p.add_argument('--output', help="CSV with a department column")
+    p.set_defaults(func=cmd_departments)
+
+    p = sub.add_parser('embed', help="Embed the dataset into the cache without clustering")
+    p.add_argument('--low-memory', action='store_true', help="Compact dtypes while embedding")
+    p.add_argument('--docs', help="Ingest .docx/.pdf postings from this folder instead of the dataset CSV "
+                                  "(as generate_backend_data.py --docs)")
+    p.add_argument('--workers', type=int, help="Parser processes for --docs (default: all cores)")
+    p.set_defaults(func=cmd_embed)
+
+    p = sub.add_parser('cluster', help="Full backend run (generate_backend_data.py); "
+                                       "remaining flags are passed through")
+    p.set_defaults(func=cmd_cluster, passthrough=True)
+
+    p = sub.add_parser('export-constellation', help="Constellation JSON, delta and stats export")
+    p.set_defaults(func=cmd_export_constellation)
+
+    p = sub.add_parser('rag-index', help="Build the RAG index artifact loaded by backend-ts")
+    p.add_argument('--no-embeddings', action='store_true', help="Write a lexical-only index")
+    p.set_defaults(func=cmd_rag_index)
+
+    p = sub.add_parser('subcluster', help="Split one cluster into sub-clusters (subcluster.py); "
+                                          "remaining arguments are passed through")
+    p.set_defaults(func=cmd_subcluster, passthrough=True)
+
+    p = sub.add_parser('stats', help="Regenerate stats_data.json from constellation_data.json")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser('analyze', help="Taxonomy and standardization analysis "
+                                       "(comprehensive_job_analysis.py)")
+    p.set_defaults(func=cmd_analyze)
+
+    args, extra = parser.parse_known_args(argv)
+    if extra and not getattr(args, 'passthrough', False):
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    return args, extra
+
+
+def main(argv=None):
+    start = time.perf_counter()
+    args, extra = parse_args(argv)
+    with ImportTimer() as imports:
+        args.func(args, extra)
+    total = time.perf_counter() - start
+    print(f"[pipeline] {args.command}: {total:.2f}s total, {imports.seconds:.2f}s in imports",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Place new job descriptions on the existing constellation without rerunning
+the pipeline.
+
+Loads the artifacts written by generate_backend_data.py once (KMeans
+centroids, cluster labels, projection model or force layout, normalized
+embeddings and job index, skill lexicon and the embedding model) and then
+answers placement queries for one or many JD texts. After warm-up, latency
+per document is dominated by the embedding call.
+
+Prerequisites:
+    python generate_backend_data.py   # writes artifacts/
+
+Usage (CLI):
+    python place_job.py draft.txt other_draft.txt --top-k 5
+    cat draft.txt | python place_job.py -
+    python place_job.py --csv drafts.csv --output placements.json
+
+    The CSV must have the raw posting columns used by load_data
+    (filename, job_title, position_summary, responsibilities, qualifications).
+
+Usage (API):
+    from place_job import JobPlacer
+
+    placer = JobPlacer.load()
+    result = placer.place("Senior Process Engineer ... responsibilities ...")
+    results = placer.place_many([jd_1, jd_2], top_k=5)
+"""
+
+import sys
+import json
+import time
+import argparse
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import generate_backend_data as gbd
+from layout import load_layout, place_points
+from projection import ProjectionModel
+from reduction import Reducer
+from skill_bitsets import encode_skills, load_skill_bits, pair_skill_scores
+
+# Same budget as build_text: filename + title + 1200 + 3000 + 1500 chars
+MAX_TEXT_CHARS = 6000
+# Neighbours averaged to position a JD on a force layout
+LAYOUT_NEIGHBOURS = 10
+
+
+class JobPlacer:
+    """Holds every placement artifact in memory; create once, query many times."""
+
+    def __init__(self, centroids, cluster_labels, projection, embeddings, job_index,
+                 skill_lexicon=None, embed_fn=None, layout=None, reducer=None, skill_bits=None,
+                 skill_vocabulary=None):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.cluster_labels = {int(k): v for k, v in cluster_labels.items()}
+        self.projection = projection
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+        # Force-layout positions aligned with the embedding rows, if that layout was used
+        self.layout = None if layout is None else np.asarray(layout, dtype=np.float64)
+        # Same reduction the pipeline applied before clustering (--reduce), if any
+        self.reducer = reducer
+        self.job_index = job_index
+        self.skill_patterns = [
+            (name, [re.compile(p, re.IGNORECASE) for p in patterns])
+            for name, patterns in (skill_lexicon or gbd.SKILL_LEXICON).items()
+        ]
+        # Corpus skills as bitsets (artifacts/skill_bits.npz): similar jobs get a skill_jaccard
+        self.skill_bits = skill_bits
+        self.skill_vocabulary = skill_vocabulary
+        self._embed_fn = embed_fn
+        self._model = None
+
+    @classmethod
+    def load(cls, artifacts_dir=None, embed_fn=None) -> 'JobPlacer':
+        """Load artifacts from artifacts_dir (default: generate_backend_data.ARTIFACTS_DIR).
+
+        embed_fn(texts) -> (n, d) array overrides the Vertex AI embedding model. When the
+        pipeline ran with --embeddings lexical, the persisted TF-IDF + LSA index is used.
+        """
+        base = Path(artifacts_dir) if artifacts_dir else gbd.ARTIFACTS_DIR
+        paths = {
+            'centroids':  base / gbd.CENTROIDS_FILE.name,
+            'labels':     base / gbd.CLUSTER_LABELS_FILE.name,
+            'projection': base / gbd.PROJECTION_FILE.name,
+            'embeddings': base / gbd.EMBEDDINGS_FILE.name,
+            'job_index':  base / gbd.JOB_INDEX_FILE.name,
+        }
+        _, layout = load_layout(base / gbd.LAYOUT_FILE.name)
+        if layout is not None:
+            paths.pop('projection')          # the force layout replaces the projection
+        missing = [str(p) for p in paths.values() if not p.exists()]
+        if missing:
+            raise FileNotFoundError(
+                "Missing placement artifacts (run generate_backend_data.py first): "
+                + ", ".join(missing)
+            )
+
+        with open(paths['labels']) as f:
+            cluster_labels = json.load(f)
+        with open(paths['job_index']) as f:
+            job_index = json.load(f)
+
+        embeddings = np.load(paths['embeddings'])
+        lexical_path = base / gbd.LEXICAL_INDEX_FILE.name
+        if embed_fn is None and lexical_path.exists():
+            from lexical_similarity import LexicalIndex
+            embed_fn = LexicalIndex.load(lexical_path).embed
+        reduction_path = base / gbd.REDUCTION_FILE.name
+        reducer = Reducer.load(reduction_path) if reduction_path.exists() else None
+        skill_bits, skill_vocabulary = load_skill_bits(base / gbd.SKILL_BITS_FILE.name)
+        if skill_bits is not None and len(skill_bits) != len(embeddings):
+            skill_bits = skill_vocabulary = None          # stale (older run); skip skill scores
+        if layout is not None and len(layout) != len(embeddings):
+            raise ValueError(f"{gbd.LAYOUT_FILE.name} has {len(layout)} rows, embeddings have "
+                             f"{len(embeddings)}; rerun generate_backend_data.py")
+
+        return cls(
+            centroids=np.load(paths['centroids']),
+            cluster_labels=cluster_labels,
+            projection=ProjectionModel.load(paths['projection']) if layout is None else None,
+            embeddings=embeddings,
+            job_index=job_index,
+            embed_fn=embed_fn,
+            layout=layout,
+            reducer=reducer,
+            skill_bits=skill_bits,
+            skill_vocabulary=skill_vocabulary,
+        )
+
+    # ── Preparation ──────────────────────────────────────────────────────────
+
+    @staticmethod
+    def prepare_text(jd) -> str:
+        """Normalize a JD the same way the pipeline builds its `text` field.
+
+        Accepts a plain string or a dict with the raw posting columns.
+        """
+        if isinstance(jd, dict):
+            row = {col: jd.get(col, '') for col in
+                   ('filename', 'job_title', 'position_summary', 'responsibilities', 'qualifications')}
+            return gbd.build_text(pd.DataFrame([row])).iloc[0]
+        text = gbd.strip_locations(str(jd)[:MAX_TEXT_CHARS])
+        return text.replace('docx', '')
+
+    def extract_skills(self, text: str) -> list[str]:
+        text = text.lower()
+        return [name for name, patterns in self.skill_patterns
+                if any(p.search(text) for p in patterns)]
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        if self._embed_fn is not None:
+            return np.asarray(self._embed_fn(texts), dtype=np.float32)
+        if self._model is None:
+            self._model = gbd.load_embedding_model()
+        return gbd.embed_texts(self._model, texts)
+
+    # ── Placement ────────────────────────────────────────────────────────────
+
+    def place_embeddings(self, X: np.ndarray, texts: list[str], top_k: int = 5) -> list[dict]:
+        """Place already-embedded documents (cluster, x/y[/z], skills, neighbours)."""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        if self.reducer is not None:
+            X = self.reducer.transform(X)
+
+        # Nearest centroid (same rule as KMeans.predict) and its distance
+        d2 = ((X ** 2).sum(axis=1, keepdims=True)
+              - 2.0 * X @ self.centroids.T
+              + (self.centroids ** 2).sum(axis=1))
+        clusters = d2.argmin(axis=1)
+        distances = np.sqrt(np.maximum(d2[np.arange(len(X)), clusters], 0.0))
+
+        # Top-k neighbours by cosine similarity against the normalized store
+        sims = gbd.normalize_rows(X) @ self.embeddings.T
+        k = min(top_k, sims.shape[1])
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k] if k else np.zeros((len(X), 0), int)
+
+        if self.layout is not None:
+            # Force layout has no transform: similarity-weighted mean of the nearest jobs' positions
+            coords = place_points(X, self.embeddings, self.layout, k=LAYOUT_NEIGHBOURS)
+        else:
+            coords = self.projection.transform(X)
+        coord_names = ['x', 'y', 'z'][:coords.shape[1]]
+
+        results = []
+        for i, text in enumerate(texts):
+            order = top[i][np.argsort(-sims[i, top[i]])]
+            cid = int(clusters[i])
+            skills = self.extract_skills(text)
+            similar = [
+                {
+                    'employee_id': self.job_index[j]['employee_id'],
+                    'title':       self.job_index[j]['title'],
+                    'cluster':     self.job_index[j]['cluster'],
+                    'similarity':  round(float(sims[i, j]), 6),
+                }
+                for j in order
+            ]
+            if self.skill_bits is not None:
+                query = encode_skills([skills], self.skill_vocabulary)
+                jaccard = pair_skill_scores(query, np.zeros(len(order), dtype=np.int64), order,
+                                            B_right=self.skill_bits)
+                for entry, score in zip(similar, jaccard):
+                    entry['skill_jaccard'] = round(float(score), 4)
+            results.append({
+                'cluster_id':         cid,
+                'cluster_label':      self.cluster_labels.get(cid, f"Cluster {cid}"),
+                **{c: round(float(coords[i, d]), 6) for d, c in enumerate(coord_names)},
+                'skills':             skills,
+                'distance_to_center': round(float(distances[i]), 8),
+                'similar_jobs':       similar,
+            })
+        return results
+
+    def place_many(self, jds, top_k: int = 5) -> list[dict]:
+        """Place many JDs with one batched embedding call."""
+        texts = [self.prepare_text(jd) for jd in jds]
+        if not texts:
+            return []
+        return self.place_embeddings(self.embed(texts), texts, top_k=top_k)
+
+    def place(self, jd, top_k: int = 5) -> dict:
+        return self.place_many([jd], top_k=top_k)[0]
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def read_inputs(args) -> list:
+    if args.csv:
+        df = pd.read_csv(args.csv)
+        return df.to_dict('records')
+    jds = []
+    for path in args.files:
+        if path == '-':
+            jds.append(sys.stdin.read())
+        else:
+            jds.append(Path(path).read_text(encoding='utf-8', errors='ignore'))
+    return jds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Place new job descriptions on the constellation.")
+    parser.add_argument('files', nargs='*', help="JD text files ('-' reads stdin)")
+    parser.add_argument('--csv', help="CSV of postings with the raw dataset columns")
+    parser.add_argument('--top-k', type=int, default=5, help="Number of similar jobs to return")
+    parser.add_argument('--artifacts', help="Artifacts directory (default: artifacts/)")
+    parser.add_argument('--output', help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    if not args.files and not args.csv:
+        parser.error("pass one or more JD files, '-' for stdin, or --csv")
+
+    t0 = time.perf_counter()
+    placer = JobPlacer.load(args.artifacts)
+    t1 = time.perf_counter()
+    results = placer.place_many(read_inputs(args), top_k=args.top_k)
+    t2 = time.perf_counter()
+
+    print(f"Loaded artifacts in {t1 - t0:.2f}s, placed {len(results)} JD(s) in {t2 - t1:.2f}s",
+          file=sys.stderr)
+
+    payload = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(payload, encoding='utf-8')
+        print(f"✅ Wrote {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+
+
+if __name__ == '__main__':
+    main()
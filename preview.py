@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Sampling and extrapolation for `generate_backend_data.py --preview`.
+
+A preview runs the whole pipeline on a few thousand postings instead of the
+full corpus, so changes to title cleaning, the skill lexicon or k can be
+checked in seconds. Two sample designs:
+
+  - 'stratified' : department × title family (last word of the cleaned
+                   title, e.g. "engineer", "analyst"), proportional
+                   allocation, small strata pooled per department
+  - 'coreset'    : importance sampling by k-means++ sensitivity over cheap
+                   hashed TF-IDF vectors (outlying postings are kept with
+                   higher probability, and weighted down accordingly)
+
+Both record each row's inclusion probability, so corpus-level numbers are
+Horvitz-Thompson estimates with standard errors: cluster sizes, shares, mean
+skills per job and skill prevalence.
+
+Usage:
+    from preview import draw_sample, preview_report
+
+    sample = draw_sample(df, size=2000, method='stratified')
+    part = df.iloc[sample.rows]
+    ...
+    report = preview_report(sample, clusters, skills, label_names)
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Pool strata expected to get fewer sampled rows than this
+MIN_PER_STRATUM = 2
+CORESET_SEEDS = 32
+Z_95 = 1.96
+
+
+class Sample:
+    """Sampled row indices with their inclusion probabilities (and strata, if stratified)."""
+
+    def __init__(self, rows, inclusion, n_population: int, method: str, strata=None,
+                 stratum_sizes=None):
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.inclusion = np.asarray(inclusion, dtype=np.float64)
+        self.n_population = int(n_population)
+        self.method = method
+        self.strata = None if strata is None else np.asarray(strata, dtype=np.int64)
+        self.stratum_sizes = None if stratum_sizes is None else np.asarray(stratum_sizes, dtype=np.int64)
+
+    @property
+    def weights(self) -> np.ndarray:
+        """Postings each sampled row stands for (1 / inclusion probability)."""
+        return 1.0 / self.inclusion
+
+    def describe(self) -> str:
+        text = f"{len(self.rows)} of {self.n_population} postings ({self.method}"
+        if self.strata is not None:
+            text += f", {len(self.stratum_sizes)} strata"
+        return text + ")"
+
+# ── Sample designs ────────────────────────────────────────────────────────────
+
+def title_family(filename) -> str:
+    """Head word of the cleaned title ("senior process engineer" → "engineer")."""
+    import generate_backend_data as gbd
+
+    words = gbd.strip_locations(gbd.clean_title(str(filename))).split()
+    return words[-1] if words else ''
+
+
+def stratum_keys(df: pd.DataFrame, size: int) -> np.ndarray:
+    """department|family, with strata too small for the sample pooled into department|*, then *."""
+    from sharded_pipeline import department_of
+
+    departments = df.apply(department_of, axis=1).astype(str).to_numpy()
+    families = df['filename'].map(title_family).to_numpy()
+    keys = np.char.add(np.char.add(departments.astype(str), '|'), families.astype(str))
+    rate = size / len(df)
+    for pooled in (np.char.add(departments.astype(str), '|*'), np.full(len(df), '*')):
+        _, codes, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        small = counts[codes] * rate < MIN_PER_STRATUM
+        keys = np.where(small, pooled, keys)
+    return keys
+
+
+def stratified_sample(df: pd.DataFrame, size: int, random_state: int = 42) -> Sample:
+    """Simple random sample within each stratum, proportional allocation (at least 2 per stratum)."""
+    rng = np.random.default_rng(random_state)
+    names, strata, counts = np.unique(stratum_keys(df, size), return_inverse=True, return_counts=True)
+    alloc = np.minimum(counts, np.maximum(MIN_PER_STRATUM, np.round(size * counts / len(df)))).astype(int)
+
+    rows, inclusion, row_strata = [], [], []
+    for h in range(len(names)):
+        members = np.flatnonzero(strata == h)
+        chosen = np.sort(rng.choice(members, alloc[h], replace=False))
+        rows.append(chosen)
+        inclusion.append(np.full(len(chosen), alloc[h] / counts[h]))
+        row_strata.append(np.full(len(chosen), h))
+    return Sample(np.concatenate(rows), np.concatenate(inclusion), len(df), 'stratified',
+                  strata=np.concatenate(row_strata), stratum_sizes=counts)
+
+
+def hashed_tfidf(df: pd.DataFrame) -> sparse.csr_matrix:
+    """Cheap sparse vectors for sampling (no vocabulary pass, no embeddings needed)."""
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+
+    text = (df['job_title'].fillna('') + ' ' + df['position_summary'].fillna('') + ' ' +
+            df['responsibilities'].fillna('').str[:3000])
+    counts = HashingVectorizer(n_features=2 ** 18, alternate_sign=False, norm=None,
+                               stop_words='english').transform(text)
+    return TfidfTransformer(sublinear_tf=True).fit_transform(counts).tocsr()
+
+
+def coreset_sample(df: pd.DataFrame, size: int, n_seeds: int = CORESET_SEEDS,
+                   random_state: int = 42) -> Sample:
+    """Poisson sample with probabilities ∝ k-means++ sensitivity (Bachem et al. coreset bound).
+
+    Seeds are picked by D² sampling; a row's sensitivity grows with its own
+    distance to the seeds and shrinks with the size of its seed's cell.
+    """
+    rng = np.random.default_rng(random_state)
+    V = hashed_tfidf(df)                                  # rows are unit length
+    n = V.shape[0]
+    n_seeds = min(n_seeds, n)
+
+    seeds = [int(rng.integers(n))]
+    d2 = np.maximum(2.0 - 2.0 * (V @ V[seeds[0]].T).toarray().ravel(), 0.0)
+    nearest = np.zeros(n, dtype=np.int64)
+    for s in range(1, n_seeds):
+        p = d2 / d2.sum() if d2.sum() > 0 else None
+        seed = int(rng.choice(n, p=p))
+        seeds.append(seed)
+        d2_new = np.maximum(2.0 - 2.0 * (V @ V[seed].T).toarray().ravel(), 0.0)
+        closer = d2_new < d2
+        d2[closer] = d2_new[closer]
+        nearest[closer] = s
+
+    cell_size = np.bincount(nearest, minlength=n_seeds)
+    cell_cost = np.bincount(nearest, weights=d2, minlength=n_seeds)
+    mean_cost = max(d2.mean(), 1e-12)
+    alpha = 16 * (np.log(n_seeds) + 2)
+    sensitivity = (alpha * d2 / mean_cost
+                   + 2 * alpha * cell_cost[nearest] / (cell_size[nearest] * mean_cost)
+                   + 4 * n / cell_size[nearest])
+
+    inclusion = np.minimum(1.0, size * sensitivity / sensitivity.sum())
+    rows = np.flatnonzero(rng.random(n) < inclusion)
+    return Sample(rows, inclusion[rows], n, 'coreset')
+
+
+def draw_sample(df: pd.DataFrame, size: int = 2000, method: str = 'stratified',
+                random_state: int = 42) -> Sample:
+    if size >= len(df):
+        return Sample(np.arange(len(df)), np.ones(len(df)), len(df), 'full corpus')
+    if method == 'stratified':
+        return stratified_sample(df, size, random_state)
+    if method == 'coreset':
+        return coreset_sample(df, size, random_state=random_state)
+    raise ValueError(f"Unknown preview sample: {method!r} (use 'stratified' or 'coreset')")
+
+# ── Extrapolation ─────────────────────────────────────────────────────────────
+
+def estimate_totals(sample: Sample, Y) -> tuple[np.ndarray, np.ndarray]:
+    """Horvitz-Thompson corpus totals of each column of Y (one row per sampled posting) and SEs."""
+    Y = np.asarray(Y, dtype=np.float64).reshape(len(sample.rows), -1)
+    totals = sample.weights @ Y
+    if sample.strata is None:
+        # Poisson sampling: Var = Σ (1 - π) / π² · y²
+        variance = ((1.0 - sample.inclusion) / sample.inclusion ** 2) @ (Y ** 2)
+    else:
+        # Stratified SRS: Var = Σ_h N_h² (1 - n_h/N_h) s²_h / n_h
+        variance = np.zeros(Y.shape[1])
+        for h, N_h in enumerate(sample.stratum_sizes):
+            Y_h = Y[sample.strata == h]
+            n_h = len(Y_h)
+            if n_h < 2 or n_h == N_h:
+                continue
+            variance += N_h ** 2 * (1.0 - n_h / N_h) * Y_h.var(axis=0, ddof=1) / n_h
+    return totals, np.sqrt(variance)
+
+
+def estimate_group_means(sample: Sample, groups, values, n_groups: int):
+    """Ratio estimates of the mean of `values` per group, with linearized standard errors."""
+    groups = np.asarray(groups)
+    values = np.asarray(values, dtype=np.float64)
+    member = (groups[:, None] == np.arange(n_groups)[None, :]).astype(np.float64)
+    sizes, _ = estimate_totals(sample, member)
+    sums, _ = estimate_totals(sample, member * values[:, None])
+    means = sums / np.maximum(sizes, 1e-12)
+    residuals = member * (values[:, None] - means[None, :]) / np.maximum(sizes, 1e-12)[None, :]
+    _, se = estimate_totals(sample, residuals)
+    return means, se
+
+
+def preview_report(sample: Sample, clusters, skills, label_names=None) -> dict:
+    """Extrapolated cluster sizes, shares, skills per job and skill prevalence (± 1.96 SE)."""
+    clusters = np.asarray(clusters, dtype=np.int64)
+    label_names = label_names or {}
+    n_clusters = int(clusters.max()) + 1
+    member = (clusters[:, None] == np.arange(n_clusters)[None, :]).astype(np.float64)
+    sizes, size_se = estimate_totals(sample, member)
+    n_skills = np.array([len(s) for s in skills], dtype=np.float64)
+    mean_skills, mean_skills_se = estimate_group_means(sample, clusters, n_skills, n_clusters)
+    sampled = member.sum(axis=0).astype(int)
+
+    skill_names = sorted({s for row in skills for s in row})
+    has_skill = np.array([[name in row for name in skill_names] for row in skills], dtype=np.float64)
+    skill_totals, skill_se = estimate_totals(sample, has_skill.reshape(len(skills), len(skill_names)))
+
+    N = sample.n_population
+    return {
+        'sample':        sample.describe(),
+        'n_sampled':     int(len(sample.rows)),
+        'n_population':  N,
+        'clusters': [
+            {
+                'cluster':            c,
+                'label':              label_names.get(c, f"Cluster {c}"),
+                'sampled':            int(sampled[c]),
+                'estimated_size':     round(float(sizes[c]), 1),
+                'size_ci95':          round(float(Z_95 * size_se[c]), 1),
+                'share':              round(float(sizes[c] / N), 4),
+                'share_ci95':         round(float(Z_95 * size_se[c] / N), 4),
+                'mean_skills':        round(float(mean_skills[c]), 3),
+                'mean_skills_ci95':   round(float(Z_95 * mean_skills_se[c]), 3),
+            }
+            for c in range(n_clusters)
+        ],
+        'skills': {
+            name: {'estimated_jobs': round(float(t), 1), 'ci95': round(float(Z_95 * se), 1)}
+            for name, t, se in zip(skill_names, skill_totals, skill_se)
+        },
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"\nExtrapolated to {report['n_population']} postings from {report['sample']}:")
+    print(f"  {'cluster':<48} {'sampled':>7} {'est. size':>16} {'skills/job':>12}")
+    for c in sorted(report['clusters'], key=lambda c: -c['estimated_size']):
+        name = f"{c['cluster']:>2} {c['label']}"[:48]
+        print(f"  {name:<48} {c['sampled']:>7} "
+              f"{c['estimated_size']:>8.0f} ± {c['size_ci95']:<5.0f} "
+              f"{c['mean_skills']:>5.2f} ± {c['mean_skills_ci95']:.2f}")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Persisted 2D projection for the constellation map.
+
+Fitting a fresh PCA and min-max normalising on every run moves every point
+whenever one posting is added. ProjectionModel stores the PCA components,
+the mean and the [-50, 50] normalisation bounds, so later runs (and single
+new postings) are projected into the same frame without refitting.
+
+Fit methods:
+  - 'full'        : exact PCA (sklearn, in memory)
+  - 'randomized'  : randomized SVD solver, much cheaper for wide/large X
+  - 'incremental' : IncrementalPCA over row chunks, so X can be a np.memmap
+                    or a list of arrays that does not fit in memory (a one-shot
+                    iterator such as a generator is buffered, since the bounds
+                    need a second pass)
+
+`source` records which vector space the model was fit on (embedding model,
+reducer), so callers can refit instead of reusing it on other vectors of
+the same width.
+
+Usage:
+    from projection import ProjectionModel
+
+    model = ProjectionModel.fit(X, method='randomized')
+    model.save('artifacts/projection.npz')
+    xy = ProjectionModel.load('artifacts/projection.npz').transform(X_new)
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+PROJECTION_VERSION = 1
+SCALE_MIN, SCALE_MAX = -50.0, 50.0
+
+
+def _iter_chunks(X, batch_size: int):
+    """Yield row chunks from an array/memmap, or pass an iterable of chunks through."""
+    if hasattr(X, 'shape'):
+        for start in range(0, X.shape[0], batch_size):
+            yield np.asarray(X[start:start + batch_size], dtype=np.float64)
+    else:
+        for chunk in X:
+            yield np.asarray(chunk, dtype=np.float64)
+
+
+class ProjectionModel:
+    """Linear projection to n_components plus fixed normalisation bounds."""
+
+    def __init__(self, components, mean, lower, upper, method='full',
+                 explained_variance_ratio=None, source: str = ''):
+        self.components = np.asarray(components, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.lower = np.asarray(lower, dtype=np.float64)
+        self.upper = np.asarray(upper, dtype=np.float64)
+        self.method = method
+        self.explained_variance_ratio = (
+            None if explained_variance_ratio is None
+            else np.asarray(explained_variance_ratio, dtype=np.float64)
+        )
+        self.source = source
+
+    @property
+    def n_components(self) -> int:
+        return self.components.shape[0]
+
+    # ── Fitting ───────────────────────────────────────────────────────────────
+
+    @classmethod
+    def fit(cls, X, n_components: int = 2, method: str = 'full',
+            batch_size: int = 10_000, random_state: int = 42, source: str = '') -> 'ProjectionModel':
+        """Fit the projection and record normalisation bounds on the fit data."""
+        if not hasattr(X, 'shape') and iter(X) is X:
+            X = list(X)                          # one-shot iterator: both passes need the chunks
+        if method in ('full', 'randomized'):
+            from sklearn.decomposition import PCA
+            solver = 'randomized' if method == 'randomized' else 'auto'
+            pca = PCA(n_components=n_components, svd_solver=solver, random_state=random_state)
+            pca.fit(np.asarray(X))
+        elif method == 'incremental':
+            from sklearn.decomposition import IncrementalPCA
+            pca = IncrementalPCA(n_components=n_components)
+            # partial_fit needs at least n_components rows per call: a short chunk is
+            # fitted together with its neighbour instead of being dropped
+            pending = None
+            for chunk in _iter_chunks(X, batch_size):
+                if pending is None:
+                    pending = chunk
+                elif len(pending) < n_components or len(chunk) < n_components:
+                    pending = np.vstack([pending, chunk])
+                else:
+                    pca.partial_fit(pending)
+                    pending = chunk
+            if pending is None or len(pending) < n_components:
+                raise ValueError(f"Incremental projection needs at least {n_components} rows")
+            pca.partial_fit(pending)
+        else:
+            raise ValueError(f"Unknown projection method: {method!r}")
+
+        model = cls(pca.components_, pca.mean_,
+                    lower=np.full(n_components, np.inf),
+                    upper=np.full(n_components, -np.inf),
+                    method=method,
+                    explained_variance_ratio=pca.explained_variance_ratio_,
+                    source=source)
+
+        # Bounds come from a second streaming pass so memmaps stay out of RAM
+        for chunk in _iter_chunks(X, batch_size):
+            raw = model.project(chunk)
+            model.lower = np.minimum(model.lower, raw.min(axis=0))
+            model.upper = np.maximum(model.upper, raw.max(axis=0))
+        return model
+
+    # ── Projection ────────────────────────────────────────────────────────────
+
+    def project(self, X) -> np.ndarray:
+        """Raw PCA coordinates (no normalisation)."""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        return (X - self.mean) @ self.components.T
+
+    def transform(self, X) -> np.ndarray:
+        """Coordinates in the persisted [-50, 50] frame.
+
+        Points outside the fit data's range land outside [-50, 50] rather
+        than being clipped, so new outliers stay visibly apart.
+        """
+        span = np.where(self.upper > self.lower, self.upper - self.lower, 1.0)
+        unit = (self.project(X) - self.lower) / span
+        return unit * (SCALE_MAX - SCALE_MIN) + SCALE_MIN
+
+    def transform_chunked(self, X, batch_size: int = 10_000) -> np.ndarray:
+        """transform() over row chunks, for memmaps larger than RAM."""
+        parts = [self.transform(chunk) for chunk in _iter_chunks(X, batch_size)]
+        if not parts:
+            return np.zeros((0, self.n_components))
+        return np.vstack(parts)
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+
+    def save(self, path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            version=PROJECTION_VERSION,
+            components=self.components,
+            mean=self.mean,
+            lower=self.lower,
+            upper=self.upper,
+            method=self.method,
+            explained_variance_ratio=(
+                self.explained_variance_ratio if self.explained_variance_ratio is not None
+                else np.array([])
+            ),
+            source=self.source,
+        )
+
+    @classmethod
+    def load(cls, path) -> 'ProjectionModel':
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data['version'])
+            if version != PROJECTION_VERSION:
+                raise ValueError(f"Unsupported projection model version {version} in {path}")
+            evr = data['explained_variance_ratio']
+            return cls(
+                data['components'], data['mean'], data['lower'], data['upper'],
+                method=str(data['method']),
+                explained_variance_ratio=evr if evr.size else None,
+                source=str(data['source']) if 'source' in data.files else '',
+            )
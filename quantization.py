@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Quantized embedding storage with recall-checked similarity search.
+
+Embedding RAM limits how much posting history can be kept hot on one box.
+This module stores row-normalized embeddings in a compact form and scores
+queries directly on the codes:
+
+  - float16  : 2 bytes/dim, scores with float32 accumulation
+  - int8     : 1 byte/dim + one float32 scale per vector (symmetric, max-abs)
+  - pq       : product quantization, 1 byte per sub-space (e.g. 768-d → 96 B)
+               scored with per-query lookup tables (asymmetric distance); by
+               default the largest sub-space count that divides the dimension
+               and leaves at least MIN_SUBSPACE_DIM dims per sub-space
+
+`search` takes a candidate pool from the codes and, when full-precision
+vectors are available (typically a read-only np.memmap on disk), re-ranks
+the pool exactly. `benchmark` reports memory saved and recall@k lost.
+
+Usage:
+    python quantization.py --artifacts artifacts --k 10 --rerank 4
+
+    from quantization import build_index, search
+    index = build_index(X, kind='int8')
+    idx, scores = search(index, Q, k=10, full=X_memmap, rerank=4)
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+BLOCK_ROWS = 65_536
+MIN_SUBSPACE_DIM = 8
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+
+def normalize_rows(X) -> np.ndarray:
+    X = np.asarray(X, dtype=np.float32)
+    return X / np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-12)
+
+
+def _blocks(n: int, size: int = BLOCK_ROWS):
+    for start in range(0, n, size):
+        yield start, min(start + size, n)
+
+
+def default_subspaces(d: int, min_dim: int = MIN_SUBSPACE_DIM) -> int:
+    """Largest divisor of d with at least min_dim dims per sub-space (768 → 96, 256 → 32, 64 → 8)."""
+    return max((m for m in range(1, d + 1) if d % m == 0 and d // m >= min_dim), default=1)
+
+
+def store_fingerprint(path, X) -> str:
+    """Identifies the float32 store an index was built from (shape, size, mtime)."""
+    stat = Path(path).stat()
+    return f"{X.shape[0]}x{X.shape[1]}:{stat.st_size}:{stat.st_mtime_ns}"
+
+# ── Index types ───────────────────────────────────────────────────────────────
+
+class Float16Index:
+    kind = 'float16'
+
+    def __init__(self, codes):
+        self.codes = np.asarray(codes, dtype=np.float16)
+
+    @classmethod
+    def build(cls, X, **_):
+        codes = np.empty(X.shape, dtype=np.float16)
+        for s, e in _blocks(len(X)):
+            codes[s:e] = normalize_rows(X[s:e])
+        return cls(codes)
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes
+
+    def scores(self, Q) -> np.ndarray:
+        Q = np.atleast_2d(np.asarray(Q, dtype=np.float32))
+        out = np.empty((len(Q), len(self)), dtype=np.float32)
+        for s, e in _blocks(len(self)):
+            out[:, s:e] = Q @ self.codes[s:e].astype(np.float32).T
+        return out
+
+    def to_arrays(self) -> dict:
+        return {'codes': self.codes}
+
+
+class Int8Index:
+    kind = 'int8'
+
+    def __init__(self, codes, scales):
+        self.codes = np.asarray(codes, dtype=np.int8)
+        self.scales = np.asarray(scales, dtype=np.float32)
+
+    @classmethod
+    def build(cls, X, **_):
+        codes = np.empty(X.shape, dtype=np.int8)
+        scales = np.empty(len(X), dtype=np.float32)
+        for s, e in _blocks(len(X)):
+            block = normalize_rows(X[s:e])
+            scale = np.maximum(np.abs(block).max(axis=1), 1e-12) / 127.0
+            codes[s:e] = np.clip(np.rint(block / scale[:, None]), -127, 127)
+            scales[s:e] = scale
+        return cls(codes, scales)
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.scales.nbytes
+
+    def scores(self, Q) -> np.ndarray:
+        Q = np.atleast_2d(np.asarray(Q, dtype=np.float32))
+        out = np.empty((len(Q), len(self)), dtype=np.float32)
+        for s, e in _blocks(len(self)):
+            out[:, s:e] = (Q @ self.codes[s:e].astype(np.float32).T) * self.scales[s:e]
+        return out
+
+    def to_arrays(self) -> dict:
+        return {'codes': self.codes, 'scales': self.scales}
+
+
+class PQIndex:
+    kind = 'pq'
+
+    def __init__(self, codes, codebooks):
+        self.codes = np.asarray(codes, dtype=np.uint8)          # (n, m)
+        self.codebooks = np.asarray(codebooks, dtype=np.float32)  # (m, 256, d/m)
+
+    @classmethod
+    def build(cls, X, n_subspaces: int | None = None, n_train: int = 50_000, random_state: int = 42, **_):
+        from sklearn.cluster import KMeans
+
+        n, d = X.shape
+        n_subspaces = n_subspaces or default_subspaces(d)
+        if d % n_subspaces:
+            raise ValueError(f"Dimension {d} is not divisible by n_subspaces={n_subspaces}")
+        sub = d // n_subspaces
+        rng = np.random.default_rng(random_state)
+        train_idx = np.sort(rng.choice(n, size=min(n, n_train), replace=False))
+        train = normalize_rows(X[train_idx])
+        n_codes = min(256, len(train))
+
+        codebooks = np.zeros((n_subspaces, 256, sub), dtype=np.float32)
+        for j in range(n_subspaces):
+            km = KMeans(n_clusters=n_codes, n_init=1, max_iter=50, random_state=random_state)
+            km.fit(train[:, j * sub:(j + 1) * sub])
+            codebooks[j, :n_codes] = km.cluster_centers_
+
+        index = cls(np.zeros((n, n_subspaces), dtype=np.uint8), codebooks)
+        for s, e in _blocks(n):
+            index.codes[s:e] = index.encode(normalize_rows(X[s:e]), n_codes)
+        return index
+
+    def encode(self, X, n_codes: int = 256) -> np.ndarray:
+        m, _, sub = self.codebooks.shape
+        codes = np.empty((len(X), m), dtype=np.uint8)
+        for j in range(m):
+            part = X[:, j * sub:(j + 1) * sub]
+            book = self.codebooks[j, :n_codes]
+            d2 = (part ** 2).sum(1, keepdims=True) - 2 * part @ book.T + (book ** 2).sum(1)
+            codes[:, j] = d2.argmin(axis=1)
+        return codes
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def n_subspaces(self) -> int:
+        return self.codebooks.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.codebooks.nbytes
+
+    def scores(self, Q) -> np.ndarray:
+        Q = np.atleast_2d(np.asarray(Q, dtype=np.float32))
+        m, _, sub = self.codebooks.shape
+        # Lookup tables: lut[q, j, c] = <Q_j, codebook_j[c]>
+        lut = np.einsum('qjs,jcs->qjc', Q.reshape(len(Q), m, sub), self.codebooks)
+        out = np.zeros((len(Q), len(self)), dtype=np.float32)
+        cols = np.arange(m)
+        for s, e in _blocks(len(self)):
+            codes = self.codes[s:e]
+            for qi in range(len(Q)):
+                out[qi, s:e] = lut[qi][cols, codes].sum(axis=1)
+        return out
+
+    def to_arrays(self) -> dict:
+        return {'codes': self.codes, 'codebooks': self.codebooks}
+
+
+INDEX_TYPES = {cls.kind: cls for cls in (Float16Index, Int8Index, PQIndex)}
+
+# ── Build / persist / search ──────────────────────────────────────────────────
+
+def build_index(X, kind: str = 'int8', **kwargs):
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown index kind: {kind!r} (choose from {', '.join(INDEX_TYPES)})")
+    return INDEX_TYPES[kind].build(X, **kwargs)
+
+
+def save_index(index, path, source: str = '') -> None:
+    """Write the codes; `source` identifies the float32 store they were built from."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path, kind=index.kind, source=source, **index.to_arrays())
+
+
+def load_index(path):
+    """Index from save_index; its `source` attribute is '' for files saved without one."""
+    with np.load(path, allow_pickle=False) as data:
+        kind = str(data['kind'])
+        source = str(data['source']) if 'source' in data.files else ''
+        arrays = {k: data[k] for k in data.files if k not in ('kind', 'source')}
+    index = INDEX_TYPES[kind](**arrays)
+    index.source = source
+    return index
+
+
+def search(index, Q, k: int = 10, full=None, rerank: int = 4, exclude=None):
+    """Top-k (indices, scores) per query row.
+
+    With `full` (row-normalized float32, may be a memmap) the top k·rerank
+    candidates from the codes are re-scored exactly. `exclude` is an optional
+    per-query row index to drop (e.g. the query's own row).
+    """
+    Q = normalize_rows(np.atleast_2d(Q))
+    S = index.scores(Q)
+    if exclude is not None:
+        S[np.arange(len(Q)), np.asarray(exclude)] = -np.inf
+
+    n = S.shape[1]
+    pool = min(n, k * rerank if full is not None else k)
+    cand = np.argpartition(-S, pool - 1, axis=1)[:, :pool]
+
+    if full is not None:
+        exact = np.einsum('qd,qcd->qc', Q, np.asarray(full[np.sort(cand, axis=1)], dtype=np.float32))
+        cand = np.sort(cand, axis=1)
+        cand_scores = exact
+    else:
+        cand_scores = np.take_along_axis(S, cand, axis=1)
+
+    kk = min(k, pool)
+    order = np.argsort(-cand_scores, axis=1)[:, :kk]
+    return np.take_along_axis(cand, order, axis=1), np.take_along_axis(cand_scores, order, axis=1)
+
+# ── Benchmark ─────────────────────────────────────────────────────────────────
+
+def recall_at_k(approx: np.ndarray, exact: np.ndarray) -> float:
+    hits = sum(len(set(a) & set(e)) for a, e in zip(approx, exact))
+    return hits / exact.size if exact.size else 1.0
+
+
+def benchmark(X, k: int = 10, kinds=('float16', 'int8', 'pq'), rerank: int = 4,
+              n_queries: int = 200, n_subspaces: int | None = None, random_state: int = 42) -> list[dict]:
+    """Memory and recall@k of each representation against exact float32 search."""
+    X = normalize_rows(X)
+    rng = np.random.default_rng(random_state)
+    q_idx = rng.choice(len(X), size=min(n_queries, len(X)), replace=False)
+    Q = X[q_idx]
+
+    S = Q @ X.T
+    S[np.arange(len(Q)), q_idx] = -np.inf
+    kk = min(k, len(X) - 1)
+    exact = np.argsort(-S, axis=1)[:, :kk]
+
+    rows = [{'kind': 'float32', 'bytes': X.nbytes, 'saved': 0.0,
+             'recall': 1.0, 'recall_reranked': 1.0}]
+    for kind in kinds:
+        kwargs = {'n_subspaces': n_subspaces} if kind == 'pq' else {}
+        try:
+            index = build_index(X, kind=kind, **kwargs)
+        except ValueError as exc:
+            print(f"  skipping {kind}: {exc}")
+            continue
+        approx, _ = search(index, Q, k=kk, exclude=q_idx)
+        reranked, _ = search(index, Q, k=kk, full=X, rerank=rerank, exclude=q_idx)
+        rows.append({
+            'kind':            kind,
+            'bytes':           index.nbytes,
+            'saved':           1.0 - index.nbytes / X.nbytes,
+            'recall':          recall_at_k(approx, exact),
+            'recall_reranked': recall_at_k(reranked, exact),
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark quantized embedding storage.")
+    parser.add_argument('--artifacts', default='artifacts',
+                        help="Directory with embeddings_normalized.npy")
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--rerank', type=int, default=4, help="Candidate pool = k × rerank")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--subspaces', type=int,
+                        help=f"PQ sub-spaces (must divide dim; default: largest divisor with "
+                             f"≥ {MIN_SUBSPACE_DIM} dims each)")
+    parser.add_argument('--save', choices=list(INDEX_TYPES),
+                        help="Also write artifacts/embeddings_<kind>.npz")
+    args = parser.parse_args(argv)
+
+    path = Path(args.artifacts) / 'embeddings_normalized.npy'
+    if not path.exists():
+        sys.exit(f"ERROR: {path} not found (run generate_backend_data.py first)")
+    X = np.load(path, mmap_mode='r')
+    print(f"Loaded {X.shape[0]} × {X.shape[1]} embeddings from {path}")
+
+    rows = benchmark(X, k=args.k, rerank=args.rerank,
+                     n_queries=args.queries, n_subspaces=args.subspaces)
+    print(f"\n{'kind':<8} {'MB':>9} {'saved':>7} {'recall@' + str(args.k):>10} {'reranked':>9}")
+    for r in rows:
+        print(f"{r['kind']:<8} {r['bytes'] / 1e6:>9.2f} {r['saved']:>7.1%} "
+              f"{r['recall']:>10.3f} {r['recall_reranked']:>9.3f}")
+
+    if args.save:
+        out = Path(args.artifacts) / f'embeddings_{args.save}.npz'
+        kwargs = {'n_subspaces': args.subspaces} if args.save == 'pq' else {}
+        # Same fingerprint the similarity service checks, so it reuses this index as is
+        save_index(build_index(X, kind=args.save, **kwargs), out, source=store_fingerprint(path, X))
+        print(f"\n✅ Saved {out}")
+
+
+if __name__ == '__main__':
+    main()
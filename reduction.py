@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Optional dimensionality reduction ahead of clustering and neighbour search.
+
+KMeans, top-k search and the projection all cost O(d) per pair, and most of
+the 768 embedding dimensions carry little signal for job families. A
+Reducer maps embeddings to fewer dimensions once; the reduced matrix is
+what clustering, kNN and placement then use.
+
+Methods:
+  - 'pca'    : randomized PCA fitted on the corpus (components + mean
+               persisted, so later runs and new postings share the basis)
+  - 'prefix' : keep the first d dimensions and re-normalize, for models
+               trained to be truncatable (Matryoshka-style embeddings)
+
+`reduction_report` measures what was lost: neighbour recall@k against the
+full-dimensional top-k and KMeans agreement (ARI / NMI) with a
+full-dimensional clustering.
+
+Usage:
+    from reduction import Reducer, reduction_report
+
+    reducer = Reducer.fit(X, method='pca', n_components=256)
+    reducer.save('artifacts/reduction.npz')
+    X_small = Reducer.load('artifacts/reduction.npz').transform(X_new)
+    report = reduction_report(X, X_small, labels, k=10)
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+from knn_graph import blocked_top_k, normalize_rows
+
+REDUCTION_VERSION = 1
+
+
+class Reducer:
+    """Linear map to n_components (PCA) or a prefix of the embedding."""
+
+    def __init__(self, method: str, n_components: int, input_dim: int, components=None, mean=None,
+                 explained_variance_ratio=None):
+        self.method = method
+        self.n_components = int(n_components)
+        self.input_dim = int(input_dim)
+        self.components = components
+        self.mean = mean
+        self.explained_variance_ratio = explained_variance_ratio
+
+    @classmethod
+    def fit(cls, X, method: str = 'pca', n_components: int = 256,
+            random_state: int = 42) -> 'Reducer':
+        X = np.asarray(X)
+        n_components = min(n_components, X.shape[1])
+        if method == 'prefix':
+            return cls('prefix', n_components, X.shape[1])
+        if method == 'pca':
+            from sklearn.decomposition import PCA
+            n_components = min(n_components, len(X))
+            pca = PCA(n_components=n_components, svd_solver='randomized', random_state=random_state)
+            pca.fit(X)
+            return cls('pca', n_components, X.shape[1], components=pca.components_.astype(np.float32),
+                       mean=pca.mean_.astype(np.float32),
+                       explained_variance_ratio=pca.explained_variance_ratio_)
+        raise ValueError(f"Unknown reduction method: {method!r} (use 'pca' or 'prefix')")
+
+    def transform(self, X) -> np.ndarray:
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        if X.shape[1] != self.input_dim:
+            raise ValueError(f"Reducer expects {self.input_dim}-d input, got {X.shape[1]}-d")
+        if self.method == 'prefix':
+            return normalize_rows(X[:, :self.n_components])
+        return ((X - self.mean) @ self.components.T).astype(np.float32)
+
+    def describe(self) -> str:
+        text = f"{self.method} {self.input_dim} → {self.n_components} dims"
+        if self.explained_variance_ratio is not None:
+            text += f" ({float(np.sum(self.explained_variance_ratio)):.1%} variance kept)"
+        return text
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+
+    def save(self, path) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        empty = np.zeros(0, dtype=np.float32)
+        np.savez(
+            path, version=REDUCTION_VERSION, method=self.method, n_components=self.n_components,
+            input_dim=self.input_dim,
+            components=self.components if self.components is not None else empty,
+            mean=self.mean if self.mean is not None else empty,
+            explained_variance_ratio=(self.explained_variance_ratio
+                                      if self.explained_variance_ratio is not None else empty),
+        )
+
+    @classmethod
+    def load(cls, path) -> 'Reducer':
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data['version'])
+            if version != REDUCTION_VERSION:
+                raise ValueError(f"Unsupported reduction model version {version} in {path}")
+            optional = {k: (data[k] if data[k].size else None)
+                        for k in ('components', 'mean', 'explained_variance_ratio')}
+            return cls(str(data['method']), int(data['n_components']), int(data['input_dim']),
+                       **optional)
+
+# ── Quality report ────────────────────────────────────────────────────────────
+
+def neighbour_recall(X_full, X_reduced, k: int = 10, sample: int = 2000,
+                     random_state: int = 42) -> float:
+    """Mean overlap between full-dimensional and reduced top-k for a sample of queries."""
+    n = len(X_full)
+    rows = np.random.default_rng(random_state).choice(n, min(n, sample), replace=False)
+    full_idx, _ = blocked_top_k(X_full[rows], k + 1, Y=X_full, exclude_self=False)
+    red_idx, _ = blocked_top_k(X_reduced[rows], k + 1, Y=X_reduced, exclude_self=False)
+    hits = 0
+    for q, a, b in zip(rows, full_idx, red_idx):
+        hits += len((set(a.tolist()) - {q}) & (set(b.tolist()) - {q}))
+    return hits / (len(rows) * k)
+
+
+def reduction_report(X_full, X_reduced, labels, k: int = 10, sample: int = 2000,
+                     random_state: int = 42) -> dict:
+    """Neighbour recall@k and agreement of `labels` (reduced) with KMeans on the full matrix."""
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+    from sklearn.metrics import adjusted_rand_score, normalized_mutual_info_score
+
+    labels = np.asarray(labels)
+    n_clusters = len(np.unique(labels))
+    X_full = np.asarray(X_full, dtype=np.float32)
+    if len(X_full) > 20_000:
+        model = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state, batch_size=4096,
+                                n_init=3)
+    else:
+        model = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=3)
+    full_labels = model.fit_predict(X_full)
+    return {
+        'input_dim':          int(X_full.shape[1]),
+        'reduced_dim':        int(np.asarray(X_reduced).shape[1]),
+        f'recall_at_{k}':     round(neighbour_recall(X_full, X_reduced, k, sample, random_state), 4),
+        'cluster_ari':        round(float(adjusted_rand_score(full_labels, labels)), 4),
+        'cluster_nmi':        round(float(normalized_mutual_info_score(full_labels, labels)), 4),
+    }
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Sharded, multi-process execution of the generate_backend_data.py stages.
+
+The corpus is partitioned by department (extract_departments_final.py) or by
+a hash of the file name, and each stage runs one task per shard in a process
+pool:
+
+  - prepare: title cleaning, text building and skill extraction
+  - top-k:   all queries against one shard's rows; the per-shard candidate
+             lists are merged into the exact global top-k (merge_top_k)
+  - cluster: KMeans inside each shard, over-segmented (about 2k clusters
+             overall); the shard centroids are then reconciled into k global
+             clusters by a size-weighted KMeans over the centroids, followed
+             by a few global assignment passes
+
+Workers read the embeddings from a shared .npy file (memory-mapped), so a
+shard task only ships row indices — the same layout that lets shards move to
+other machines later. Embedding itself stays in the parent, which owns the
+cache and journal.
+
+Usage:
+    python generate_backend_data.py --shard-by department --workers 8
+    python generate_backend_data.py --shard-by hash --n-shards 16
+"""
+
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from knn_graph import blocked_top_k, merge_top_k, normalize_rows
+
+# Local clusters per global cluster before reconciliation
+OVERSEGMENT = 2
+REFINE_PASSES = 3
+
+# ── Partitioning ──────────────────────────────────────────────────────────────
+
+def department_of(row) -> str:
+    """Department from the file path, else from content rules (extract_departments_final.py)."""
+    from extract_departments_final import extract_and_map_department, determine_department_from_content
+
+    def text(col):
+        value = row.get(col)
+        return '' if pd.isna(value) else str(value)
+
+    return (extract_and_map_department(text('filename'))
+            or determine_department_from_content(text('job_title'), text('position_summary'),
+                                                 text('responsibilities')))
+
+
+def shard_assignments(df: pd.DataFrame, by: str = 'department', n_shards: int = 8):
+    """(shard id per row, shard names). 'department' or 'hash' (crc32 of the file name)."""
+    if by == 'department':
+        keys = df.apply(department_of, axis=1).astype(str)
+        names, codes = np.unique(keys.to_numpy(), return_inverse=True)
+        return codes, [str(n) for n in names]
+    if by == 'hash':
+        codes = np.array([zlib.crc32(str(f).encode('utf-8')) % n_shards for f in df['filename']])
+        return codes, [f'hash-{i}' for i in range(n_shards)]
+    raise ValueError(f"Unknown shard key: {by!r} (use 'department' or 'hash')")
+
+
+def shard_rows(shard_ids: np.ndarray) -> list[np.ndarray]:
+    """Row indices per non-empty shard, largest first (better pool packing)."""
+    rows = [np.flatnonzero(shard_ids == s) for s in np.unique(shard_ids)]
+    return sorted(rows, key=len, reverse=True)
+
+# ── Worker tasks (top level so they pickle) ───────────────────────────────────
+
+def _prepare_task(part: pd.DataFrame) -> pd.DataFrame:
+    import generate_backend_data as gbd
+
+    out = pd.DataFrame(index=part.index)
+    out['title_clean'] = part['filename'].apply(gbd.clean_title).apply(gbd.strip_locations)
+    out['text'] = gbd.build_text(part)
+    out['Individual_Skills'] = out['text'].apply(lambda t: gbd.extract_skills(t, gbd.SKILL_LEXICON))
+    return out
+
+
+def _top_k_task(embeddings_path, rows: np.ndarray, k: int):
+    # Queries are normalized block by block, so a task never holds more than its shard + one block
+    X = np.load(embeddings_path, mmap_mode='r')
+    idx, sims = blocked_top_k(X, k, Y=normalize_rows(X[rows]), exclude_self=False,
+                              score_fn=lambda A, B: normalize_rows(A) @ B.T)
+    return rows[idx], sims
+
+
+def _kmeans_task(embeddings_path, rows: np.ndarray, n_clusters: int, random_state: int):
+    from sklearn.cluster import KMeans
+
+    Xs = np.load(embeddings_path, mmap_mode='r')[rows]
+    n_clusters = min(n_clusters, len(rows))
+    if n_clusters <= 1:
+        return np.zeros(len(rows), dtype=np.int64), Xs.mean(axis=0, keepdims=True)
+    km = KMeans(n_clusters=n_clusters, n_init=5, random_state=random_state).fit(Xs)
+    return km.labels_.astype(np.int64), km.cluster_centers_
+
+
+def _assign_task(embeddings_path, rows: np.ndarray, centroids: np.ndarray):
+    Xs = np.asarray(np.load(embeddings_path, mmap_mode='r')[rows], dtype=np.float64)
+    d2 = (Xs ** 2).sum(1)[:, None] - 2.0 * Xs @ centroids.T + (centroids ** 2).sum(1)[None, :]
+    return d2.argmin(axis=1)
+
+# ── Stages ────────────────────────────────────────────────────────────────────
+
+class ShardedRunner:
+    """Process pool plus the on-disk embedding matrix shared by the shard tasks."""
+
+    def __init__(self, shard_ids: np.ndarray, shard_names: list[str], workers: int | None = None,
+                 embeddings_path=None):
+        self.shard_ids = np.asarray(shard_ids)
+        self.shard_names = shard_names
+        self.rows = shard_rows(self.shard_ids)
+        self.workers = workers or os.cpu_count() or 1
+        self.embeddings_path = embeddings_path
+        self.pool = None
+
+    def __enter__(self):
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self
+
+    def __exit__(self, *exc):
+        self.pool.shutdown()
+        if self.embeddings_path is not None and os.path.exists(self.embeddings_path):
+            os.remove(self.embeddings_path)
+        return False
+
+    def describe(self) -> str:
+        sizes = np.bincount(self.shard_ids, minlength=len(self.shard_names))
+        top = ', '.join(f"{self.shard_names[s]} ({sizes[s]})" for s in np.argsort(-sizes)[:5])
+        return f"{len(self.rows)} shards, {self.workers} workers; largest: {top}"
+
+    def prepare(self, df: pd.DataFrame) -> pd.DataFrame:
+        """title_clean, text and Individual_Skills for every row, one task per shard."""
+        parts = [df.iloc[rows] for rows in self.rows]
+        out = pd.concat(self.pool.map(_prepare_task, parts))
+        return out.loc[df.index]
+
+    def share_embeddings(self, X: np.ndarray, path) -> None:
+        """Write X once; shard tasks memory-map it instead of receiving a pickled copy."""
+        np.save(path, np.asarray(X, dtype=np.float32))
+        self.embeddings_path = str(path)
+
+    def top_k(self, k: int):
+        """Exact global top-k (self excluded) from per-shard candidate lists."""
+        tasks = [self.pool.submit(_top_k_task, self.embeddings_path, rows, k + 1) for rows in self.rows]
+        candidates = [t.result() for t in tasks]
+        return merge_top_k(candidates, k)
+
+    def kmeans(self, X: np.ndarray, k: int, init=None, random_state: int = 42):
+        """Per-shard KMeans reconciled into k global clusters. Returns (labels, centroids)."""
+        from sklearn.cluster import KMeans
+
+        n = len(X)
+        local = []
+        for i, rows in enumerate(self.rows):
+            k_local = max(1, int(np.ceil(OVERSEGMENT * k * len(rows) / n)))
+            local.append(self.pool.submit(_kmeans_task, self.embeddings_path, rows, k_local,
+                                          random_state + i))
+        local = [t.result() for t in local]
+
+        # Reconcile: cluster the shard centroids, weighted by how many jobs each represents
+        centres = np.vstack([c for _, c in local])
+        weights = np.concatenate([np.bincount(l, minlength=len(c)) for l, c in local])
+        k_global = min(k, len(centres))
+        if init is not None and len(init) == k_global:
+            km = KMeans(n_clusters=k_global, init=np.asarray(init, dtype=centres.dtype), n_init=1,
+                        random_state=random_state)
+        else:
+            km = KMeans(n_clusters=k_global, n_init=10, random_state=random_state)
+        km.fit(centres, sample_weight=weights)
+
+        labels = np.empty(n, dtype=np.int64)
+        offset = 0
+        for rows, (l, c) in zip(self.rows, local):
+            labels[rows] = km.labels_[offset + l]
+            offset += len(c)
+        print(f"  {len(centres)} shard clusters reconciled into {k_global} global clusters")
+
+        # Global assignment passes (Lloyd steps over the whole corpus, parallel by shard)
+        for _ in range(REFINE_PASSES):
+            centroids = cluster_means(X, labels, k_global)
+            tasks = [self.pool.submit(_assign_task, self.embeddings_path, rows, centroids)
+                     for rows in self.rows]
+            new = labels.copy()
+            for rows, t in zip(self.rows, tasks):
+                new[rows] = t.result()
+            changed = int((new != labels).sum())
+            labels = new
+            if not changed:
+                break
+        _, labels = np.unique(labels, return_inverse=True)     # drop clusters emptied by the passes
+        return labels, cluster_means(X, labels, int(labels.max()) + 1)
+
+
+def cluster_means(X: np.ndarray, labels: np.ndarray, k: int) -> np.ndarray:
+    """Mean vector per cluster id 0..k-1 via one sparse indicator product."""
+    n = len(labels)
+    indicator = sparse.csr_matrix((np.ones(n), (labels, np.arange(n))), shape=(k, n))
+    counts = np.asarray(indicator.sum(axis=1)).ravel()
+    return (np.asarray(indicator @ X) / np.maximum(counts, 1)[:, None]).astype(np.float32)
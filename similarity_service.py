@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Asyncio similarity query service over the job embedding store.
+
+Serves top-k and pairwise similarity queries against the normalized
+embeddings written by generate_backend_data.py (artifacts/). Concurrent
+requests that arrive within a short window are coalesced into one batched
+matrix multiply, which gives much higher throughput than answering dashboard
+bursts one query at a time. Only the standard library and NumPy are used.
+
+Endpoints:
+    GET  /health
+    GET  /metrics                        latency / batch-size histograms
+    POST /topk        {"employee_id": "EMP_0001", "k": 10}
+                      {"vector": [...], "k": 10}
+    POST /similarity  {"employee_id": "EMP_0001", "others": ["EMP_0002", ...]}
+
+Usage:
+    python similarity_service.py --port 8100 --window-ms 5 --max-batch 64
+    python similarity_service.py --quantize int8    # compact codes + re-rank
+    python similarity_service.py --quantize pq --subspaces 32
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_ARTIFACTS_DIR = Path('artifacts')
+EMBEDDINGS_FILENAME = 'embeddings_normalized.npy'
+JOB_INDEX_FILENAME = 'job_index.json'
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is +inf
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# ── Store ─────────────────────────────────────────────────────────────────────
+
+class EmbeddingStore:
+    """Row-normalized embeddings plus the employee_id → row map.
+
+    With a quantized `index` (see quantization.py) queries are scored on the
+    compact codes and `embeddings` may be a read-only memmap that is only
+    touched to re-rank candidates, so full precision does not need to be hot.
+    """
+
+    def __init__(self, embeddings: np.ndarray, job_index: list[dict], index=None, rerank: int = 4):
+        if index is None:
+            X = np.asarray(embeddings, dtype=np.float32)
+            norms = np.linalg.norm(X, axis=1, keepdims=True)
+            embeddings = X / np.maximum(norms, 1e-12)
+        self.embeddings = embeddings
+        self.index = index
+        self.rerank = rerank
+        self.job_index = job_index
+        self.row_of = {job['employee_id']: i for i, job in enumerate(job_index)}
+
+    @classmethod
+    def load(cls, artifacts_dir=DEFAULT_ARTIFACTS_DIR, quantize: str | None = None,
+             rerank: int = 4, n_subspaces: int | None = None) -> 'EmbeddingStore':
+        base = Path(artifacts_dir)
+        with open(base / JOB_INDEX_FILENAME) as f:
+            job_index = json.load(f)
+        if not quantize:
+            return cls(np.load(base / EMBEDDINGS_FILENAME), job_index)
+
+        from quantization import build_index, load_index, save_index, store_fingerprint
+        full = np.load(base / EMBEDDINGS_FILENAME, mmap_mode='r')
+        source = store_fingerprint(base / EMBEDDINGS_FILENAME, full)
+        index_path = base / f'embeddings_{quantize}.npz'
+        index = load_index(index_path) if index_path.exists() else None
+        if index is not None and quantize == 'pq' and not n_subspaces \
+                and full.shape[1] % index.n_subspaces == 0:
+            n_subspaces = index.n_subspaces      # keep a saved layout (e.g. quantization.py --save)
+        if index is not None and (index.source != source or len(index) != len(full)):
+            print(f"{index_path.name} was built from other embeddings; rebuilding...")
+            index = None
+        elif index is not None and quantize == 'pq' and index.n_subspaces != n_subspaces:
+            print(f"{index_path.name} has {index.n_subspaces} sub-spaces, not {n_subspaces}; rebuilding...")
+            index = None
+        if index is None:
+            kwargs = {'n_subspaces': n_subspaces} if quantize == 'pq' else {}
+            index = build_index(full, kind=quantize, **kwargs)
+            save_index(index, index_path, source=source)
+        return cls(full, job_index, index=index, rerank=rerank)
+
+    def __len__(self):
+        return len(self.embeddings)
+
+    @property
+    def dim(self) -> int:
+        return self.embeddings.shape[1]
+
+    def vector_for(self, employee_id: str) -> np.ndarray:
+        if employee_id not in self.row_of:
+            raise KeyError(f"Unknown employee_id: {employee_id}")
+        return np.asarray(self.embeddings[self.row_of[employee_id]], dtype=np.float32)
+
+    def scores(self, Q: np.ndarray) -> np.ndarray:
+        """(b, n) similarity of each query to every job (approximate if quantized)."""
+        if self.index is not None:
+            return self.index.scores(Q)
+        return Q @ self.embeddings.T
+
+    def exact(self, q: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Full-precision similarity of one query to the given rows."""
+        order = np.argsort(rows)
+        out = np.empty(len(rows), dtype=np.float32)
+        out[order] = np.asarray(self.embeddings[rows[order]], dtype=np.float32) @ q
+        return out
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative counts on export)."""
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bucket bound containing quantile q (None if empty)."""
+        if not self.total:
+            return None
+        target = q * self.total
+        running = 0
+        for i, count in enumerate(self.counts):
+            running += count
+            if running >= target:
+                return self.bounds[i] if i < len(self.bounds) else float('inf')
+        return float('inf')
+
+    def to_dict(self) -> dict:
+        cumulative, running = {}, 0
+        for bound, count in zip(list(self.bounds) + ['+Inf'], self.counts):
+            running += count
+            cumulative[str(bound)] = running
+        return {
+            'count':   self.total,
+            'sum':     round(self.sum, 3),
+            'mean':    round(self.sum / self.total, 3) if self.total else None,
+            'p50':     self.quantile(0.50),
+            'p95':     self.quantile(0.95),
+            'p99':     self.quantile(0.99),
+            'buckets': cumulative,
+        }
+
+# ── Micro-batching ────────────────────────────────────────────────────────────
+
+class MicroBatcher:
+    """Coalesces queries arriving within window_ms into one matrix multiply.
+
+    Each queued item is (query_vector, handler, future); handler turns the
+    query's full similarity row (and the query vector, for re-ranking) into
+    the response payload.
+    """
+
+    def __init__(self, store: EmbeddingStore, window_ms: float = 5.0, max_batch: int = 64):
+        self.store = store
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.batch_sizes = Histogram((1, 2, 4, 8, 16, 32, 64, 128, 256))
+        self.compute_ms = Histogram(LATENCY_BUCKETS_MS)
+        self._task = None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, vector: np.ndarray, handler):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((vector, handler, future))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self.queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _score(self, Q: np.ndarray) -> np.ndarray:
+        return self.store.scores(Q)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            Q = np.stack([item[0] for item in batch]).astype(np.float32)
+            start = time.perf_counter()
+            try:
+                # NumPy releases the GIL, so the event loop keeps accepting requests
+                S = await loop.run_in_executor(None, self._score, Q)
+            except Exception as exc:  # fail this batch only; the batcher keeps running
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.compute_ms.observe((time.perf_counter() - start) * 1000)
+            self.batch_sizes.observe(len(batch))
+            for row, (vector, handler, future) in zip(S, batch):
+                if future.done():
+                    continue
+                try:
+                    future.set_result(handler(row, vector))
+                except Exception as exc:  # surface per-request errors to that caller only
+                    future.set_exception(exc)
+
+# ── Query handlers ────────────────────────────────────────────────────────────
+
+def top_k_handler(store: EmbeddingStore, k: int, exclude_row: int | None = None):
+    def handle(row: np.ndarray, query: np.ndarray) -> dict:
+        scores = row.copy()
+        if exclude_row is not None:
+            scores[exclude_row] = -np.inf
+        kk = min(k, len(scores) - (exclude_row is not None))
+        if kk <= 0:
+            return {'results': []}
+        # Quantized stores re-rank a wider candidate pool at full precision
+        pool = min(len(scores) - (exclude_row is not None),
+                   kk * store.rerank if store.index is not None else kk)
+        top = np.argpartition(-scores, pool - 1)[:pool]
+        if store.index is not None:
+            scores[top] = store.exact(query, top)
+        top = top[np.argsort(-scores[top])][:kk]
+        return {'results': [
+            {
+                'employee_id': store.job_index[j]['employee_id'],
+                'title':       store.job_index[j].get('title'),
+                'cluster':     store.job_index[j].get('cluster'),
+                'similarity':  round(float(scores[j]), 6),
+            }
+            for j in top
+        ]}
+    return handle
+
+
+def similarity_handler(store: EmbeddingStore, others: list[str]):
+    rows = np.array([store.row_of[o] for o in others], dtype=np.int64)
+
+    def handle(row: np.ndarray, query: np.ndarray) -> dict:
+        values = store.exact(query, rows) if store.index is not None else row[rows]
+        return {'results': [
+            {'employee_id': o, 'similarity': round(float(v), 6)}
+            for o, v in zip(others, values)
+        ]}
+    return handle
+
+# ── HTTP ──────────────────────────────────────────────────────────────────────
+
+class BadRequest(Exception):
+    pass
+
+
+class SimilarityService:
+    def __init__(self, store: EmbeddingStore, window_ms: float = 5.0, max_batch: int = 64,
+                 max_k: int = 100):
+        self.store = store
+        self.batcher = MicroBatcher(store, window_ms=window_ms, max_batch=max_batch)
+        self.max_k = max_k
+        self.latency = {path: Histogram(LATENCY_BUCKETS_MS) for path in ('/topk', '/similarity')}
+        self.errors = 0
+
+    def _query_vector(self, body: dict) -> tuple[np.ndarray, int | None]:
+        if 'employee_id' in body:
+            emp = body['employee_id']
+            if not isinstance(emp, str):
+                raise BadRequest("employee_id must be a string")
+            if emp not in self.store.row_of:
+                raise BadRequest(f"Unknown employee_id: {emp}")
+            return self.store.vector_for(emp), self.store.row_of[emp]
+        if 'vector' in body:
+            try:
+                v = np.asarray(body['vector'], dtype=np.float32)
+            except (TypeError, ValueError):
+                raise BadRequest("vector must be a list of numbers")
+            if v.shape != (self.store.dim,):
+                raise BadRequest(f"vector must have {self.store.dim} dimensions")
+            if not np.isfinite(v).all():
+                raise BadRequest("vector must not contain NaN or Infinity")
+            return v / max(float(np.linalg.norm(v)), 1e-12), None
+        raise BadRequest("Pass 'employee_id' or 'vector'")
+
+    async def topk(self, body: dict) -> dict:
+        vector, row = self._query_vector(body)
+        k = body.get('k', 10)
+        if not isinstance(k, int) or isinstance(k, bool) or not 1 <= k <= self.max_k:
+            raise BadRequest(f"k must be between 1 and {self.max_k}")
+        exclude = row if body.get('exclude_self', True) else None
+        return await self.batcher.submit(vector, top_k_handler(self.store, k, exclude))
+
+    async def similarity(self, body: dict) -> dict:
+        vector, _ = self._query_vector(body)
+        others = body.get('others') or []
+        if not isinstance(others, list) or not all(isinstance(o, str) for o in others):
+            raise BadRequest("others must be a list of employee_id strings")
+        unknown = [o for o in others if o not in self.store.row_of]
+        if unknown:
+            raise BadRequest(f"Unknown employee_id(s): {', '.join(unknown[:5])}")
+        return await self.batcher.submit(vector, similarity_handler(self.store, others))
+
+    def metrics(self) -> dict:
+        return {
+            'jobs':           len(self.store),
+            'quantized':      self.store.index.kind if self.store.index is not None else None,
+            'window_ms':      self.batcher.window * 1000,
+            'max_batch':      self.batcher.max_batch,
+            'errors':         self.errors,
+            'latency_ms':     {path: h.to_dict() for path, h in self.latency.items()},
+            'batch_compute_ms': self.batcher.compute_ms.to_dict(),
+            'batch_size':     self.batcher.batch_sizes.to_dict(),
+        }
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> tuple[int, dict]:
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok', 'jobs': len(self.store)}
+        if method == 'GET' and path == '/metrics':
+            return 200, self.metrics()
+        if method == 'POST' and path in self.latency:
+            start = time.perf_counter()
+            try:
+                payload = json.loads(body or b'{}')
+                if not isinstance(payload, dict):
+                    raise BadRequest("Request body must be a JSON object")
+                handler = self.topk if path == '/topk' else self.similarity
+                result = await handler(payload)
+            except (BadRequest, ValueError) as exc:
+                self.errors += 1
+                return 400, {'error': str(exc)}
+            except Exception as exc:  # never drop the connection without a response
+                self.errors += 1
+                return 500, {'error': f"{type(exc).__name__}: {exc}"}
+            self.latency[path].observe((time.perf_counter() - start) * 1000)
+            return 200, result
+        return 404, {'error': 'Not found'}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = (version == 'HTTP/1.1'
+                              and headers.get('connection', '').lower() != 'close')
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # The body's end is unknown, so answer and close instead of reading on
+                    self.errors += 1
+                    status, payload, keep_alive = 400, {'error': 'Invalid Content-Length'}, False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = await self.dispatch(method.upper(), target.split('?')[0], body)
+                try:
+                    data = json.dumps(payload, allow_nan=False).encode()
+                except ValueError as exc:  # a non-finite score must not become invalid JSON
+                    self.errors += 1
+                    status = 500
+                    data = json.dumps({'error': f"ValueError: {exc}"}).encode()
+                reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+                          500: 'Internal Server Error'}.get(status, 'OK')
+                writer.write(
+                    f"HTTP/1.1 {status} {reason}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        self.batcher.start()
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"🚀 Similarity service on http://{host}:{port} "
+              f"({len(self.store)} jobs, window={self.batcher.window * 1000:g}ms, "
+              f"max_batch={self.batcher.max_batch})")
+        async with server:
+            await server.serve_forever()
+
+# ── Main ──────────────────────────────────────────────────────────────────────
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-batched similarity query service.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8100)
+    parser.add_argument('--artifacts', default=str(DEFAULT_ARTIFACTS_DIR),
+                        help="Directory with embeddings_normalized.npy and job_index.json")
+    parser.add_argument('--window-ms', type=float, default=5.0,
+                        help="How long to wait for more requests before running a batch")
+    parser.add_argument('--max-batch', type=int, default=64, help="Maximum queries per batch")
+    parser.add_argument('--max-k', type=int, default=100, help="Largest k accepted by /topk")
+    parser.add_argument('--quantize', choices=['float16', 'int8', 'pq'],
+                        help="Score on quantized codes and re-rank from the on-disk float32 store")
+    parser.add_argument('--rerank', type=int, default=4,
+                        help="Candidate pool multiplier for quantized re-ranking")
+    parser.add_argument('--subspaces', type=int,
+                        help="PQ sub-spaces for --quantize pq (must divide the embedding dimension; "
+                             "default: the saved index's, else derived from the dimension)")
+    args = parser.parse_args(argv)
+    if args.subspaces is not None and args.subspaces < 1:
+        parser.error("--subspaces must be at least 1")
+
+    try:
+        store = EmbeddingStore.load(args.artifacts, quantize=args.quantize, rerank=args.rerank,
+                                    n_subspaces=args.subspaces)
+    except FileNotFoundError as exc:
+        sys.exit(f"ERROR: {exc} (run generate_backend_data.py first)")
+    except ValueError as exc:
+        sys.exit(f"ERROR: {exc}")
+
+    service = SimilarityService(store, window_ms=args.window_ms,
+                                max_batch=args.max_batch, max_k=args.max_k)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
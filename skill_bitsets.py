@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Skill sets as packed bitsets, with vectorized pairwise overlap.
+
+Each job's skills become bits in a row of uint64 words over the skill
+vocabulary (the SKILL_LEXICON names, in order), so comparing two jobs is an
+AND / OR plus a popcount per word. Any list of pairs — or every edge of a
+top-k neighbour list — is scored in one NumPy pass instead of Python set
+operations per pair.
+
+Metrics:
+  - 'jaccard' : |A ∩ B| / |A ∪ B|
+  - 'overlap' : |A ∩ B| / min(|A|, |B|)   (a subset scores 1)
+  - 'shared'  : |A ∩ B|
+
+`hybrid_rerank` re-orders neighbour lists by
+(1 - skill_weight) · embedding similarity + skill_weight · skill score.
+
+Usage:
+    from skill_bitsets import encode_skills, neighbour_skill_scores, hybrid_rerank
+
+    B = encode_skills(df['Individual_Skills'], list(SKILL_LEXICON))
+    jac = neighbour_skill_scores(B, nn_idx)                  # N × k
+    nn_idx, nn_score, jac = hybrid_rerank(nn_idx, nn_sim, B, skill_weight=0.2)
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+SKILL_BITS_VERSION = 1
+PAIR_BLOCK = 1 << 20
+
+# Bit counts of every byte value (popcount fallback for NumPy < 2.0)
+_BYTE_POPCOUNT = np.array([bin(b).count('1') for b in range(256)], dtype=np.uint8)
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits per row of a (…, W) uint64 array, summed over the words."""
+    words = np.ascontiguousarray(words, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        bits = np.bitwise_count(words)
+    else:
+        bits = _BYTE_POPCOUNT[words.view(np.uint8)].reshape(*words.shape, 8).sum(axis=-1)
+    return bits.sum(axis=-1, dtype=np.int64)
+
+
+def encode_skills(skill_lists, vocabulary: list[str]) -> np.ndarray:
+    """(N, ceil(V / 64)) uint64 bitsets; skills outside the vocabulary are ignored."""
+    position = {name: i for i, name in enumerate(vocabulary)}
+    n_words = max(1, (len(vocabulary) + 63) // 64)
+    rows, cols = [], []
+    for r, skills in enumerate(skill_lists):
+        for name in skills or ():
+            i = position.get(name)
+            if i is not None:
+                rows.append(r)
+                cols.append(i)
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    B = np.zeros((len(skill_lists), n_words), dtype=np.uint64)
+    np.bitwise_or.at(B, (rows, cols // 64), np.left_shift(np.uint64(1), (cols % 64).astype(np.uint64)))
+    return B
+
+
+def decode_skills(B: np.ndarray, vocabulary: list[str]) -> list[list[str]]:
+    shifts = np.arange(64, dtype=np.uint64)
+    bits = ((np.atleast_2d(B)[:, :, None] >> shifts) & np.uint64(1)).reshape(len(np.atleast_2d(B)), -1)
+    return [[vocabulary[i] for i in np.flatnonzero(row[:len(vocabulary)])] for row in bits]
+
+
+def pair_skill_scores(B: np.ndarray, left, right, metric: str = 'jaccard',
+                      B_right: np.ndarray | None = None) -> np.ndarray:
+    """Score the pairs (left[p], right[p]); right indexes B_right (default: B). Empty sets score 0."""
+    left = np.asarray(left, dtype=np.int64).ravel()
+    right = np.asarray(right, dtype=np.int64).ravel()
+    B_right = B if B_right is None else B_right
+    sizes_left, sizes_right = popcount(B), popcount(B_right)
+    out = np.zeros(len(left), dtype=np.float32)
+    for start in range(0, len(left), PAIR_BLOCK):
+        l, r = left[start:start + PAIR_BLOCK], right[start:start + PAIR_BLOCK]
+        shared = popcount(B[l] & B_right[r])
+        if metric == 'shared':
+            out[start:start + len(l)] = shared
+            continue
+        if metric == 'jaccard':
+            denom = sizes_left[l] + sizes_right[r] - shared
+        elif metric == 'overlap':
+            denom = np.minimum(sizes_left[l], sizes_right[r])
+        else:
+            raise ValueError(f"Unknown skill metric: {metric!r} (use 'jaccard', 'overlap' or 'shared')")
+        out[start:start + len(l)] = shared / np.maximum(denom, 1)
+    return out
+
+
+def neighbour_skill_scores(B: np.ndarray, nn_idx: np.ndarray, metric: str = 'jaccard') -> np.ndarray:
+    """Skill score of every (row, neighbour) edge of a top-k list; same shape as nn_idx."""
+    nn_idx = np.asarray(nn_idx)
+    left = np.repeat(np.arange(len(nn_idx)), nn_idx.shape[1])
+    return pair_skill_scores(B, left, nn_idx.ravel(), metric).reshape(nn_idx.shape)
+
+
+def hybrid_rerank(nn_idx: np.ndarray, nn_sim: np.ndarray, B: np.ndarray, skill_weight: float = 0.2,
+                  metric: str = 'jaccard'):
+    """Re-order each neighbour list by the blended score. Returns (indices, scores, skill scores)."""
+    skill = neighbour_skill_scores(B, nn_idx, metric)
+    score = (1.0 - skill_weight) * np.asarray(nn_sim, dtype=np.float32) + skill_weight * skill
+    order = np.argsort(-score, axis=1, kind='stable')
+    return (np.take_along_axis(nn_idx, order, axis=1), np.take_along_axis(score, order, axis=1),
+            np.take_along_axis(skill, order, axis=1))
+
+# ── Persistence ───────────────────────────────────────────────────────────────
+
+def save_skill_bits(path, B: np.ndarray, vocabulary: list[str]) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path, version=SKILL_BITS_VERSION, bits=B, vocabulary=np.asarray(vocabulary, dtype=str))
+
+
+def load_skill_bits(path):
+    """(bitsets, vocabulary), or (None, None) if the file does not exist."""
+    if not Path(path).exists():
+        return None, None
+    with np.load(path, allow_pickle=False) as data:
+        if int(data['version']) != SKILL_BITS_VERSION:
+            raise ValueError(f"{path}: unsupported skill bitset version {int(data['version'])}")
+        return data['bits'], data['vocabulary'].tolist()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+On-demand drill-down: split one cluster into sub-clusters without rerunning
+the pipeline.
+
+Only the rows of the requested cluster are read: their embeddings come from
+the memory-mapped artifacts/embeddings_normalized.npy and their texts from
+the offset-indexed text store written by generate_backend_data.py. The
+subset is clustered with KMeans for every k in a small range, k is picked by
+silhouette score, and sub-keywords are c-TF-IDF terms that separate the
+sub-clusters from each other. Results are cached in memory and on disk,
+keyed by (cluster, parameters, artifact fingerprint), so a repeated request
+is instant and a pipeline rerun invalidates old results.
+
+Prerequisites:
+    python generate_backend_data.py   # writes artifacts/
+
+Usage (CLI):
+    python subcluster.py 7                       # automatic k
+    python subcluster.py 7 --k 4 --output it_split.json
+
+Usage (API):
+    from subcluster import Subclusterer
+
+    sub = Subclusterer.load()
+    result = sub.subcluster(7)
+    result = sub.subcluster(7, k=4, top_keywords=8)
+"""
+
+import sys
+import json
+import time
+import hashlib
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+import generate_backend_data as gbd
+from cluster_keywords import cluster_keywords
+
+CACHE_DIR = gbd.ARTIFACTS_DIR / 'subclusters'
+CACHE_VERSION = 1
+SILHOUETTE_SAMPLE = 2000
+MAX_AUTO_K = 10
+
+
+def read_texts(texts_path, offsets: np.ndarray, rows: np.ndarray) -> list[str]:
+    """Texts of the given rows from the text store (one seek per row, nothing else loaded)."""
+    texts = []
+    with open(texts_path, 'rb') as f:
+        for r in rows:
+            f.seek(int(offsets[r]))
+            texts.append(f.read(int(offsets[r + 1] - offsets[r])).decode('utf-8'))
+    return texts
+
+
+def choose_k(X: np.ndarray, k_values, random_state: int = 42):
+    """KMeans for every k, best by (sampled) silhouette. Returns (k, labels, {k: score})."""
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+    from sklearn.metrics import silhouette_score
+
+    sample = min(len(X), SILHOUETTE_SAMPLE)
+    best, scores = None, {}
+    for k in k_values:
+        if len(X) > 20_000:
+            model = MiniBatchKMeans(n_clusters=k, random_state=random_state, batch_size=4096, n_init=3)
+        else:
+            model = KMeans(n_clusters=k, random_state=random_state, n_init=3)
+        labels = model.fit_predict(X)
+        if len(np.unique(labels)) < 2:
+            continue
+        scores[k] = float(silhouette_score(X, labels, sample_size=sample, random_state=random_state))
+        if best is None or scores[k] > scores[best[0]]:
+            best = (k, labels)
+    if best is None:
+        return 1, np.zeros(len(X), dtype=np.int64), scores
+    return best[0], best[1], scores
+
+
+class Subclusterer:
+    """Holds the job index and memory-mapped stores; create once, drill down many times."""
+
+    def __init__(self, embeddings, job_index, cluster_labels, texts_path, text_offsets,
+                 fingerprint: str = '', cache_dir=CACHE_DIR):
+        self.embeddings = embeddings
+        self.job_index = job_index
+        self.clusters = np.array([j['cluster'] for j in job_index], dtype=np.int64)
+        self.cluster_labels = {int(k): v for k, v in cluster_labels.items()}
+        self.texts_path = texts_path
+        self.text_offsets = text_offsets
+        self.fingerprint = fingerprint
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._cache: dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, artifacts_dir=None, cache_dir=None) -> 'Subclusterer':
+        base = Path(artifacts_dir) if artifacts_dir else gbd.ARTIFACTS_DIR
+        paths = {
+            'embeddings':   base / gbd.EMBEDDINGS_FILE.name,
+            'job_index':    base / gbd.JOB_INDEX_FILE.name,
+            'labels':       base / gbd.CLUSTER_LABELS_FILE.name,
+            'texts':        base / gbd.TEXTS_FILE.name,
+            'text_offsets': base / gbd.TEXT_OFFSETS_FILE.name,
+        }
+        missing = [str(p) for p in paths.values() if not p.exists()]
+        if missing:
+            raise FileNotFoundError(
+                "Missing artifacts (run generate_backend_data.py first): " + ", ".join(missing)
+            )
+        with open(paths['job_index']) as f:
+            job_index = json.load(f)
+        with open(paths['labels']) as f:
+            cluster_labels = json.load(f)
+        stat = paths['embeddings'].stat()
+        fingerprint = f"{stat.st_size}:{stat.st_mtime_ns}"
+
+        return cls(
+            embeddings=np.load(paths['embeddings'], mmap_mode='r'),
+            job_index=job_index,
+            cluster_labels=cluster_labels,
+            texts_path=paths['texts'],
+            text_offsets=np.load(paths['text_offsets']),
+            fingerprint=fingerprint,
+            cache_dir=cache_dir or base / CACHE_DIR.name,
+        )
+
+    def cache_key(self, cluster_id: int, params: dict) -> str:
+        payload = json.dumps({'v': CACHE_VERSION, 'cluster': cluster_id, 'params': params,
+                              'artifacts': self.fingerprint}, sort_keys=True)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+    def subcluster(self, cluster_id: int, k: int | None = None, max_k: int = MAX_AUTO_K,
+                   top_keywords: int = 5, n_examples: int = 5, random_state: int = 42) -> dict:
+        """Split one cluster. k=None picks k in 2..max_k by silhouette."""
+        cluster_id = int(cluster_id)
+        if k is not None and k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        params = {'k': k, 'max_k': max_k, 'top_keywords': top_keywords,
+                  'n_examples': n_examples, 'random_state': random_state}
+        key = self.cache_key(cluster_id, params)
+        if key in self._cache:
+            return self._cache[key]
+        cache_file = self.cache_dir / f"cluster_{cluster_id}_{key}.json" if self.cache_dir else None
+        if cache_file is not None and cache_file.exists():
+            with open(cache_file) as f:
+                result = json.load(f)
+            self._cache[key] = result
+            return result
+
+        start = time.perf_counter()
+        rows = np.flatnonzero(self.clusters == cluster_id)
+        if len(rows) == 0:
+            raise KeyError(f"Cluster {cluster_id} has no jobs")
+        X = np.asarray(self.embeddings[rows], dtype=np.float32)   # reads only this cluster's rows
+
+        if k is not None:
+            k_values = [min(k, len(rows))]
+        else:
+            k_values = list(range(2, min(max_k, len(rows) - 1) + 1))
+        chosen, labels, scores = choose_k(X, k_values, random_state=random_state)
+
+        texts = read_texts(self.texts_path, self.text_offsets, rows)
+        keywords = (cluster_keywords(texts, labels, top_k=top_keywords, ngram_range=(1, 2),
+                                     min_df=1 if len(rows) < 50 else 2)
+                    if chosen > 1 else {})
+
+        subclusters = []
+        for s in range(chosen):
+            members = rows[labels == s]
+            centre = X[labels == s].mean(axis=0)
+            # Examples: the members closest to the sub-cluster centre
+            order = np.argsort(-(X[labels == s] @ centre))[:n_examples]
+            subclusters.append({
+                'id':             s,
+                'size':           int(len(members)),
+                'keywords':       keywords.get(s, []),
+                'example_titles': [self.job_index[r]['title'] for r in members[order]],
+                'employee_ids':   [self.job_index[r]['employee_id'] for r in members],
+            })
+        subclusters.sort(key=lambda c: -c['size'])
+
+        result = {
+            'cluster_id':    cluster_id,
+            'cluster_label': self.cluster_labels.get(cluster_id, f"Cluster {cluster_id}"),
+            'size':          int(len(rows)),
+            'k':             int(chosen),
+            'silhouette':    {str(kk): round(v, 4) for kk, v in scores.items()},
+            'params':        params,
+            'elapsed_s':     round(time.perf_counter() - start, 3),
+            'subclusters':   subclusters,
+        }
+        self._cache[key] = result
+        if cache_file is not None:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_file, 'w') as f:
+                json.dump(result, f)
+        return result
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split one cluster into sub-clusters.")
+    parser.add_argument('cluster', type=int, help="Cluster id (see artifacts/cluster_labels.json)")
+    parser.add_argument('--k', type=int, help="Number of sub-clusters (default: automatic)")
+    parser.add_argument('--max-k', type=int, default=MAX_AUTO_K, help="Largest k tried automatically")
+    parser.add_argument('--top-keywords', type=int, default=5, help="Keywords per sub-cluster")
+    parser.add_argument('--artifacts', help="Artifacts directory (default: artifacts/)")
+    parser.add_argument('--output', help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+    if args.k is not None and args.k < 1:
+        parser.error("--k must be at least 1")
+    if args.max_k < 2:
+        parser.error("--max-k must be at least 2")
+
+    sub = Subclusterer.load(args.artifacts)
+    try:
+        result = sub.subcluster(args.cluster, k=args.k, max_k=args.max_k, top_keywords=args.top_keywords)
+    except KeyError as exc:
+        known = ', '.join(str(c) for c in np.unique(sub.clusters))
+        sys.exit(f"ERROR: {exc.args[0]} (cluster ids: {known})")
+    print(f"{result['cluster_label']}: {result['size']} jobs → {result['k']} sub-clusters "
+          f"in {result['elapsed_s']:.2f}s", file=sys.stderr)
+
+    payload = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(payload, encoding='utf-8')
+        print(f"✅ Wrote {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+
+
+if __name__ == '__main__':
+    main()